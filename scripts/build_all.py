@@ -0,0 +1,167 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/build_all.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Full refresh of every index in one process: domain summaries, api-docs,
+# events and one lob-<folder> index per lob_samples folder, run as a job graph
+# (utils/build_scheduler.py) instead of one process_* script after another.
+#
+# Jobs and priorities (lower goes first when they compete for a budget):
+#   summaries    0  stage-1 domain summaries
+#   router       0  platform router, after summaries (reuses their vectors)
+#   api-docs     1  markdown docs and the OpenAPI spec sync
+#   events       2
+#   lob-<folder> 2
+#
+# The corpora run concurrently and share one embedding quota and one upload
+# limit, so the full refresh takes about as long as the largest corpus while
+# staying inside the deployment's quota:
+#   EMBEDDING_TPM / EMBEDDING_RPM    per-minute quota (default: unlimited)
+#   EMBEDDING_CONCURRENCY            embedding requests in flight (default 4)
+#   AZURE_OPENAI_EMBEDDING_BATCH     texts per embedding request (default 16)
+#   UPLOAD_CONCURRENCY               upload batches in flight (default 4)
+#   BUILD_PROGRESS_S                 seconds between progress lines (default 15)
+#
+#   python scripts/build_all.py
+#   python scripts/build_all.py --corpora summaries,lob --lob-folders healthcare,retail
+#
+# A combined throughput report closes the run; the exit code is 1 if any job
+# failed. Blue/green rebuilds stay with rebuild_index.py.
+
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+from embedders import get_embedder
+from utils.embedding_cache import get_embedding_cache
+from utils.platform_router import build_platform_router
+from utils.metrics import configure_sdk_logging, export_metrics, observe
+from utils.build_scheduler import (
+    JobGraph, EmbeddingQuota, UploadLimiter, install_budgets, UPLOAD_CONCURRENCY
+)
+from process_docs import process_domain_summaries, process_api_docs
+from process_events import process_events
+from process_lob import process_lob
+
+load_dotenv()
+
+CORPORA = ("summaries", "api-docs", "events", "lob")
+BUILD_PROGRESS_S = float(os.getenv("BUILD_PROGRESS_S", "15"))
+
+
+def lob_folders() -> list:
+    return sorted(name for name in os.listdir("lob_samples") if os.path.isdir(os.path.join("lob_samples", name)))
+
+
+def build_graph(corpora: list, folders: list = None, denormalize: bool = None) -> JobGraph:
+    graph = JobGraph()
+    if "summaries" in corpora:
+        graph.add("summaries", lambda _: process_domain_summaries(build_router=False), priority=0)
+        graph.add("router", lambda results: build_platform_router(
+            results["summaries"], embedder_key=get_embedder().cache_key
+        ), priority=0, after=("summaries",))
+    if "api-docs" in corpora:
+        graph.add("api-docs", lambda _: process_api_docs(), priority=1)
+    if "events" in corpora:
+        graph.add("events", lambda _: process_events(), priority=2)
+    if "lob" in corpora:
+        for folder in folders or lob_folders():
+            graph.add(f"lob-{folder}", lambda _, folder=folder: process_lob(
+                denormalize, index_name=f"lob-{folder}", folder_name=folder
+            ), priority=2)
+    return graph
+
+
+def _rate(count: float, seconds: float) -> str:
+    return f"{count / seconds:,.0f}/s" if seconds > 0 and count else "-"
+
+
+def print_progress(graph: JobGraph, quota: EmbeddingQuota, uploads: UploadLimiter):
+    jobs = list(graph.jobs.values())
+    parts = [f"{job.name} {job.elapsed:.0f}s {job.embedded:,} emb {job.uploaded:,} up"
+             for job in jobs if job.state == "running"]
+    parts += [f"{job.name} {job.state}" for job in jobs if job.state in ("failed", "skipped")]
+    done = sum(job.state == "done" for job in jobs)
+    print(f"[build {time.monotonic() - graph.started:.0f}s] {done}/{len(jobs)} done | " + " | ".join(parts)
+          + f" || embed {quota.in_use}/{quota.limit} busy, {quota.waiting} waiting;"
+          f" upload {uploads.in_use}/{uploads.limit} busy, {uploads.waiting} waiting", flush=True)
+
+
+def print_report(graph: JobGraph, quota: EmbeddingQuota, uploads: UploadLimiter):
+    wall = graph.finished - graph.started
+    jobs = list(graph.jobs.values())
+    width = max([len(job.name) for job in jobs] + [len("total")]) + 2
+    print(f"\nBuild report ({wall:.1f}s wall clock)")
+    print(f"{'job':<{width}}{'state':<9}{'start s':>9}{'time s':>9}{'embedded':>10}{'tokens':>12}"
+          f"{'emb rate':>10}{'quota wait':>12}{'uploaded':>10}{'up rate':>10}{'upload wait':>13}")
+    for job in jobs:
+        start = f"{job.started - graph.started:.1f}" if job.started else "-"
+        tokens = f"{job.tokens:,}" if job.tokens else "-"
+        print(f"{job.name:<{width}}{job.state:<9}{start:>9}{job.elapsed:>9.1f}{job.embedded:>10,}"
+              f"{tokens:>12}{_rate(job.embedded, job.elapsed):>10}{job.embed_wait:>11.1f}s"
+              f"{job.uploaded:>10,}{_rate(job.uploaded, job.elapsed):>10}{job.upload_wait:>12.1f}s")
+        if job.elapsed:
+            observe("build_job_seconds", job.elapsed, job=job.name)
+
+    embedded = sum(job.embedded for job in jobs)
+    uploaded = sum(job.uploaded for job in jobs)
+    tokens = sum(job.tokens for job in jobs)
+    tokens = f"{tokens:,}" if tokens else "-"
+    print(f"{'total':<{width}}{'':<9}{'':>9}{wall:>9.1f}{embedded:>10,}{tokens:>12}"
+          f"{_rate(embedded, wall):>10}{'':>12}{uploaded:>10,}{_rate(uploaded, wall):>10}")
+    ran = [job for job in jobs if job.started]
+    if ran:
+        longest = max(ran, key=lambda job: job.elapsed)
+        print(f"Jobs ran for {sum(job.elapsed for job in ran):.1f}s in total; the longest, "
+              f"{longest.name}, took {longest.elapsed:.1f}s of the {wall:.1f}s wall clock.")
+    print(f"Embedding quota: {quota.describe()}; {sum(job.embed_requests for job in jobs):,} requests.")
+    print(f"Uploads: {uploads.describe()}; {sum(job.upload_batches for job in jobs):,} batches.")
+    for job in jobs:
+        if job.state == "failed":
+            print(f"FAILED {job.name}: {job.error}")
+        elif job.state == "skipped":
+            print(f"Skipped {job.name}: a dependency failed ({', '.join(job.after)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build every index concurrently under shared budgets.")
+    parser.add_argument("--corpora", default=",".join(CORPORA),
+                        help="comma-separated: summaries,api-docs,events,lob")
+    parser.add_argument("--lob-folders", default="", help="comma-separated lob_samples folders (default: all)")
+    parser.add_argument("--denormalize", action="store_true", default=None,
+                        help="LOB docs carry their linked records (also LOB_DENORMALIZE=1)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="jobs running at once (default: all; the budgets bound the actual load)")
+    parser.add_argument("--progress", type=float, default=BUILD_PROGRESS_S, metavar="SECONDS",
+                        help="seconds between progress lines; 0 disables them")
+    args = parser.parse_args()
+
+    corpora = [c.strip() for c in args.corpora.split(",") if c.strip()]
+    unknown = sorted(set(corpora) - set(CORPORA))
+    if unknown:
+        parser.error(f"unknown corpora: {', '.join(unknown)}")
+    folders = [f.strip() for f in args.lob_folders.split(",") if f.strip()] or None
+
+    configure_sdk_logging("azure_debug.log")
+    # Shared singletons are created before the jobs race to do it
+    get_embedder()
+    get_embedding_cache()
+
+    quota, uploads = EmbeddingQuota(), UploadLimiter(UPLOAD_CONCURRENCY)
+    install_budgets(quota, uploads)
+    graph = build_graph(corpora, folders, args.denormalize)
+    print(f"Building {len(graph.jobs)} jobs: {', '.join(graph.jobs)}")
+    print(f"Embedding quota: {quota.describe()}. Uploads: {uploads.describe()}.")
+    ok = graph.run(
+        workers=args.jobs, report_every=args.progress or None,
+        report=lambda g: print_progress(g, quota, uploads)
+    )
+    print_report(graph, quota, uploads)
+    export_metrics()
+    if not ok:
+        sys.exit(1)
@@ -0,0 +1,71 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/build_platform_router.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Builds the stage-1 platform router (see utils/platform_router.py) from the
+# domain summaries, so platform selection runs in-process instead of as a
+# search against domain-summaries-index. process_docs.py rebuilds it whenever
+# the summaries are indexed; this script rebuilds it on its own, optionally
+# calibrated with golden queries:
+#
+#   python scripts/build_platform_router.py --golden router_golden.json
+#   python scripts/build_platform_router.py --query "list the floors in a building"
+#
+# router_golden.json: [ { "query": "...", "platforms": ["meraki", "catalyst"] } ]
+
+import json
+import time
+import argparse
+from dotenv import load_dotenv
+from embedders import get_embedder
+from utils.chunking import chunk_file
+from utils.embedding import embed_texts, embed_text
+from utils.platform_router import build_platform_router, get_platform_router, PLATFORM_ROUTER_PATH
+
+load_dotenv()
+
+
+def load_summary_docs(path: str = "domain_summaries/domain_summaries.json") -> list:
+    """Summary chunks with embeddings, chunked as process_docs.py does."""
+    with open(path, "r", encoding="utf-8") as f:
+        summaries = json.load(f)
+    docs = []
+    for summary in summaries:
+        if "content" not in summary:
+            continue
+        chunks = chunk_file(summary["content"], chunk_size=1000, chunk_overlap=200)
+        for chunk, vector in zip(chunks, embed_texts(chunks)):
+            docs.append({"platform": summary.get("platform", "unknown"), "content": chunk, "embedding": vector})
+    return docs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the in-process stage-1 platform router.")
+    parser.add_argument("--golden", help="calibration queries JSON: [{ query, platforms }]")
+    parser.add_argument("--query", action="append", default=[], help="route a question with the saved router")
+    args = parser.parse_args()
+
+    if not args.query or args.golden:
+        calibration = []
+        if args.golden:
+            with open(args.golden, "r", encoding="utf-8") as f:
+                golden = json.load(f)
+            vectors = embed_texts([g["query"] for g in golden])
+            calibration = [(vector, g["platforms"]) for vector, g in zip(vectors, golden)]
+        build_platform_router(load_summary_docs(), calibration, embedder_key=get_embedder().cache_key)
+
+    router = get_platform_router()
+    if args.query and router is None:
+        parser.error(f"no platform router at {PLATFORM_ROUTER_PATH}; build it first "
+                     f"(python scripts/build_platform_router.py, or process_docs.py)")
+    for question in args.query:
+        vector = embed_text(question)
+        start = time.perf_counter()
+        route = router.route(vector)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        routed = ", ".join(f"{platform} ({score:.3f})" for platform, score in route) or "abstain"
+        print(f"{question!r} -> {routed}  [{elapsed_us:.0f} us]")
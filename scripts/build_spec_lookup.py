@@ -0,0 +1,32 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/build_spec_lookup.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Compiles every OpenAPI/Swagger spec under <platform>/api-specs/ into a
+# memory-mappable endpoint lookup file (see utils/spec_lookup.py), so the agent
+# can resolve operationId or method+path to a fully $ref-resolved operation
+# without a semantic search round trip.
+
+import os
+import glob
+from utils.spec_lookup import build_spec_lookup
+
+
+def build_spec_lookups():
+    """Builds one lookup file per spec, written under SPEC_LOOKUP_DIR/<platform>/."""
+    platform_dirs = ["catalyst_center", "cisco_spaces", "meraki", "webex"]
+    outputs = []
+    for platform_dir in platform_dirs:
+        specs_path = os.path.join(platform_dir, "api-specs")
+        for file_path in sorted(glob.glob(os.path.join(specs_path, "*.json"))):
+            outputs.append(build_spec_lookup(file_path, platform_dir))
+    print(f"Compiled {len(outputs)} spec lookup files.")
+    return outputs
+
+
+if __name__ == "__main__":
+    build_spec_lookups()
@@ -0,0 +1,434 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/distributed_build.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Sharded index builds with a coordinator and any number of workers.
+#
+# The coordinator creates the indexes, splits the corpora into work units
+# (api-docs files, spec operation/schema ranges, event and LOB record ranges)
+# and puts them in a durable SQLite queue (utils/work_queue.py). Workers lease
+# a unit, chunk and embed it, and upload the docs. Document ids are deterministic, so a unit that
+# is re-issued after a lost lease simply overwrites the same documents.
+#
+# One machine, four local workers:
+#   python scripts/distributed_build.py coordinator --queue build_queue.db --workers 4
+#
+# Several build nodes sharing a directory:
+#   node A: python scripts/distributed_build.py coordinator --queue /shared/build_queue.db
+#   node B..N: python scripts/distributed_build.py worker --queue /shared/build_queue.db
+#
+# Each coordinator run rebuilds every planned unit; --resume continues an
+# interrupted run instead, skipping the units it already finished.
+#
+# LOB folders are built denormalized (docs carry their linked records) when
+# LOB_DENORMALIZE is set, or when the folder's saved join index says it was
+# built that way (see utils/lob_joins.py).
+
+import os
+import sys
+import json
+import glob
+import time
+import socket
+import argparse
+import threading
+import functools
+import subprocess
+from dotenv import load_dotenv
+from indexers import get_indexer
+from utils.chunking import chunk_file
+from utils.embedding import embed_texts
+from utils.parallel_chunking import plan_api_doc_tasks, chunk_task
+from utils.spec_versions import (
+    spec_files, spec_docs, load_spec_units, record_spec_versions, spec_embedding_cache
+)
+from utils.work_queue import WorkQueue
+from utils.index_versions import resolve_index
+from utils.metrics import export_metrics
+from utils.gc_pause import paused_gc
+from process_events import normalize_events
+from process_lob import load_lob_sources
+from utils.lob_schema import infer_lob_schema
+from utils.lob_joins import discover_joins, denormalize_docs, build_join_index, lob_denormalize
+from utils.doc_ids import deterministic_id, api_doc_chunk_docs
+
+load_dotenv()
+
+EVENTS_PER_UNIT = int(os.getenv("EVENTS_PER_UNIT", "500"))
+LOB_RECORDS_PER_UNIT = int(os.getenv("LOB_RECORDS_PER_UNIT", "200"))
+# Operations / schemas of an OpenAPI spec per unit (see utils/spec_versions.py)
+SPEC_UNITS_PER_UNIT = int(os.getenv("SPEC_UNITS_PER_UNIT", "100"))
+PLATFORM_DIRS = ["catalyst_center", "cisco_spaces", "meraki", "webex"]
+
+
+def _load_records(path: str) -> tuple:
+    """A JSON file's records, parsed once for all of its units (shared: do not modify)."""
+    stat = os.stat(path)
+    return _parse_records(path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_records(path: str, mtime_ns: int, size: int) -> tuple:
+    # Keyed on the file's mtime and size too, so an edited file (watch mode) is re-read
+    with open(path, "r", encoding="utf-8") as f, paused_gc():
+        data = json.load(f)
+    if isinstance(data, list):
+        return tuple(data)
+    return (data,) if isinstance(data, dict) else ()
+
+
+@functools.lru_cache(maxsize=None)
+def _lob_sources(folder: str) -> list:
+    return load_lob_sources(folder)
+
+
+@functools.lru_cache(maxsize=None)
+def _lob_schema(folder: str):
+    """The folder-wide typed schema; every unit of a folder must agree on it."""
+    return infer_lob_schema(_lob_sources(folder))
+
+
+@functools.lru_cache(maxsize=None)
+def _lob_folder_docs(folder: str) -> dict:
+    """
+    { file name: docs } for a denormalized folder. Linked records can live in
+    any file, so the whole folder is converted and joined once per process.
+    """
+    sources = _lob_sources(folder)
+    docs = _lob_schema(folder).to_docs(sources, folder)
+    by_file = {}
+    for (file_name, _), doc in zip(sources, denormalize_docs(docs, discover_joins(sources, folder))):
+        by_file.setdefault(file_name, []).append(doc)
+    return by_file
+
+
+def clear_lob_caches():
+    """Forgets the cached LOB folders, after their files changed."""
+    for cached in (_lob_sources, _lob_schema, _lob_folder_docs):
+        cached.cache_clear()
+
+
+def _lob_folder(index_name: str):
+    return index_name[len("lob-"):] if index_name.startswith("lob-") else None
+
+
+# ---------------------------------------------------------------------------
+# Planning (coordinator)
+# ---------------------------------------------------------------------------
+
+def plan_units(corpora: list, lob_folders: list = None) -> list:
+    """Splits the selected corpora into work units, in build order."""
+    units = []
+
+    if "summaries" in corpora:
+        index_name = os.getenv("AZURE_SEARCH_DOMAIN_INDEX", "domain-summaries-index")
+        units.append({
+            "index_name": index_name,
+            "kind": "domain_summaries",
+            "payload": {"path": "domain_summaries/domain_summaries.json"},
+        })
+
+    if "api-docs" in corpora:
+        index_name = os.getenv("API_DOCS_INDEX_NAME", "api-docs-index")
+        for task in plan_api_doc_tasks(PLATFORM_DIRS):
+            units.append({"index_name": index_name, "kind": "api_docs", "payload": task})
+        for path, platform in spec_files(PLATFORM_DIRS):
+            total = len(load_spec_units(path)[1])
+            for start in range(0, total, SPEC_UNITS_PER_UNIT):
+                units.append({
+                    "index_name": index_name,
+                    "kind": "api_spec",
+                    "payload": {"path": path, "platform": platform, "start": start,
+                                "end": min(start + SPEC_UNITS_PER_UNIT, total)},
+                })
+
+    if "events" in corpora:
+        index_name = os.getenv("AZURE_SEARCH_EVENTS_INDEX", "events-index")
+        events_path = "events/sample_events.json"
+        total = len(_load_records(events_path))
+        for start in range(0, total, EVENTS_PER_UNIT):
+            units.append({
+                "index_name": index_name,
+                "kind": "events",
+                "payload": {"path": events_path, "start": start, "end": min(start + EVENTS_PER_UNIT, total)},
+            })
+
+    if "lob" in corpora:
+        folders = lob_folders or sorted(
+            name for name in os.listdir("lob_samples") if os.path.isdir(os.path.join("lob_samples", name))
+        )
+        for folder in folders:
+            index_name = f"lob-{folder}"
+            for path in sorted(glob.glob(os.path.join("lob_samples", folder, "*.json"))):
+                total = len(_load_records(path))
+                for start in range(0, total, LOB_RECORDS_PER_UNIT):
+                    units.append({
+                        "index_name": index_name,
+                        "kind": "lob",
+                        "payload": {"path": path, "start": start, "end": min(start + LOB_RECORDS_PER_UNIT, total)},
+                    })
+    return units
+
+
+# ---------------------------------------------------------------------------
+# Unit processing (worker)
+# ---------------------------------------------------------------------------
+
+def build_unit_docs(unit: dict, embed: bool = True) -> list:
+    """
+    Turns one work unit into upload-ready docs with deterministic ids and
+    embeddings (embed=False leaves embedding to the caller).
+    """
+    kind = unit["kind"]
+    payload = unit["payload"]
+    docs = []
+
+    if kind == "domain_summaries":
+        for summary in _load_records(payload["path"]):
+            if "content" not in summary:
+                continue
+            chunks = chunk_file(summary["content"], chunk_size=1000, chunk_overlap=200)
+            for n, chunk in enumerate(chunks):
+                docs.append({
+                    "id": summary["id"] if n == 0 else f"{summary['id']}_{n}",
+                    "content": chunk,
+                    "platform": summary.get("platform", "unknown"),
+                    "doc_type": summary.get("doc_type", "unknown"),
+                })
+
+    elif kind == "api_docs":
+        docs.extend(api_doc_chunk_docs(payload, chunk_task(payload)))
+
+    elif kind == "api_spec":
+        # Ids are per spec version and unit, the same ones spec syncs use
+        docs.extend(spec_docs(payload["path"], payload["platform"], payload["start"], payload["end"]))
+
+    elif kind == "events":
+        events = _load_records(payload["path"])[payload["start"]:payload["end"]]
+        for offset, (event, doc) in enumerate(zip(events, normalize_events(events))):
+            if not event.get("event_id"):
+                doc["id"] = doc["event_id"] = deterministic_id(payload["path"], payload["start"] + offset)
+            docs.append(doc)
+
+    elif kind == "lob":
+        folder = os.path.basename(os.path.dirname(payload["path"]))
+        file_name = os.path.basename(payload["path"])
+        if lob_denormalize(folder):
+            folder_docs = _lob_folder_docs(folder).get(file_name, [])
+            docs.extend(dict(doc) for doc in folder_docs[payload["start"]:payload["end"]])
+        else:
+            schema = _lob_schema(folder)
+            records = _load_records(payload["path"])[payload["start"]:payload["end"]]
+            for offset, record in enumerate(records):
+                fallback_id = deterministic_id(payload["path"], payload["start"] + offset)
+                docs.append(schema.to_doc(file_name, record, fallback_id))
+
+    else:
+        raise ValueError(f"Unknown work unit kind: {kind}")
+
+    if embed:
+        # Spec vectors go to the cache later spec syncs reuse them from
+        cache = spec_embedding_cache() if kind == "api_spec" else None
+        vectors = embed_texts([doc["content"] for doc in docs], cache=cache)
+        for doc, vector in zip(docs, vectors):
+            doc["embedding"] = vector
+    return docs
+
+
+class _LeaseKeeper(threading.Thread):
+    """Renews a unit's lease in the background while the worker processes it."""
+
+    def __init__(self, queue_path: str, unit_id: str, worker_id: str, lease_seconds: float):
+        super().__init__(daemon=True)
+        self.queue_path = queue_path
+        self.unit_id = unit_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        queue = WorkQueue(self.queue_path)  # sqlite connections are per thread
+        try:
+            while not self.stopped.wait(self.lease_seconds / 3):
+                if not queue.renew(self.unit_id, self.worker_id, self.lease_seconds):
+                    self.lost = True
+                    return
+        finally:
+            queue.close()
+
+
+def run_worker(queue_path: str, worker_id: str = None, lease_seconds: float = 300.0,
+               max_attempts: int = 3, poll_seconds: float = 2.0):
+    """Leases and processes units until the queue is drained."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    queue = WorkQueue(queue_path)
+    indexers = {}
+    processed = 0
+    print(f"Worker {worker_id} started on {queue_path}")
+
+    try:
+        while True:
+            unit = queue.lease(worker_id, lease_seconds, max_attempts)
+            if unit is None:
+                if queue.is_drained():
+                    break
+                time.sleep(poll_seconds)  # others hold leases; one may expire
+                continue
+
+            keeper = _LeaseKeeper(queue_path, unit["id"], worker_id, lease_seconds)
+            keeper.start()
+            try:
+                indexer = indexers.get(unit["index_name"])
+                if indexer is None:
+                    indexer = indexers[unit["index_name"]] = get_indexer(unit["index_name"])
+                    if _lob_folder(unit["index_name"]):
+                        indexer.set_field_schema(_lob_schema(_lob_folder(unit["index_name"])).fields)
+                    indexer.create_index()
+                docs = build_unit_docs(unit)
+                if docs:
+                    indexer.index_documents(docs)
+            except Exception as e:
+                keeper.stopped.set()
+                print(f"Worker {worker_id}: unit {unit['id'][:12]} ({unit['kind']}) failed: {e}")
+                queue.fail(unit["id"], worker_id, repr(e), max_attempts=max_attempts)
+                continue
+            keeper.stopped.set()
+
+            if keeper.lost or not queue.complete(unit["id"], worker_id, {"docs": len(docs)}):
+                # The lease expired and the unit was re-issued; the upload was
+                # idempotent (deterministic ids), so nothing needs undoing.
+                print(f"Worker {worker_id}: lost lease on unit {unit['id'][:12]}; result discarded.")
+                continue
+            processed += 1
+    finally:
+        queue.close()
+
+    print(f"Worker {worker_id} finished: {processed} units processed.")
+    export_metrics()
+
+
+# ---------------------------------------------------------------------------
+# Coordinator
+# ---------------------------------------------------------------------------
+
+def _print_progress(report: dict):
+    total = report["_total"]
+    done = total["done"] + total["failed"]
+    overall = sum(total.values()) or 1
+    print(
+        f"[{time.strftime('%H:%M:%S')}] {done}/{overall} units "
+        f"(pending {total['pending']}, leased {total['leased']}, failed {total['failed']})"
+    )
+
+
+def run_coordinator(queue_path: str, corpora: list, lob_folders: list = None, workers: int = 0,
+                    lease_seconds: float = 300.0, poll_seconds: float = 5.0, max_attempts: int = 3,
+                    resume: bool = False):
+    """
+    Plans and enqueues the units, then tracks them until the queue drains. A
+    run starts fresh (every unit is rebuilt); resume keeps the units an
+    interrupted run already finished.
+    """
+    units = plan_units(corpora, lob_folders)
+    index_names = list(dict.fromkeys(unit["index_name"] for unit in units))
+
+    # Create every index up front so workers never race on creation
+    for index_name in index_names:
+        indexer = get_indexer(index_name)
+        folder = _lob_folder(index_name)
+        if folder:
+            indexer.set_field_schema(_lob_schema(folder).fields)
+            # Saves the mode too, so watch and rebuilds keep it
+            build_join_index(_lob_sources(folder), folder, denormalized=lob_denormalize(folder))
+        indexer.create_index()
+
+    queue = WorkQueue(queue_path)
+    added = queue.enqueue(units, fresh=not resume)
+    if resume:
+        print(f"Planned {len(units)} units across {len(index_names)} indexes "
+              f"(resuming: {added} new, {len(units) - added} kept in {queue_path}).")
+    else:
+        print(f"Planned {len(units)} units across {len(index_names)} indexes (fresh run in {queue_path}).")
+
+    procs = [
+        subprocess.Popen([
+            sys.executable, os.path.abspath(__file__), "worker",
+            "--queue", queue_path, "--worker-id", f"{socket.gethostname()}-local{i}",
+            "--lease-seconds", str(lease_seconds), "--max-attempts", str(max_attempts),
+        ])
+        for i in range(workers)
+    ]
+
+    try:
+        while not queue.is_drained():
+            reissued, expired = queue.requeue_expired(max_attempts)
+            if reissued:
+                print(f"Re-issued {reissued} units with expired leases.")
+            if expired:
+                print(f"{expired} units failed: lease expired on their last attempt.")
+            _print_progress(queue.progress())
+            if procs and all(p.poll() is not None for p in procs):
+                print("All local workers exited before the queue drained.")
+                break
+            time.sleep(poll_seconds)
+    finally:
+        for p in procs:
+            p.wait()
+
+    report = queue.progress()
+    _print_progress(report)
+    for index_name, counts in sorted(report.items()):
+        if index_name != "_total":
+            print(f"  {index_name}: {counts['done']} done, {counts['failed']} failed")
+    for index_name, kind, payload, error in queue.failures():
+        print(f"  FAILED {index_name} {kind} {payload}: {error}")
+    queue.close()
+
+    spec_index = os.getenv("API_DOCS_INDEX_NAME", "api-docs-index")
+    counts = report.get(spec_index)
+    if "api-docs" in corpora and counts and counts["done"] == sum(counts.values()):
+        # Later process_docs / watch runs then only sync what changes from here
+        record_spec_versions(resolve_index(spec_index), spec_files(PLATFORM_DIRS))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed (sharded) index build.")
+    sub = parser.add_subparsers(dest="role", required=True)
+
+    coord = sub.add_parser("coordinator", help="plan units, create indexes and track progress")
+    coord.add_argument("--queue", default="build_queue.db")
+    coord.add_argument("--corpora", default="summaries,api-docs,events,lob",
+                       help="comma-separated subset of: summaries, api-docs, events, lob")
+    coord.add_argument("--lob-folders", default="", help="comma-separated lob_samples folders (default: all)")
+    coord.add_argument("--workers", type=int, default=0, help="local worker processes to spawn")
+    coord.add_argument("--lease-seconds", type=float, default=300.0)
+    coord.add_argument("--max-attempts", type=int, default=3)
+    coord.add_argument("--resume", action="store_true",
+                       help="keep units an interrupted run already finished (default: rebuild everything)")
+
+    work = sub.add_parser("worker", help="lease and process units")
+    work.add_argument("--queue", default="build_queue.db")
+    work.add_argument("--worker-id", default=None)
+    work.add_argument("--lease-seconds", type=float, default=300.0)
+    work.add_argument("--max-attempts", type=int, default=3)
+
+    args = parser.parse_args()
+    if args.role == "coordinator":
+        report = run_coordinator(
+            args.queue,
+            corpora=[c.strip() for c in args.corpora.split(",") if c.strip()],
+            lob_folders=[f.strip() for f in args.lob_folders.split(",") if f.strip()] or None,
+            workers=args.workers,
+            lease_seconds=args.lease_seconds,
+            max_attempts=args.max_attempts,
+            resume=args.resume,
+        )
+        sys.exit(1 if report["_total"]["failed"] or report["_total"]["pending"] else 0)
+    else:
+        run_worker(args.queue, args.worker_id, args.lease_seconds, args.max_attempts)
@@ -0,0 +1,23 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/embedders/__init__.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+from .base_embedder import BaseEmbedder
+from .registry import get_embedder, get_embedder_class, register_embedder, available_embedders
+
+# Embedder classes are imported lazily (see registry.py)
+_LAZY_CLASSES = {
+    "AzureOpenAIEmbedder": "azure_openai",
+    "OnnxEmbedder": "onnx",
+    "HashEmbedder": "hash",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_CLASSES:
+        return get_embedder_class(_LAZY_CLASSES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
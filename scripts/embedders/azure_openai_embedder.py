@@ -0,0 +1,75 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/embedders/azure_openai_embedder.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+import os
+from dotenv import load_dotenv
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+from utils.metrics import span, record_retry
+from .base_embedder import BaseEmbedder
+
+load_dotenv()
+
+class AzureOpenAIEmbedder(BaseEmbedder):
+    """
+    Embeddings from an Azure OpenAI deployment (legacy openai==0.27 API).
+    Texts are sent AZURE_OPENAI_EMBEDDING_BATCH at a time.
+    """
+
+    name = "azure_openai"
+
+    def __init__(self):
+        self.key = os.getenv("AZURE_OPENAI_EMBEDDING_KEY")
+        self.endpoint = os.getenv("AZURE_OPENAI_EMBEDDING_ENDPOINT")
+        self.api_version = os.getenv("AZURE_OPENAI_API_VERSION")
+        self.deployment = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
+        self.batch_size = int(os.getenv("AZURE_OPENAI_EMBEDDING_BATCH", "16"))
+        self._dimension = int(os.getenv("EMBEDDING_DIM", "1536"))
+        self._configured = False
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    @property
+    def cache_key(self) -> str:
+        return f"{self.name}:{self.endpoint}:{self.deployment}"
+
+    def _configure(self):
+        if self._configured:
+            return
+        if not all([self.key, self.endpoint, self.api_version, self.deployment]):
+            raise ValueError("Missing Azure OpenAI env vars")
+
+        # Imported here so runs that never embed (dry runs, other embedders) skip it
+        import openai
+
+        openai.api_key = self.key
+        openai.api_base = self.endpoint
+        openai.api_type = "azure"
+        openai.api_version = self.api_version
+        self._openai = openai
+        self._configured = True
+
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        before_sleep=record_retry
+    )
+    def _create(self, texts: list) -> list:
+        with span("embed", backend=self.name, batch=len(texts)):
+            resp = self._openai.Embedding.create(input=texts, engine=self.deployment)
+        data = sorted(resp["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+    def embed(self, texts: list) -> list:
+        self._configure()
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(self._create(texts[i : i + self.batch_size]))
+        return vectors
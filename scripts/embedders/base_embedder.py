@@ -0,0 +1,24 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/embedders/base_embedder.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+class BaseEmbedder:
+    name = "base"
+
+    @property
+    def cache_key(self) -> str:
+        """Identifies the model for the embedding cache; vectors from different models never mix."""
+        return f"{self.name}:{self.dimension}"
+
+    @property
+    def dimension(self) -> int:
+        """Length of the vectors this embedder produces."""
+        raise NotImplementedError
+
+    def embed(self, texts: list) -> list:
+        """Embed a list of texts, returning one vector (list of floats) per text, in order."""
+        raise NotImplementedError
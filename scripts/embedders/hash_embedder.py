@@ -0,0 +1,46 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/embedders/hash_embedder.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+import os
+import re
+import math
+import hashlib
+
+from utils.metrics import span
+from .base_embedder import BaseEmbedder
+
+_WORD_RE = re.compile(r"\w+")
+
+class HashEmbedder(BaseEmbedder):
+    """
+    Deterministic feature-hashing embedder (EMBEDDING_BACKEND=hash).
+    No model and no network: a stand-in for dry runs, profiling and local
+    testing of the pipelines. Texts sharing words get similar vectors.
+    """
+
+    name = "hash"
+
+    def __init__(self):
+        self._dimension = int(os.getenv("EMBEDDING_DIM", "1536"))
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _embed_one(self, text: str) -> list:
+        vector = [0.0] * self._dimension
+        for word in _WORD_RE.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self._dimension
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed(self, texts: list) -> list:
+        with span("embed", backend=self.name, texts=len(texts)):
+            return [self._embed_one(text) for text in texts]
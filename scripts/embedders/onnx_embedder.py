@@ -0,0 +1,130 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/embedders/onnx_embedder.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Local CPU embeddings from a sentence-transformer exported to ONNX
+# (e.g. all-MiniLM-L6-v2 or bge-small via `optimum-cli export onnx`).
+#
+# ONNX_MODEL_DIR must contain model.onnx and tokenizer.json. Requires the
+# optional packages onnxruntime, tokenizers and numpy.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import span
+from .base_embedder import BaseEmbedder
+
+class OnnxEmbedder(BaseEmbedder):
+    """
+    Batched ONNX inference on CPU:
+      - inputs are tokenized once, then sorted by token length so each batch
+        pads to a similar length (much less wasted compute on padding)
+      - batches are sized dynamically by a padded-token budget
+      - batches run concurrently on a thread pool sized to the cores
+        (onnxruntime releases the GIL during run())
+      - mean pooling over the attention mask, then L2 normalization
+    """
+
+    name = "onnx"
+
+    def __init__(self):
+        import numpy as np
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self._np = np
+        model_dir = self.model_dir = os.getenv("ONNX_MODEL_DIR")
+        if not model_dir:
+            raise ValueError("ONNX_MODEL_DIR must point to a folder with model.onnx and tokenizer.json")
+
+        self.max_tokens = int(os.getenv("ONNX_MAX_TOKENS", "512"))
+        self.batch_tokens = int(os.getenv("ONNX_BATCH_TOKENS", "16384"))
+        self.max_batch = int(os.getenv("ONNX_MAX_BATCH", "128"))
+        self.threads = int(os.getenv("ONNX_THREADS", "0")) or (os.cpu_count() or 1)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_tokens)
+        self.tokenizer.no_padding()
+
+        options = ort.SessionOptions()
+        # Parallelism comes from running several batches at once
+        options.intra_op_num_threads = int(os.getenv("ONNX_INTRA_OP_THREADS", "1"))
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.pool = ThreadPoolExecutor(max_workers=self.threads)
+
+        width = self.session.get_outputs()[0].shape[-1]
+        self._dimension = width if isinstance(width, int) else len(self.embed(["dimension probe"])[0])
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    @property
+    def cache_key(self) -> str:
+        return f"{self.name}:{os.path.abspath(self.model_dir)}:{self.max_tokens}"
+
+    def _batches(self, lengths: list) -> list:
+        """Groups text indexes (shortest first) so batch_size * longest <= token budget."""
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        batches, current, longest = [], [], 0
+        for i in order:
+            longest_if_added = max(longest, lengths[i])
+            if current and (
+                len(current) >= self.max_batch
+                or (len(current) + 1) * longest_if_added > self.batch_tokens
+            ):
+                batches.append(current)
+                current, longest_if_added = [], lengths[i]
+            current.append(i)
+            longest = longest_if_added
+        if current:
+            batches.append(current)
+        return batches
+
+    def _run(self, encodings: list):
+        np = self._np
+        width = max(len(e.ids) for e in encodings)
+        input_ids = np.zeros((len(encodings), width), dtype=np.int64)
+        attention = np.zeros((len(encodings), width), dtype=np.int64)
+        type_ids = np.zeros((len(encodings), width), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            n = len(encoding.ids)
+            input_ids[row, :n] = encoding.ids
+            attention[row, :n] = encoding.attention_mask
+            type_ids[row, :n] = encoding.type_ids
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = type_ids
+        output = self.session.run(None, feeds)[0]
+
+        if output.ndim == 3:
+            mask = attention[:, :, None].astype(output.dtype)
+            output = (output * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return output / np.clip(norms, 1e-12, None)
+
+    def embed(self, texts: list) -> list:
+        if not texts:
+            return []
+        with span("tokenize", backend=self.name, texts=len(texts)):
+            encodings = self.tokenizer.encode_batch(list(texts))
+        batches = self._batches([len(e.ids) for e in encodings])
+
+        vectors = [None] * len(texts)
+        with span("embed", backend=self.name, texts=len(texts), batches=len(batches)):
+            results = self.pool.map(lambda idx: self._run([encodings[i] for i in idx]), batches)
+            for idx, matrix in zip(batches, results):
+                for i, row in zip(idx, matrix):
+                    vectors[i] = row.tolist()
+        return vectors
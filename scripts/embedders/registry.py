@@ -0,0 +1,61 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/embedders/registry.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Lazy registry of embedding backends, keyed by EMBEDDING_BACKEND
+# (same pattern as indexers/registry.py). Only the selected backend's
+# dependencies are imported.
+
+import os
+import importlib
+from importlib.metadata import entry_points
+
+ENTRY_POINT_GROUP = "cisco_data_bridge.embedders"
+
+_BACKENDS = {
+    "azure_openai": ".azure_openai_embedder:AzureOpenAIEmbedder",
+    "onnx": ".onnx_embedder:OnnxEmbedder",
+    "hash": ".hash_embedder:HashEmbedder",
+}
+
+_instances = {}
+
+
+def register_embedder(name: str, target):
+    """Registers an embedder by class or by a lazy 'package.module:Class' string."""
+    _BACKENDS[name] = target
+    _instances.pop(name, None)
+
+
+def available_embedders() -> list:
+    names = set(_BACKENDS)
+    names.update(ep.name for ep in entry_points(group=ENTRY_POINT_GROUP))
+    return sorted(names)
+
+
+def get_embedder_class(backend: str = None):
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "azure_openai")).lower()
+    target = _BACKENDS.get(backend)
+    if target is None:
+        matches = [ep for ep in entry_points(group=ENTRY_POINT_GROUP) if ep.name == backend]
+        if not matches:
+            raise ValueError(
+                f"Unsupported embedding backend: {backend} (available: {', '.join(available_embedders())})"
+            )
+        return matches[0].load()
+    if isinstance(target, str):
+        module_name, _, attr = target.partition(":")
+        return getattr(importlib.import_module(module_name, package=__package__), attr)
+    return target
+
+
+def get_embedder(backend: str = None):
+    """Returns the (process-wide, cached) embedder for a backend name."""
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "azure_openai")).lower()
+    if backend not in _instances:
+        _instances[backend] = get_embedder_class(backend)()
+    return _instances[backend]
@@ -0,0 +1,198 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/eval_retrieval.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Retrieval quality / latency evaluation with HNSW parameter sweeps.
+#
+# For each index (LOB folders, domain summaries) this embeds the documents and
+# the golden queries with the configured embedder, runs the queries against an
+# exact cosine baseline and against every HNSW configuration in the sweep, and
+# reports recall@k, MRR, ANN recall vs. exact, p50/p99 latency and index memory.
+# The recommended configuration is the fastest (p99) one, within Azure AI
+# Search's parameter ranges, whose ANN recall meets --target-recall;
+# --write-params stores it in hnsw_params.json for the index schemas.
+#
+#   python scripts/eval_retrieval.py --corpus lob --lob-folders healthcare,retail
+#   python scripts/eval_retrieval.py --write-golden golden_queries.json
+#   python scripts/eval_retrieval.py --golden golden_queries.json --write-params
+
+import os
+import json
+import argparse
+import itertools
+from dotenv import load_dotenv
+from utils.chunking import chunk_file
+from utils.embedding import embed_texts
+from utils.hnsw_params import hnsw_parameters, save_hnsw_parameters, within_azure_limits
+from utils.retrieval_eval import (
+    seed_lob_queries,
+    seed_summary_queries,
+    normalize_rows,
+    ExactIndex,
+    HnswIndex,
+    evaluate,
+)
+from utils.lob_joins import record_key
+from utils.lob_schema import infer_lob_schema
+from process_lob import load_lob_sources
+
+load_dotenv()
+
+LOB_README = "lob_samples/README.md"
+DOMAIN_SUMMARIES = "domain_summaries/domain_summaries.json"
+
+
+def _int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def load_lob_docs(folder: str) -> list:
+    """LOB docs as process_lob.py builds them, plus the 'key' golden queries refer to."""
+    sources = load_lob_sources(folder)
+    docs = infer_lob_schema(sources).to_docs(sources)
+    for doc, (_, record) in zip(docs, sources):
+        doc["key"] = record_key(record) or doc["id"]
+    return docs
+
+
+def load_summary_docs() -> list:
+    """Domain summary chunks, chunked as process_docs.py does."""
+    with open(DOMAIN_SUMMARIES, "r", encoding="utf-8") as f:
+        summaries = json.load(f)
+    docs = []
+    for summary in summaries:
+        for chunk in chunk_file(summary.get("content", ""), chunk_size=1000, chunk_overlap=200):
+            docs.append({"id": summary["id"], "key": summary["id"], "content": chunk})
+    return summaries, docs
+
+
+def build_corpora(corpus: list, lob_folders: list) -> tuple:
+    """Returns ({ index_name: docs }, seeded golden queries)."""
+    corpora, queries = {}, []
+    if "lob" in corpus:
+        if not lob_folders:
+            lob_folders = sorted(
+                name for name in os.listdir("lob_samples") if os.path.isdir(os.path.join("lob_samples", name))
+            )
+        record_ids = {}
+        for folder in lob_folders:
+            docs = load_lob_docs(folder)
+            corpora[f"lob-{folder}"] = docs
+            record_ids[folder] = {doc["key"] for doc in docs}
+        queries.extend(seed_lob_queries(LOB_README, record_ids))
+    if "summaries" in corpus:
+        index_name = os.getenv("AZURE_SEARCH_DOMAIN_INDEX", "domain-summaries-index")
+        summaries, docs = load_summary_docs()
+        corpora[index_name] = docs
+        queries.extend(seed_summary_queries(summaries, index_name))
+    return corpora, queries
+
+
+def print_results(index_name: str, n_docs: int, n_queries: int, k: int, results: list, current: dict):
+    print(f"\n=== {index_name}: {n_docs} chunks, {n_queries} queries, k={k} ===")
+    header = (f"{'config':<34}{f'recall@{k}':>10}{'mrr':>7}{f'ann@{k}':>8}"
+              f"{'p50 ms':>9}{'p99 ms':>9}{'build s':>9}{'mem MB':>9}")
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        marker = " *" if result.get("current") else ""
+        print(
+            f"{result['config'] + marker:<34}{result[f'recall@{k}']:>10.3f}{result['mrr']:>7.3f}"
+            f"{result[f'ann_recall@{k}']:>8.3f}{result['p50_ms']:>9.3f}{result['p99_ms']:>9.3f}"
+            f"{result['build_s']:>9.2f}{result['memory_mb']:>9.2f}"
+        )
+    print(f"(* = current schema parameters m={current['m']} efC={current['ef_construction']} "
+          f"efS={current['ef_search']})")
+
+
+def recommend(results: list, k: int, target_recall: float):
+    """Fastest (p99, then memory) HNSW config within Azure limits meeting the recall target."""
+    candidates = [
+        r for r in results
+        if "params" in r and within_azure_limits(r["params"]) and r[f"ann_recall@{k}"] >= target_recall
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda r: (r["p99_ms"], r["memory_mb"]))
+
+
+def sweep_index(index_name: str, docs: list, queries: list, k: int, grid: list, target_recall: float,
+                write_params: bool) -> list:
+    doc_vectors = normalize_rows(embed_texts([doc["content"] for doc in docs]))
+    query_vectors = normalize_rows(embed_texts([q["query"] for q in queries]))
+    doc_ids = [doc["key"] for doc in docs]
+    current = hnsw_parameters(index_name)
+
+    exact = evaluate(ExactIndex(doc_vectors), query_vectors, queries, doc_ids, k)
+    results = [exact]
+    for m, ef_construction, ef_search in grid:
+        params = {"m": m, "ef_construction": ef_construction, "ef_search": ef_search}
+        index = HnswIndex(doc_vectors, **params)
+        result = evaluate(index, query_vectors, queries, doc_ids, k, exact_rows=exact["rows"])
+        result["params"] = params
+        result["current"] = params == current
+        results.append(result)
+
+    print_results(index_name, len(docs), len(queries), k, results, current)
+    best = recommend(results, k, target_recall)
+    if best is None:
+        print(f"No configuration within Azure limits reached ANN recall@{k} >= {target_recall}.")
+        return results
+
+    measured = {key: round(best[key], 4) for key in (f"recall@{k}", "mrr", f"ann_recall@{k}", "p50_ms", "p99_ms", "memory_mb")}
+    print(f"Recommended: {best['config']} ({measured})")
+    if write_params:
+        save_hnsw_parameters(index_name, best["params"], measured)
+        print(f"Saved HNSW parameters for {index_name}.")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality/latency and sweep HNSW parameters.")
+    parser.add_argument("--corpus", default="lob,summaries", help="comma-separated: lob, summaries")
+    parser.add_argument("--lob-folders", default="", help="comma-separated lob_samples folders (default: all)")
+    parser.add_argument("--golden", help="golden queries JSON to use instead of the seeded set")
+    parser.add_argument("--write-golden", help="write the seeded golden queries to this JSON file and exit")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", default="4,6,8,10", help="HNSW m values to sweep")
+    parser.add_argument("--ef-construction", default="100,200,400")
+    parser.add_argument("--ef-search", default="100,200,500")
+    parser.add_argument("--target-recall", type=float, default=0.95,
+                        help="minimum ANN recall@k vs. exact search for a recommendation")
+    parser.add_argument("--write-params", action="store_true",
+                        help="store the recommended parameters per index in hnsw_params.json")
+    parser.add_argument("--output", help="write all results as JSON")
+    args = parser.parse_args()
+
+    corpus = [c.strip() for c in args.corpus.split(",") if c.strip()]
+    lob_folders = [f.strip() for f in args.lob_folders.split(",") if f.strip()]
+    corpora, queries = build_corpora(corpus, lob_folders)
+
+    if args.write_golden:
+        with open(args.write_golden, "w", encoding="utf-8") as f:
+            json.dump(queries, f, indent=2, ensure_ascii=False)
+        print(f"Wrote {len(queries)} golden queries to {args.write_golden}.")
+        raise SystemExit(0)
+
+    if args.golden:
+        with open(args.golden, "r", encoding="utf-8") as f:
+            queries = json.load(f)
+
+    grid = list(itertools.product(_int_list(args.m), _int_list(args.ef_construction), _int_list(args.ef_search)))
+    all_results = {}
+    for index_name, docs in corpora.items():
+        index_queries = [q for q in queries if q["index"] == index_name]
+        if not docs or not index_queries:
+            print(f"Skipping {index_name}: {len(docs)} docs, {len(index_queries)} golden queries.")
+            continue
+        results = sweep_index(index_name, docs, index_queries, args.k, grid, args.target_recall, args.write_params)
+        all_results[index_name] = [{key: value for key, value in r.items() if key != "rows"} for r in results]
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(all_results, f, indent=2)
+        print(f"Wrote results to {args.output}.")
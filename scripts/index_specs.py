@@ -0,0 +1,97 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/index_specs.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Version-aware sync of the OpenAPI specs (<platform>/api-specs/*.json) into the
+# api-docs index. Each spec is diffed against its indexed version at the
+# operation and schema level, and only added or changed units are embedded;
+# docs carry `api_version` (see utils/spec_versions.py). process_docs.py runs
+# the same sync; this script does only the specs, e.g. after a spec download.
+#
+#   python scripts/index_specs.py                     # sync every spec
+#   python scripts/index_specs.py --diff              # report what would change, touch nothing
+#   python scripts/index_specs.py --keep 2            # keep the previous API version searchable too
+#   python scripts/index_specs.py --compare old.json new.json   # diff two spec files
+#
+# The api-docs lexical snapshot is refreshed afterwards: its markdown docs are
+# kept as they are and the spec docs are replaced.
+
+import os
+import argparse
+from dotenv import load_dotenv
+from indexers import get_indexer
+from utils.index_versions import resolve_index
+from utils.metrics import configure_sdk_logging, export_metrics
+from utils.spec_versions import (
+    SpecDiff, SpecVersionState, plan_specs, sync_specs, refresh_spec_snapshot, chunks_to_embed,
+    load_spec_units, unit_hash, SPEC_KEEP_VERSIONS
+)
+
+load_dotenv()
+
+PLATFORM_DIRS = ["catalyst_center", "cisco_spaces", "meraki", "webex"]
+API_DOCS_INDEX = os.getenv("API_DOCS_INDEX_NAME", "api-docs-index")
+
+
+def print_diff(diff: SpecDiff, limit: int):
+    print(f"  {diff.summary()}")
+    for line in diff.details(limit):
+        print(f"    {line}")
+
+
+def compare_specs(old_path: str, new_path: str, limit: int):
+    old_version, old_units = load_spec_units(old_path)
+    new_version, new_units = load_spec_units(new_path)
+    diff = SpecDiff(
+        {key: unit_hash(text) for key, text in old_units.items()},
+        {key: unit_hash(text) for key, text in new_units.items()},
+        old_version, new_version
+    )
+    print(f"{old_path} -> {new_path}")
+    print_diff(diff, limit)
+
+
+def report_specs(keep: int, limit: int):
+    """Dry run: what a sync would upload, embed and delete."""
+    state = SpecVersionState()
+    plans = plan_specs(PLATFORM_DIRS, state, resolve_index(API_DOCS_INDEX), keep)
+    if not plans:
+        print("All specs are up to date.")
+        return
+    for plan in plans:
+        print(f"Spec {plan['spec']}:")
+        print_diff(plan["diff"], limit)
+        embed = chunks_to_embed(plan["upserts"]) if plan["upserts"] else 0
+        print(f"  would upsert {len(plan['upserts'])} docs ({embed} chunks to embed) "
+              f"and delete {len(plan['deletes'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Version-aware indexing of the OpenAPI specs.")
+    parser.add_argument("--diff", action="store_true", help="report the changes only; no embedding or upload")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff two spec files and exit")
+    parser.add_argument("--keep", type=int, default=SPEC_KEEP_VERSIONS,
+                        help="API versions of each spec to keep indexed (default SPEC_KEEP_VERSIONS or 1)")
+    parser.add_argument("--details", type=int, default=20, metavar="N",
+                        help="changed units to list per group (default 20)")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_specs(*args.compare, limit=args.details)
+    elif args.diff:
+        report_specs(args.keep, args.details)
+    else:
+        configure_sdk_logging("azure_debug.log")
+        indexer = get_indexer(API_DOCS_INDEX)
+        indexer.create_index()
+        spec_state = SpecVersionState()
+        totals = sync_specs(PLATFORM_DIRS, indexer, indexer.index_name, spec_state, args.keep)
+        if totals["specs"]:
+            refresh_spec_snapshot(API_DOCS_INDEX, spec_state, indexer.index_name)
+        print(f"{totals['specs']} specs changed: {totals['upserted']} docs upserted "
+              f"({totals['embedded']} chunks embedded), {totals['deleted']} deleted.")
+        export_metrics()
@@ -6,7 +6,20 @@
 ## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
 ################################################################################
 
-from .azure_indexer import AzureIndexer
 from .base_indexer import BaseIndexer
-# from .chroma_indexer import ChromaIndexer
-# from .elastic_indexer import ElasticIndexer
+from .registry import get_indexer, get_indexer_class, register_backend, available_backends
+
+# Backend classes are imported lazily so that importing this package does not
+# pull in any vendor SDK (see registry.py).
+_LAZY_CLASSES = {
+    "AzureIndexer": "azure",
+    "ChromaIndexer": "chroma",
+    "ElasticIndexer": "elastic",
+    "NullIndexer": "null",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_CLASSES:
+        return get_indexer_class(_LAZY_CLASSES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
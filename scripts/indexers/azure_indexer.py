@@ -7,7 +7,7 @@
 ################################################################################
 
 import os
-import openai
+import json
 from dotenv import load_dotenv
 
 from azure.search.documents import SearchClient
@@ -33,7 +33,12 @@ from azure.core.credentials import AzureKeyCredential
 from azure.core.exceptions import ResourceNotFoundError, HttpResponseError
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from utils.metrics import span, inc, observe, progress, extras_enabled, SIZE_BUCKETS
+from utils.hnsw_params import hnsw_parameters
+from utils.index_versions import logical_index_name
+from utils.build_scheduler import upload_slot
 from .base_indexer import BaseIndexer
+from .azure_transport import client_kwargs
 
 load_dotenv()
 
@@ -63,7 +68,8 @@ class AzureIndexer(BaseIndexer):
         self.index_client = SearchIndexClient(
             endpoint=self.endpoint,
             credential=self.credential,
-            api_version=os.getenv("AZURE_SEARCH_API_VERSION", "2024-07-01")
+            api_version=os.getenv("AZURE_SEARCH_API_VERSION", "2024-07-01"),
+            **client_kwargs()
         )
         self.search_client = None
 
@@ -81,13 +87,14 @@ class AzureIndexer(BaseIndexer):
             existing_index = self.index_client.get_index(self.index_name)
             if existing_index:
                 print(f"Index '{self.index_name}' already exists. Skipping creation.")
-                self.search_client = SearchClient(
-                    endpoint=self.endpoint,
-                    index_name=self.index_name,
-                    credential=self.credential,
-                    api_version=os.getenv("AZURE_SEARCH_API_VERSION", "2024-07-01"),
-                    logging_enable=True
-                )
+                # New fields (typed LOB fields, api_version) can be added to an existing index in place
+                existing_names = {field.name for field in existing_index.fields}
+                missing = [field for field in index_schema.fields if field.name not in existing_names]
+                if missing:
+                    existing_index.fields.extend(missing)
+                    self.index_client.create_or_update_index(existing_index)
+                    print(f"Added {len(missing)} fields to '{self.index_name}'.")
+                self.search_client = self._new_search_client()
                 return
         except ResourceNotFoundError:
             print(f"Index '{self.index_name}' does not exist. Creating index...")
@@ -104,19 +111,38 @@ class AzureIndexer(BaseIndexer):
             raise
 
         # Initialize a SearchClient for the newly created index
-        self.search_client = SearchClient(
-            endpoint=self.endpoint,
-            index_name=self.index_name,
-            credential=self.credential,
-            api_version=os.getenv("AZURE_SEARCH_API_VERSION", "2024-07-01"),
-            logging_enable=True
-        )
+        self.search_client = self._new_search_client()
+
+    def _typed_fields(self) -> list:
+        edm_types = {
+            "string": SearchFieldDataType.String,
+            "int64": SearchFieldDataType.Int64,
+            "double": SearchFieldDataType.Double,
+            "boolean": SearchFieldDataType.Boolean,
+            "datetime": SearchFieldDataType.DateTimeOffset,
+        }
+        typed = []
+        for field in self.field_schema:
+            edm_type = edm_types[field["type"]]
+            typed.append(SimpleField(
+                name=field["name"],
+                type=SearchFieldDataType.Collection(edm_type) if field["collection"] else edm_type,
+                filterable=True,
+                facetable=True,
+                sortable=not field["collection"]
+            ))
+        return typed
 
     def build_index_schema(self, index_name: str) -> SearchIndex:
         """
         Builds a SearchIndex schema, customizing fields for each index name.
+        Versioned names ('api-docs-index-v7') get the schema of their logical index.
         """
-        EMBEDDING_DIM = 1536  # For text-embedding models
+        physical_name = index_name
+        index_name = logical_index_name(index_name)
+        # Follows the configured embedder (1536 for the Azure OpenAI text-embedding models)
+        from utils.embedding import get_embedding_dimension
+        EMBEDDING_DIM = get_embedding_dimension()
 
 
 
@@ -162,9 +188,14 @@ class AzureIndexer(BaseIndexer):
                     filterable=False
                 )
             ]
+            if self.field_schema:
+                # Typed, filterable fields inferred from the records; 'metadata' then only
+                # holds the un-promoted remainder, so it is stored but not searchable.
+                fields[-1] = SimpleField(name="metadata", type=SearchFieldDataType.String)
+                fields.extend(self._typed_fields())
 
             # We'll generate a semantic config name on the fly:
-            semantic_config_name = f"{index_name}-semantic-config"
+            semantic_config_name = f"{physical_name}-semantic-config"
             semantic_config = SemanticConfiguration(
                 name=semantic_config_name,
                 prioritized_fields=SemanticPrioritizedFields(
@@ -186,9 +217,7 @@ class AzureIndexer(BaseIndexer):
                         "name": "lobHnsw",
                         "kind": "hnsw",
                         "parameters": HnswParameters(
-                            m=4,
-                            ef_construction=400,
-                            ef_search=500,
+                            **hnsw_parameters(index_name),
                             metric="cosine"
                         )
                     }
@@ -204,7 +233,7 @@ class AzureIndexer(BaseIndexer):
             cors_options = CorsOptions(allowed_origins=["*"], max_age_in_seconds=60)
 
             return SearchIndex(
-                name=index_name,
+                name=physical_name,
                 fields=fields,
                 vector_search=vector_search,
                 semantic_search=SemanticSearch(configurations=[semantic_config]),
@@ -346,9 +375,7 @@ class AzureIndexer(BaseIndexer):
                         "name": "myHnsw",
                         "kind": "hnsw",
                         "parameters": HnswParameters(
-                            m=4,
-                            ef_construction=400,
-                            ef_search=500,
+                            **hnsw_parameters(index_name),
                             metric="cosine"
                         )
                     }
@@ -364,7 +391,7 @@ class AzureIndexer(BaseIndexer):
             cors_options = CorsOptions(allowed_origins=["*"], max_age_in_seconds=60)
 
             return SearchIndex(
-                name=index_name,
+                name=physical_name,
                 fields=fields,
                 vector_search=vector_search,
                 semantic_search=SemanticSearch(configurations=[semantic_config]),
@@ -405,6 +432,8 @@ class AzureIndexer(BaseIndexer):
                 SearchableField(name="content", type=SearchFieldDataType.String, searchable=True),
                 SearchableField(name="platform", type=SearchFieldDataType.String, filterable=True, searchable=True),
                 SearchableField(name="doc_type", type=SearchFieldDataType.String, filterable=True, searchable=True),
+                # info.version of the spec a doc came from (utils/spec_versions.py)
+                SimpleField(name="api_version", type=SearchFieldDataType.String, filterable=True, facetable=True),
                 SearchField(
                     name="embedding",
                     type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
@@ -434,9 +463,7 @@ class AzureIndexer(BaseIndexer):
                     "name": "myHnsw",
                     "kind": "hnsw",
                     "parameters": HnswParameters(
-                        m=4,
-                        ef_construction=400,
-                        ef_search=500,
+                        **hnsw_parameters(index_name),
                         metric="cosine"
                     )
                 }
@@ -452,7 +479,7 @@ class AzureIndexer(BaseIndexer):
         cors_options = CorsOptions(allowed_origins=["*"], max_age_in_seconds=60)
 
         return SearchIndex(
-            name=index_name,
+            name=physical_name,
             fields=fields,
             vector_search=vector_search,
             semantic_search=SemanticSearch(configurations=[semantic_config]),
@@ -465,14 +492,7 @@ class AzureIndexer(BaseIndexer):
         Each index has its own set of fields that must match what's in 'docs'.
         For LOB indexes, we expect docs to have { id, content, embedding, [metadata] } etc.
         """
-        if not self.search_client:
-            self.search_client = SearchClient(
-                endpoint=self.endpoint,
-                index_name=self.index_name,
-                credential=self.credential,
-                api_version=os.getenv("AZURE_SEARCH_API_VERSION", "2024-07-01"),
-                logging_enable=True
-            )
+        self._ensure_search_client()
 
         total_docs = len(docs)
         print(f"Uploading {total_docs} documents to '{self.index_name}' in batches of {batch_size}...")
@@ -486,18 +506,87 @@ class AzureIndexer(BaseIndexer):
                 doc_id = sample_doc.get("id", "no_id")
                 embedding_field = sample_doc.get("embedding")  # might be None
                 embedding_length = len(embedding_field) if embedding_field else 0
-                print(
+                progress(
                     f"Uploading batch {batch_number} with {len(batch)} docs. "
                     f"Sample doc => ID: {doc_id}, embedding length: {embedding_length}"
                 )
             else:
-                print(f"Uploading batch {batch_number}: (empty batch)")
+                progress(f"Uploading batch {batch_number}: (empty batch)")
+
+            if extras_enabled():
+                # The SDK serializes internally; this measures the same work separately
+                with span("serialize", index=self.index_name):
+                    payload_bytes = len(json.dumps({"value": batch}).encode("utf-8"))
+                observe("upload_batch_bytes", payload_bytes, buckets=SIZE_BUCKETS, index=self.index_name)
 
             try:
-                self.search_client.upload_documents(documents=batch)
-                print(f"Batch {batch_number} upload completed.")
+                with upload_slot(len(batch)), span("upload", index=self.index_name, docs=len(batch)):
+                    self.search_client.upload_documents(documents=batch)
+                inc("uploaded_documents_total", len(batch), index=self.index_name)
+                progress(f"Batch {batch_number} upload completed.")
             except Exception as e:
+                inc("upload_errors_total", index=self.index_name)
                 print(f"Error uploading batch {batch_number}: {e}")
                 raise
 
         print(f"All {total_docs} documents have been uploaded successfully.")
+
+    def _new_search_client(self) -> SearchClient:
+        return SearchClient(
+            endpoint=self.endpoint,
+            index_name=self.index_name,
+            credential=self.credential,
+            api_version=os.getenv("AZURE_SEARCH_API_VERSION", "2024-07-01"),
+            **client_kwargs()
+        )
+
+    def _ensure_search_client(self):
+        if not self.search_client:
+            self.search_client = self._new_search_client()
+        return self.search_client
+
+    def delete_documents(self, ids: list, batch_size: int = 500):
+        """Deletes documents by key ('id' in every schema)."""
+        self._ensure_search_client()
+        for i in range(0, len(ids), batch_size):
+            batch = [{"id": doc_id} for doc_id in ids[i : i + batch_size]]
+            with span("delete", index=self.index_name, docs=len(batch)):
+                self.search_client.delete_documents(documents=batch)
+            inc("deleted_documents_total", len(batch), index=self.index_name)
+        progress(f"Deleted {len(ids)} documents from '{self.index_name}'.")
+
+    def document_count(self) -> int:
+        return self._ensure_search_client().get_document_count()
+
+    def search_ids(self, vector: list, text: str = None, top: int = 10) -> list:
+        from azure.search.documents.models import VectorizedQuery
+        results = self._ensure_search_client().search(
+            search_text=None,
+            vector_queries=[VectorizedQuery(vector=vector, k_nearest_neighbors=top, fields="embedding")],
+            select=["id"],
+            top=top
+        )
+        return [result["id"] for result in results]
+
+    def drop_index(self):
+        try:
+            self.index_client.delete_index(self.index_name)
+            print(f"Index '{self.index_name}' deleted.")
+        except ResourceNotFoundError:
+            print(f"Index '{self.index_name}' does not exist; nothing to delete.")
+
+    def point_alias(self, alias: str) -> bool:
+        """
+        Index aliases need an SDK and AZURE_SEARCH_API_VERSION that support them
+        (preview API versions); otherwise the index_aliases.json pointer alone is used.
+        """
+        if not hasattr(self.index_client, "create_or_update_alias"):
+            return False
+        from azure.search.documents.indexes.models import SearchAlias
+        try:
+            self.index_client.create_or_update_alias(SearchAlias(name=alias, indexes=[self.index_name]))
+        except HttpResponseError as e:
+            print(f"Alias '{alias}' not updated ({e.message}); using the index pointer file only.")
+            return False
+        print(f"Alias '{alias}' -> '{self.index_name}'.")
+        return True
@@ -0,0 +1,137 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/indexers/azure_transport.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Shared HTTP transport for the Azure Search clients.
+#
+# Each SearchClient/SearchIndexClient otherwise opens its own requests session
+# (and connection pool). Here every client in the process shares one pooled
+# keep-alive session. Upload bodies are 500 docs x 1536-float vectors, so
+# request/response body logging (logging_enable) is off unless asked for:
+#   SEARCH_HTTP_POOL_SIZE      connections kept per host (default 16)
+#   SEARCH_HTTP_GZIP           gzip request bodies above SEARCH_HTTP_GZIP_MIN_BYTES
+#                              (opt-in: the endpoint or gateway must accept
+#                              Content-Encoding: gzip)
+#   SEARCH_HTTP_LOG_SAMPLE     fraction of requests logged at DEBUG with a body
+#                              excerpt (e.g. 0.01), instead of every body
+#   AZURE_SDK_LOG_BODIES=1     the SDK's full body logging on every request
+#
+# scripts/mock_search_server.py serves enough of the REST API to verify this
+# locally (connections vs requests, gzip, throughput).
+
+import os
+import gzip
+import time
+import random
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+from azure.core.pipeline.transport import RequestsTransport
+
+from utils.metrics import inc, observe, SIZE_BUCKETS
+
+SEARCH_HTTP_POOL_SIZE = int(os.getenv("SEARCH_HTTP_POOL_SIZE", "16"))
+SEARCH_HTTP_GZIP = os.getenv("SEARCH_HTTP_GZIP", "0").lower() in ("1", "true", "yes")
+SEARCH_HTTP_GZIP_MIN_BYTES = int(os.getenv("SEARCH_HTTP_GZIP_MIN_BYTES", "16384"))
+SEARCH_HTTP_GZIP_LEVEL = int(os.getenv("SEARCH_HTTP_GZIP_LEVEL", "1"))
+SEARCH_HTTP_LOG_SAMPLE = float(os.getenv("SEARCH_HTTP_LOG_SAMPLE", "0"))
+SEARCH_HTTP_LOG_BODY_CHARS = int(os.getenv("SEARCH_HTTP_LOG_BODY_CHARS", "2000"))
+AZURE_SDK_LOG_BODIES = os.getenv("AZURE_SDK_LOG_BODIES", "0").lower() in ("1", "true", "yes")
+
+_logger = logging.getLogger("azure.search.sampled")
+_session = None
+_session_lock = threading.Lock()
+
+
+def shared_session() -> requests.Session:
+    """The process-wide pooled keep-alive session (created on first use)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # Retries are the pipeline's job, as in azure-core's own session setup
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=SEARCH_HTTP_POOL_SIZE,
+                max_retries=Retry(total=False, redirect=False, raise_on_status=False)
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+
+def _request_body(http_request):
+    # azure.core.rest.HttpRequest keeps the body in _data, the legacy request in data
+    attr = "_data" if hasattr(http_request, "_data") else "data"
+    return attr, getattr(http_request, attr, None)
+
+
+class GzipRequestPolicy(SansIOHTTPPolicy):
+    """Compresses large request bodies (uploads) with gzip."""
+
+    def __init__(self, min_bytes: int = None, level: int = None):
+        self.min_bytes = SEARCH_HTTP_GZIP_MIN_BYTES if min_bytes is None else min_bytes
+        self.level = SEARCH_HTTP_GZIP_LEVEL if level is None else level
+
+    def on_request(self, request):
+        http_request = request.http_request
+        attr, body = _request_body(http_request)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if not isinstance(body, bytes) or len(body) < self.min_bytes:
+            return
+        if "Content-Encoding" in http_request.headers:
+            return
+        compressed = gzip.compress(body, compresslevel=self.level)
+        setattr(http_request, attr, compressed)
+        http_request.headers["Content-Encoding"] = "gzip"
+        http_request.headers["Content-Length"] = str(len(compressed))
+        observe("http_request_bytes", len(body), buckets=SIZE_BUCKETS, encoding="identity")
+        observe("http_request_bytes", len(compressed), buckets=SIZE_BUCKETS, encoding="gzip")
+
+
+class SampledLoggingPolicy(SansIOHTTPPolicy):
+    """Logs a sample of requests (method, URL, status, size, latency and a body excerpt) at DEBUG."""
+
+    def __init__(self, rate: float = None):
+        self.rate = SEARCH_HTTP_LOG_SAMPLE if rate is None else rate
+
+    def on_request(self, request):
+        request.context["sampled"] = self.rate > 0 and random.random() < self.rate
+        request.context["sent_at"] = time.perf_counter()
+
+    def on_response(self, request, response):
+        inc("http_requests_total", status=response.http_response.status_code)
+        if not request.context.get("sampled") or not _logger.isEnabledFor(logging.DEBUG):
+            return
+        http_request = request.http_request
+        _, body = _request_body(http_request)
+        if isinstance(body, bytes):
+            body = "<gzip>" if http_request.headers.get("Content-Encoding") == "gzip" else body.decode("utf-8", "replace")
+        elapsed_ms = (time.perf_counter() - request.context["sent_at"]) * 1000
+        _logger.debug(
+            "%s %s -> %s in %.1f ms, %s request bytes; body: %s",
+            http_request.method, http_request.url, response.http_response.status_code, elapsed_ms,
+            http_request.headers.get("Content-Length", "?"), str(body or "")[:SEARCH_HTTP_LOG_BODY_CHARS]
+        )
+
+
+def client_kwargs() -> dict:
+    """Keyword arguments for SearchClient/SearchIndexClient: shared transport and policies."""
+    policies = [SampledLoggingPolicy()]
+    if SEARCH_HTTP_GZIP:
+        policies.insert(0, GzipRequestPolicy())
+    return {
+        # One transport per client (clients close their transport), one session for all
+        "transport": RequestsTransport(session=shared_session(), session_owner=False),
+        "per_retry_policies": policies,
+        "logging_enable": AZURE_SDK_LOG_BODIES,
+    }
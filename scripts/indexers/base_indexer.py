@@ -9,11 +9,46 @@
 class BaseIndexer:
     def __init__(self, index_name: str):
         self.index_name = index_name
+        self.field_schema = None
+
+    def set_field_schema(self, fields: list):
+        """
+        Typed fields for the next create_index(): [{ name, type, collection }]
+        with type one of string/int64/double/boolean/datetime (see utils/lob_schema.py).
+        """
+        self.field_schema = fields
     
     def create_index(self):
         """Create the index if it doesn't exist."""
         raise NotImplementedError
     
-    def index_documents(self, docs: list):
+    def index_documents(self, docs: list, batch_size: int = 500):
         """Index a list of documents (dicts with text/content)."""
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def delete_documents(self, ids: list, batch_size: int = 500):
+        """Delete documents by id (used by watch mode for removed files and chunks)."""
+        raise NotImplementedError
+
+    # Blue/green rebuilds (see utils/index_versions.py and scripts/rebuild_index.py)
+
+    def begin_bulk_load(self):
+        """Switch a freshly created index to build-optimized settings (no-op by default)."""
+
+    def end_bulk_load(self):
+        """Restore serving settings after a bulk load (no-op by default)."""
+
+    def document_count(self) -> int:
+        raise NotImplementedError
+
+    def search_ids(self, vector: list, text: str = None, top: int = 10) -> list:
+        """Ids of the top matches for a query vector (or its text, for backends without one)."""
+        raise NotImplementedError
+
+    def drop_index(self):
+        """Delete the index; a missing index is not an error."""
+        raise NotImplementedError
+
+    def point_alias(self, alias: str) -> bool:
+        """Point a backend-native alias at this index; False if the backend has none."""
+        return False
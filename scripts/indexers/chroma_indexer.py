@@ -9,6 +9,7 @@
 import os
 from chromadb.config import Settings
 import chromadb
+from utils.build_scheduler import upload_slot
 from .base_indexer import BaseIndexer
 
 class ChromaIndexer(BaseIndexer):
@@ -22,10 +23,38 @@ class ChromaIndexer(BaseIndexer):
         # Chroma automatically creates a collection if it doesn't exist
         self.collection = self.client.get_or_create_collection(name=self.index_name)
     
-    def index_documents(self, docs: list):
+    def index_documents(self, docs: list, batch_size: int = 500):
         if not self.collection:
             self.create_index()
         ids = [doc["id"] for doc in docs]
         texts = [doc["content"] for doc in docs]
-        self.collection.add(documents=texts, ids=ids, metadatas=docs)
+        # upsert (newer chromadb) so re-indexed ids replace their old version
+        write = getattr(self.collection, "upsert", self.collection.add)
+        with upload_slot(len(docs)):
+            write(documents=texts, ids=ids, metadatas=docs)
         print(f"Chroma: Inserted {len(docs)} documents into collection {self.index_name}.")
+
+    def delete_documents(self, ids: list, batch_size: int = 500):
+        if not self.collection:
+            self.create_index()
+        self.collection.delete(ids=ids)
+        print(f"Chroma: Deleted {len(ids)} documents from collection {self.index_name}.")
+
+    def document_count(self) -> int:
+        if not self.collection:
+            self.create_index()
+        return self.collection.count()
+
+    def search_ids(self, vector: list, text: str = None, top: int = 10) -> list:
+        # Collections embed with Chroma's own function, so query by text
+        if not self.collection:
+            self.create_index()
+        return self.collection.query(query_texts=[text], n_results=top)["ids"][0]
+
+    def drop_index(self):
+        try:
+            self.client.delete_collection(name=self.index_name)
+        except ValueError:
+            pass
+        self.collection = None
+        print(f"Chroma: Dropped collection {self.index_name}.")
@@ -8,6 +8,7 @@
 
 import os
 from elasticsearch import Elasticsearch
+from utils.build_scheduler import upload_slot
 from .base_indexer import BaseIndexer
 
 class ElasticIndexer(BaseIndexer):
@@ -20,18 +21,76 @@ class ElasticIndexer(BaseIndexer):
     
     def create_index(self):
         if not self.client.indices.exists(index=self.index_name):
+            properties = {"content": {"type": "text"}}
+            if self.field_schema:
+                es_types = {"string": "keyword", "int64": "long", "double": "double",
+                            "boolean": "boolean", "datetime": "date"}
+                # Arrays need no special mapping in Elasticsearch
+                for field in self.field_schema:
+                    properties[field["name"]] = {"type": es_types[field["type"]]}
+                properties["metadata"] = {"type": "keyword", "index": False, "doc_values": False}
             self.client.indices.create(index=self.index_name, body={
                 "mappings": {
-                    "properties": {
-                        "content": {"type": "text"},
-                    }
+                    "properties": properties
                 }
             })
             print(f"Created Elasticsearch index {self.index_name}.")
         else:
             print(f"Elasticsearch index {self.index_name} already exists.")
     
-    def index_documents(self, docs: list):
-        for doc in docs:
-            self.client.index(index=self.index_name, document=doc)
+    def index_documents(self, docs: list, batch_size: int = 500):
+        for i in range(0, len(docs), batch_size):
+            batch = docs[i : i + batch_size]
+            with upload_slot(len(batch)):
+                for doc in batch:
+                    # Index under the doc id so re-indexing replaces instead of duplicating
+                    self.client.index(index=self.index_name, id=doc.get("id"), document=doc)
         print(f"Elasticsearch: Indexed {len(docs)} documents in {self.index_name}.")
+
+    def delete_documents(self, ids: list, batch_size: int = 500):
+        for doc_id in ids:
+            self.client.delete(index=self.index_name, id=doc_id, ignore=[404])
+        print(f"Elasticsearch: Deleted {len(ids)} documents from {self.index_name}.")
+
+    def begin_bulk_load(self):
+        # No refreshes and no replicas while loading; end_bulk_load() restores them
+        settings = self.client.indices.get_settings(index=self.index_name)[self.index_name]["settings"]["index"]
+        self._serving_settings = {
+            "refresh_interval": settings.get("refresh_interval", "1s"),
+            "number_of_replicas": settings.get("number_of_replicas", "1"),
+        }
+        self.client.indices.put_settings(
+            index=self.index_name, body={"index": {"refresh_interval": "-1", "number_of_replicas": 0}}
+        )
+
+    def end_bulk_load(self):
+        settings = getattr(self, "_serving_settings", None)
+        if settings:
+            self.client.indices.put_settings(index=self.index_name, body={"index": settings})
+        self.client.indices.refresh(index=self.index_name)
+
+    def document_count(self) -> int:
+        self.client.indices.refresh(index=self.index_name)
+        return self.client.count(index=self.index_name)["count"]
+
+    def search_ids(self, vector: list, text: str = None, top: int = 10) -> list:
+        # 'embedding' is not mapped as a dense_vector, so query the text
+        response = self.client.search(
+            index=self.index_name, body={"query": {"match": {"content": text}}, "size": top, "_source": False}
+        )
+        return [hit["_id"] for hit in response["hits"]["hits"]]
+
+    def drop_index(self):
+        self.client.indices.delete(index=self.index_name, ignore=[404])
+        print(f"Elasticsearch: Dropped index {self.index_name}.")
+
+    def point_alias(self, alias: str) -> bool:
+        # One update_aliases call, so the switch is atomic for readers
+        if self.client.indices.exists(index=alias) and not self.client.indices.exists_alias(name=alias):
+            print(f"Elasticsearch: '{alias}' is a concrete index; drop it to use the alias.")
+            return False
+        actions = [{"remove": {"index": "*", "alias": alias}}] if self.client.indices.exists_alias(name=alias) else []
+        actions.append({"add": {"index": self.index_name, "alias": alias}})
+        self.client.indices.update_aliases(body={"actions": actions})
+        print(f"Elasticsearch: Alias {alias} -> {self.index_name}.")
+        return True
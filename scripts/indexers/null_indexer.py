@@ -0,0 +1,59 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/indexers/null_indexer.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+import json
+
+from utils.metrics import span, extras_enabled
+from utils.build_scheduler import upload_slot
+from .base_indexer import BaseIndexer
+
+class NullIndexer(BaseIndexer):
+    """
+    A no-network stand-in backend (VECTOR_BACKEND=null) for dry runs and local
+    testing. Documents are kept in memory instead of being uploaded.
+    """
+
+    def __init__(self, index_name: str):
+        super().__init__(index_name)
+        self.documents = {}
+
+    def create_index(self):
+        print(f"Null backend: using in-memory index '{self.index_name}'.")
+
+    def index_documents(self, docs: list, batch_size: int = 500):
+        for i in range(0, len(docs), batch_size):
+            batch = docs[i : i + batch_size]
+            if extras_enabled():
+                # Stands in for the SDK's payload serialization (profiles, metrics exports)
+                with span("serialize", index=self.index_name):
+                    json.dumps({"value": batch})
+            with upload_slot(len(batch)), span("upload", index=self.index_name, docs=len(batch)):
+                for doc in batch:
+                    self.documents[doc["id"]] = doc
+        print(f"Null backend: stored {len(docs)} documents in '{self.index_name}'.")
+
+    def delete_documents(self, ids: list, batch_size: int = 500):
+        for doc_id in ids:
+            self.documents.pop(doc_id, None)
+        print(f"Null backend: deleted {len(ids)} documents from '{self.index_name}'.")
+
+    def document_count(self) -> int:
+        return len(self.documents)
+
+    def search_ids(self, vector: list, text: str = None, top: int = 10) -> list:
+        # Exact cosine over the stored documents
+        def cosine(other):
+            dot = sum(a * b for a, b in zip(vector, other))
+            norm = (sum(a * a for a in vector) * sum(b * b for b in other)) ** 0.5
+            return dot / norm if norm else 0.0
+        scored = [(cosine(doc["embedding"]), doc_id) for doc_id, doc in self.documents.items() if doc.get("embedding")]
+        return [doc_id for _, doc_id in sorted(scored, reverse=True)[:top]]
+
+    def drop_index(self):
+        self.documents = {}
+        print(f"Null backend: dropped index '{self.index_name}'.")
@@ -0,0 +1,84 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/indexers/registry.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Lazy registry of vector backends, keyed by VECTOR_BACKEND.
+#
+# Built-in backends are listed as "module:Class" strings and only imported when
+# selected, so an Azure run never imports chromadb/elasticsearch and a Chroma or
+# dry run never imports the azure.search.documents model tree. Third-party
+# backends can be added with register_backend() or through the
+# 'cisco_data_bridge.indexers' entry point group.
+
+import os
+import importlib
+from importlib.metadata import entry_points
+
+from utils.index_versions import resolve_index
+
+ENTRY_POINT_GROUP = "cisco_data_bridge.indexers"
+
+_BACKENDS = {
+    "azure": ".azure_indexer:AzureIndexer",
+    "chroma": ".chroma_indexer:ChromaIndexer",
+    "elastic": ".elastic_indexer:ElasticIndexer",
+    "null": ".null_indexer:NullIndexer",
+}
+
+_loaded = {}
+
+
+def register_backend(name: str, target):
+    """Registers a backend by class or by a lazy 'package.module:Class' string."""
+    _BACKENDS[name] = target
+    _loaded.pop(name, None)
+
+
+def available_backends() -> list:
+    names = set(_BACKENDS)
+    names.update(ep.name for ep in entry_points(group=ENTRY_POINT_GROUP))
+    return sorted(names)
+
+
+def _import_target(target: str):
+    module_name, _, attr = target.partition(":")
+    module = importlib.import_module(module_name, package=__package__)
+    return getattr(module, attr)
+
+
+def get_indexer_class(backend: str = None):
+    """Resolves (and imports on first use) the indexer class for a backend name."""
+    backend = (backend or os.getenv("VECTOR_BACKEND", "azure")).lower()
+    if backend in _loaded:
+        return _loaded[backend]
+
+    target = _BACKENDS.get(backend)
+    if target is None:
+        matches = [ep for ep in entry_points(group=ENTRY_POINT_GROUP) if ep.name == backend]
+        if not matches:
+            raise ValueError(
+                f"Unsupported backend: {backend} (available: {', '.join(available_backends())})"
+            )
+        cls = matches[0].load()
+    elif isinstance(target, str):
+        cls = _import_target(target)
+    else:
+        cls = target
+
+    _loaded[backend] = cls
+    return cls
+
+
+def get_indexer(index_name: str, backend: str = None, resolve_alias: bool = True):
+    """
+    Determines which backend to use and returns the appropriate indexer. A
+    logical index name is resolved to the physical version currently serving
+    it (see utils/index_versions.py) unless resolve_alias is False.
+    """
+    if resolve_alias:
+        index_name = resolve_index(index_name)
+    return get_indexer_class(backend)(index_name)
@@ -0,0 +1,180 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/load_test_retrieval.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Load test for scripts/retrieval_server.py: concurrent clients replay a query
+# mix and the run reports QPS, latency percentiles (overall and per endpoint)
+# and the server's coalescing / embedding-batch counters.
+#
+# Queries are the opening words of documents sampled from the lexical
+# snapshots (domain, api-docs, events and every lob-* index). --hot sends that
+# fraction of requests to a small set of popular queries, the way many agent
+# sessions ask the same thing at once.
+#
+#   python scripts/load_test_retrieval.py --url http://127.0.0.1:8088 --concurrency 64 --requests 5000
+#
+#   # start a server (here lexical snapshots + null backend + hash embedder) and test it
+#   VECTOR_BACKEND=null EMBEDDING_BACKEND=hash python scripts/load_test_retrieval.py --spawn
+
+import os
+import sys
+import glob
+import time
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+import aiohttp
+from dotenv import load_dotenv
+from utils.lexical_index import LexicalIndex, LEXICAL_INDEX_DIR
+from utils.retrieval_eval import percentile
+
+load_dotenv()
+
+QUERY_WORDS = 8
+HOT_QUERIES = 20
+
+
+def endpoint_for_index(index_name: str) -> str:
+    if index_name.startswith("lob-"):
+        return f"/search/lob/{index_name[len('lob-'):]}"
+    if index_name == os.getenv("AZURE_SEARCH_DOMAIN_INDEX", "domain-summaries-index"):
+        return "/route"
+    if index_name == os.getenv("AZURE_SEARCH_EVENTS_INDEX", "events-index"):
+        return "/search/events"
+    return "/search/api-docs"
+
+
+def sample_queries(n: int, seed: int = 0) -> list:
+    """[(endpoint path, query)] from the opening words of snapshot documents."""
+    rng = random.Random(seed)
+    pools = []
+    for path in sorted(glob.glob(os.path.join(LEXICAL_INDEX_DIR, "*.bm25"))):
+        index = LexicalIndex.load(path)
+        endpoint = endpoint_for_index(os.path.basename(path)[:-len(".bm25")])
+        texts = [" ".join(str(stored.get("content", "")).split()[:QUERY_WORDS]) for stored in index.stored]
+        texts = [text for text in texts if text]
+        if texts:
+            pools.append((endpoint, texts))
+    if not pools:
+        raise SystemExit(f"No lexical snapshots in {LEXICAL_INDEX_DIR}; build the indexes first.")
+    # Each endpoint gets an equal share, whatever the size of its index
+    return [(endpoint, rng.choice(texts)) for endpoint, texts in (rng.choice(pools) for _ in range(n))]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_healthy(session: aiohttp.ClientSession, url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{url}/health") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit(f"Retrieval server at {url} did not become healthy within {timeout:.0f}s")
+
+
+async def _stats(session: aiohttp.ClientSession, url: str) -> dict:
+    async with session.get(f"{url}/stats") as response:
+        return await response.json()
+
+
+async def run_load(url: str, requests: list, concurrency: int, top: int) -> dict:
+    latencies = {}  # endpoint -> [seconds]
+    errors = {}
+    next_request = iter(requests)
+
+    async def client(session):
+        for endpoint, query in next_request:
+            key = "/search/lob" if endpoint.startswith("/search/lob/") else endpoint
+            start = time.perf_counter()
+            try:
+                async with session.post(f"{url}{endpoint}", json={"query": query, "top": top}) as response:
+                    await response.read()
+                    status = response.status
+            except aiohttp.ClientError as e:
+                status = type(e).__name__
+            if status == 200:
+                latencies.setdefault(key, []).append(time.perf_counter() - start)
+            else:
+                errors[status] = errors.get(status, 0) + 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await _wait_healthy(session, url)
+        before = await _stats(session, url)
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        after = await _stats(session, url)
+    return {"latencies": latencies, "errors": errors, "elapsed": elapsed, "before": before, "after": after}
+
+
+def print_report(result: dict, concurrency: int):
+    latencies = result["latencies"]
+    every = [value for values in latencies.values() for value in values]
+    n_errors = sum(result["errors"].values())
+    elapsed = result["elapsed"]
+    print(f"\n{len(every) + n_errors} requests, {concurrency} concurrent clients, {elapsed:.2f}s: "
+          f"{len(every) / elapsed:.1f} QPS, {n_errors} errors {result['errors'] or ''}")
+    print(f"{'endpoint':<20}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'p99.9 ms':>10}{'max ms':>10}")
+    for endpoint, values in sorted(latencies.items()) + [("all", every)]:
+        print(f"{endpoint:<20}{len(values):>8}"
+              + "".join(f"{percentile(values, q) * 1000:>10.1f}" for q in (50, 90, 99, 99.9, 100)))
+
+    before, after = result["before"], result["after"]
+    searches = after["searches"] - before["searches"]
+    coalesced = after["coalesced"] - before["coalesced"]
+    batches = after["embed_batches"] - before["embed_batches"]
+    embedded = after["embedded_queries"] - before["embedded_queries"]
+    print(f"Server ({after['backend']}): {searches} searches run, {coalesced} requests coalesced onto "
+          f"in-flight ones; {embedded} query embeddings in {batches} batches "
+          f"(mean {embedded / batches if batches else 0:.1f}, largest {after['largest_batch']}).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for the retrieval service.")
+    parser.add_argument("--url", default=None, help="server URL (default http://127.0.0.1:RETRIEVAL_PORT)")
+    parser.add_argument("--spawn", action="store_true", help="start a retrieval server for the run")
+    parser.add_argument("--backend", default=None, help="with --spawn: vector backend, or 'local'")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--hot", type=float, default=0.3,
+                        help="fraction of requests drawn from a few popular queries (default 0.3)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    requests = sample_queries(args.requests, seed=args.seed)
+    rng = random.Random(args.seed)
+    hot = requests[:HOT_QUERIES]
+    requests = [rng.choice(hot) if rng.random() < args.hot else request for request in requests]
+
+    server = None
+    url = args.url or f"http://127.0.0.1:{os.getenv('RETRIEVAL_PORT', '8088')}"
+    if args.spawn:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrieval_server.py"),
+                   "--port", str(port)]
+        if args.backend:
+            command += ["--backend", args.backend]
+        server = subprocess.Popen(command, env=dict(os.environ, INDEX_QUIET="1"))
+    try:
+        print_report(asyncio.run(run_load(url, requests, args.concurrency, args.top)), args.concurrency)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
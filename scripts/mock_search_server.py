@@ -0,0 +1,258 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/mock_search_server.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# A local stand-in for the Azure AI Search REST endpoint, enough of it for
+# AzureIndexer: index definitions, document upload/delete, $count and vector
+# search (exact cosine). It counts TCP connections against requests (pooling
+# and keep-alive), gzip request bodies and bytes on the wire, served at /stats.
+#
+# The SDK refuses key credentials over plain http, so the mock serves https
+# with a throwaway self-signed certificate (made with the openssl CLI) that
+# clients trust through REQUESTS_CA_BUNDLE:
+#
+#   python scripts/mock_search_server.py --port 8765
+#   REQUESTS_CA_BUNDLE=<printed cert> AZURE_SEARCH_ENDPOINT=https://127.0.0.1:8765 \
+#       AZURE_SEARCH_KEY=x python scripts/process_docs.py
+#
+#   # upload benchmark through AzureIndexer against an in-process server
+#   python scripts/mock_search_server.py --selftest 5000
+#   SEARCH_HTTP_GZIP=1 python scripts/mock_search_server.py --selftest 5000
+
+import os
+import re
+import ssl
+import sys
+import json
+import gzip
+import math
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+from urllib.parse import urlsplit, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_INDEX_PATH_RE = re.compile(r"^/indexes\('([^']+)'\)(?:/docs(?:/(.*))?)?$")
+
+
+class MockSearchState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.indexes = {}    # name -> definition
+        self.documents = {}  # name -> { id: doc }
+        self.stats = {"connections": 0, "requests": 0, "gzip_requests": 0, "bytes_received": 0, "bytes_decoded": 0}
+
+
+class MockSearchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse connections
+    state = None
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.stats["connections"] += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body=None):
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        data = gzip.decompress(raw) if self.headers.get("Content-Encoding") == "gzip" else raw
+        with self.state.lock:
+            self.state.stats["requests"] += 1
+            self.state.stats["bytes_received"] += len(raw)
+            self.state.stats["bytes_decoded"] += len(data)
+            if self.headers.get("Content-Encoding") == "gzip":
+                self.state.stats["gzip_requests"] += 1
+        return json.loads(data) if data else None
+
+    def _route(self, method: str):
+        path = unquote(urlsplit(self.path).path).rstrip("/")
+        body = self._body()
+        state = self.state
+        if path == "/stats":
+            return self._reply(200, state.stats)
+        if path == "/indexes" and method == "POST":
+            with state.lock:
+                state.indexes[body["name"]] = body
+                state.documents.setdefault(body["name"], {})
+            return self._reply(201, body)
+
+        match = _INDEX_PATH_RE.match(path)
+        if not match:
+            return self._reply(404, {"error": {"code": "NotFound", "message": f"No route for {path}"}})
+        name, action = match.group(1), match.group(2)
+        if name not in state.indexes and not (method == "PUT" and action is None):
+            return self._reply(404, {"error": {"code": "ResourceNotFound", "message": f"Index '{name}' not found"}})
+
+        if action is None:
+            if method == "GET":
+                return self._reply(200, state.indexes[name])
+            if method == "PUT":
+                with state.lock:
+                    state.indexes[name] = body
+                    state.documents.setdefault(name, {})
+                return self._reply(200, body)
+            if method == "DELETE":
+                with state.lock:
+                    state.indexes.pop(name, None)
+                    state.documents.pop(name, None)
+                return self._reply(204)
+        elif action == "search.index":
+            results = []
+            with state.lock:
+                docs = state.documents[name]
+                for doc in body["value"]:
+                    doc = dict(doc)
+                    doc_action = doc.pop("@search.action", "upload")
+                    if doc_action == "delete":
+                        docs.pop(doc["id"], None)
+                    elif doc_action in ("merge", "mergeOrUpload") and doc["id"] in docs:
+                        docs[doc["id"]].update(doc)
+                    else:
+                        docs[doc["id"]] = doc
+                    results.append({"key": doc["id"], "status": True, "errorMessage": None, "statusCode": 200})
+            return self._reply(200, {"value": results})
+        elif action == "$count":
+            return self._reply(200, len(state.documents[name]))
+        elif action == "search.post.search":
+            return self._reply(200, {"value": self._search(name, body)})
+        return self._reply(400, {"error": {"code": "BadRequest", "message": f"Unsupported {method} {path}"}})
+
+    def _search(self, name: str, body: dict) -> list:
+        top = body.get("top") or 50
+        queries = body.get("vectorQueries") or []
+        with self.state.lock:
+            docs = list(self.state.documents[name].values())
+        if not queries:
+            return [dict(doc, **{"@search.score": 1.0}) for doc in docs[:top]]
+        vector = queries[0]["vector"]
+        norm = math.sqrt(sum(a * a for a in vector)) or 1.0
+        scored = []
+        for doc in docs:
+            other = doc.get("embedding") or []
+            other_norm = math.sqrt(sum(b * b for b in other)) or 1.0
+            scored.append((sum(a * b for a, b in zip(vector, other)) / (norm * other_norm), doc))
+        scored.sort(key=lambda pair: -pair[0])
+        select = [f.strip() for f in body["select"].split(",")] if body.get("select") else None
+        return [
+            dict({k: v for k, v in doc.items() if select is None or k in select}, **{"@search.score": score})
+            for score, doc in scored[:top]
+        ]
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+
+def make_self_signed_cert(host: str = "127.0.0.1") -> tuple:
+    """(certfile, keyfile) for host, valid for a day."""
+    directory = tempfile.mkdtemp(prefix="mock-search-")
+    certfile, keyfile = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run([
+        "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+        "-keyout", keyfile, "-out", certfile, "-subj", f"/CN={host}",
+        "-addext", f"subjectAltName=IP:{host},DNS:localhost",
+    ], check=True, capture_output=True)
+    return certfile, keyfile
+
+
+def start_mock_server(port: int = 0, host: str = "127.0.0.1"):
+    """Starts the mock in a daemon thread; returns (server, state, endpoint, certfile)."""
+    state = MockSearchState()
+    handler = type("BoundMockSearchHandler", (MockSearchHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    certfile, keyfile = make_self_signed_cert(host)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(certfile, keyfile)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"https://{host}:{server.server_address[1]}", certfile
+
+
+def run_selftest(n_docs: int, batch_size: int = 500):
+    """Uploads synthetic docs through AzureIndexer and reports throughput and connection reuse."""
+    server, state, endpoint, certfile = start_mock_server()
+    os.environ["REQUESTS_CA_BUNDLE"] = certfile
+    os.environ["AZURE_SEARCH_ENDPOINT"] = endpoint
+    os.environ.setdefault("AZURE_SEARCH_KEY", "mock-key")
+    from indexers import get_indexer
+    from utils.embedding import get_embedding_dimension
+
+    dim = get_embedding_dimension()
+    rng = random.Random(0)
+    docs = [
+        {
+            "id": f"doc-{i}",
+            "title": f"Synthetic doc {i}",
+            "content": f"Synthetic content {i} " * 20,
+            "platform": "meraki",
+            "doc_type": "api-docs",
+            "embedding": [rng.uniform(-1, 1) for _ in range(dim)],
+        }
+        for i in range(n_docs)
+    ]
+    indexer = get_indexer("api-docs-index", backend="azure", resolve_alias=False)
+    indexer.create_index()
+    start = time.perf_counter()
+    indexer.index_documents(docs, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    # A second client, as the next indexer in the same process would open
+    assert get_indexer("api-docs-index", backend="azure", resolve_alias=False).document_count() == n_docs
+    hits = indexer.search_ids(docs[0]["embedding"], top=1)
+
+    stats = state.stats
+    print(
+        f"{n_docs} docs in {elapsed:.2f}s ({n_docs / elapsed:.0f} docs/s); "
+        f"{stats['requests']} requests over {stats['connections']} connections; "
+        f"{stats['gzip_requests']} gzip, {stats['bytes_received'] / 1e6:.1f} MB sent "
+        f"({stats['bytes_decoded'] / 1e6:.1f} MB decoded); top hit {hits[0] if hits else None}"
+    )
+    server.shutdown()
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock of the Azure AI Search REST endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--selftest", type=int, metavar="N_DOCS",
+                        help="upload N synthetic docs through AzureIndexer and report")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.selftest:
+        run_selftest(args.selftest, args.batch_size)
+        sys.exit(0)
+    server, state, endpoint, certfile = start_mock_server(args.port, args.host)
+    print(f"Mock search endpoint on {endpoint} (stats at {endpoint}/stats). Ctrl+C to stop.")
+    print(f"Trust its certificate with REQUESTS_CA_BUNDLE={certfile}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -10,56 +10,42 @@
 
 import os
 import json
-import glob
-import uuid
-import logging
+import argparse
 from dotenv import load_dotenv
-from indexers.azure_indexer import AzureIndexer
+from indexers import get_indexer
 from utils.chunking import chunk_file
-from utils.embedding import embed_text  
+from utils.embedding import embed_texts
+from utils.lexical_index import build_lexical_index, snapshot_fields
+from utils.parallel_chunking import plan_api_doc_tasks, iter_chunked_tasks
+from utils.doc_ids import api_doc_chunk_docs
+from utils.metrics import span, configure_sdk_logging, export_metrics
+from utils.build_plan import BuildPlan
+from utils.profiling import profiled, PROFILE_DIR
+from utils.index_versions import resolve_index
+from utils.platform_router import build_platform_router
+from utils.spec_versions import (
+    SpecVersionState, sync_specs, plan_specs, indexed_spec_docs, spec_embedding_cache
+)
+from embedders import get_embedder
 
 # Load environment variables
 load_dotenv()
 
-# Create a logger
-logger = logging.getLogger("azure")
-logger.setLevel(logging.DEBUG)
-
-# Create a file handler to write logs to a file
-log_file = "azure_debug.log"
-file_handler = logging.FileHandler(log_file)
-file_handler.setLevel(logging.DEBUG)
-
-# Create a formatter and set it for the handler
-formatter = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-file_handler.setFormatter(formatter)
-
-# Add the file handler to the logger
-logger.addHandler(file_handler)
-
-print(f"Logging Azure SDK details to {log_file}")
-
-
-def get_indexer(index_name):
-    """Determines which backend to use and returns the appropriate indexer."""
-    backend = os.getenv("VECTOR_BACKEND", "azure")
-    if backend == "azure":
-        return AzureIndexer(index_name)
-    else:
-        raise ValueError(f"Unsupported backend: {backend}")
-
 
-def process_domain_summaries():
-    """Processes and indexes domain summaries with manual embedding."""
+def process_domain_summaries(build_router: bool = True) -> list:
+    """
+    Processes and indexes domain summaries with manual embedding. Returns the
+    embedded docs; build_router=False leaves the platform router to the caller
+    (scripts/build_all.py runs it as its own job).
+    """
     domain_index_name = os.getenv("AZURE_SEARCH_DOMAIN_INDEX", "domain-summaries-index")
     domain_indexer = get_indexer(domain_index_name)
     domain_indexer.create_index()
 
     domain_summaries_path = "domain_summaries/domain_summaries.json"
-    with open(domain_summaries_path, "r", encoding="utf-8") as f:
-        summaries = json.load(f)
+    with span("read", index=domain_index_name):
+        with open(domain_summaries_path, "r", encoding="utf-8") as f:
+            summaries = json.load(f)
 
     chunked_summaries = []
     for summary in summaries:
@@ -67,11 +53,10 @@ def process_domain_summaries():
             print(f"Warning: 'content' key missing in {summary}")
             continue
 
-        chunks = chunk_file(summary["content"], chunk_size=1000, chunk_overlap=200)
-        for chunk in chunks:
-            # Generate an embedding for each chunk
-            embedding_vector = embed_text(chunk)
-
+        with span("chunk", index=domain_index_name):
+            chunks = chunk_file(summary["content"], chunk_size=1000, chunk_overlap=200)
+        # Generate an embedding for each chunk (one batched call per summary)
+        for chunk, embedding_vector in zip(chunks, embed_texts(chunks)):
             chunked_summaries.append({
                 "id": summary["id"],  # Use the existing ID
                 "content": chunk,
@@ -82,12 +67,19 @@ def process_domain_summaries():
             })
 
     domain_indexer.index_documents(chunked_summaries)
+    build_lexical_index(chunked_summaries, domain_index_name, **snapshot_fields(domain_index_name))
+    # Stage-1 routing artifact from the same vectors (no extra embedding calls)
+    if build_router:
+        build_platform_router(chunked_summaries, embedder_key=get_embedder().cache_key)
     print(f"Indexed {len(chunked_summaries)} domain summaries into {domain_index_name}.")
+    return chunked_summaries
 
 
 def process_api_docs():
     """
     Processes and indexes API documentation files with manual embedding.
+    OpenAPI specs are synced per operation and schema: only the units that
+    changed since the indexed version are embedded (utils/spec_versions.py).
     """
     api_docs_index_name = os.getenv("API_DOCS_INDEX_NAME", "api-docs-index")
     api_docs_indexer = get_indexer(api_docs_index_name)
@@ -96,44 +88,92 @@ def process_api_docs():
     platform_dirs = ["catalyst_center", "cisco_spaces", "meraki", "webex"]
     chunked_api_docs = []
 
-    for platform_dir in platform_dirs:
-        docs_path = os.path.join(platform_dir, "api-docs")
-        specs_path = os.path.join(platform_dir, "api-specs")
-
-        # Process markdown API docs
-        for file_path in glob.glob(os.path.join(docs_path, "*.md")):
-            platform = platform_dir
-            doc_type = "api-docs"
-            chunks = chunk_file(file_path, chunk_size=1000, chunk_overlap=200)
-            for chunk in chunks:
-                embedding_vector = embed_text(chunk)
-                chunked_api_docs.append({
-                    "id": str(uuid.uuid4()),
-                    "content": chunk,
-                    "platform": platform,
-                    "doc_type": doc_type,
-                    "embedding": embedding_vector
-                })
-
-        # Process JSON API specs
-        for file_path in glob.glob(os.path.join(specs_path, "*.json")):
-            platform = platform_dir
-            doc_type = "api-specs"
-            chunks = chunk_file(file_path, chunk_size=1000, chunk_overlap=200)
-            for chunk in chunks:
-                embedding_vector = embed_text(chunk)
-                chunked_api_docs.append({
-                    "id": str(uuid.uuid4()),
-                    "content": chunk,
-                    "platform": platform,
-                    "doc_type": doc_type,
-                    "embedding": embedding_vector
-                })
+    # Markdown docs are read and chunked on a process pool; results arrive in a
+    # deterministic order. Ids are the ones distributed and watch builds use, so
+    # a full refresh overwrites the markdown docs instead of adding copies.
+    tasks = plan_api_doc_tasks(platform_dirs, chunk_size=1000, chunk_overlap=200)
+    for task, chunks in iter_chunked_tasks(tasks):
+        docs = api_doc_chunk_docs(task, chunks)
+        for doc, embedding_vector in zip(docs, embed_texts(chunks)):
+            doc["embedding"] = embedding_vector
+        chunked_api_docs.extend(docs)
 
     api_docs_indexer.index_documents(chunked_api_docs)
-    print(f"Indexed {len(chunked_api_docs)} API documents into {api_docs_index_name}.")
+
+    spec_state = SpecVersionState()
+    spec_totals = sync_specs(platform_dirs, api_docs_indexer, api_docs_indexer.index_name, spec_state)
+    spec_docs = indexed_spec_docs(spec_state, api_docs_indexer.index_name)
+
+    build_lexical_index(
+        chunked_api_docs + spec_docs, api_docs_index_name, **snapshot_fields(api_docs_index_name)
+    )
+    print(f"Indexed {len(chunked_api_docs)} API documents into {api_docs_index_name}; "
+          f"{spec_totals['specs']} specs changed ({spec_totals['embedded']} spec chunks embedded, "
+          f"{len(spec_docs)} spec docs indexed).")
+
+
+def plan_domain_summaries(plan: BuildPlan):
+    """Adds the domain summaries to a dry-run plan: chunked, never embedded or uploaded."""
+    domain_index_name = os.getenv("AZURE_SEARCH_DOMAIN_INDEX", "domain-summaries-index")
+    with open("domain_summaries/domain_summaries.json", "r", encoding="utf-8") as f:
+        summaries = json.load(f)
+
+    by_platform = {}
+    for summary in summaries:
+        if "content" not in summary:
+            continue
+        for chunk in chunk_file(summary["content"], chunk_size=1000, chunk_overlap=200):
+            by_platform.setdefault(summary.get("platform", "unknown"), []).append({
+                "id": summary["id"],
+                "content": chunk,
+                "platform": summary.get("platform", "unknown"),
+                "doc_type": summary.get("doc_type", "unknown"),
+            })
+    for platform, docs in by_platform.items():
+        plan.add(domain_index_name, platform, docs)
+
+
+def plan_api_docs(plan: BuildPlan):
+    """
+    Adds the API docs and specs to a dry-run plan, one row per platform and doc
+    type. Spec rows hold only the docs the next sync would upload.
+    """
+    api_docs_index_name = os.getenv("API_DOCS_INDEX_NAME", "api-docs-index")
+    platform_dirs = ["catalyst_center", "cisco_spaces", "meraki", "webex"]
+
+    groups = {}
+    tasks = plan_api_doc_tasks(platform_dirs, chunk_size=1000, chunk_overlap=200)
+    for task, chunks in iter_chunked_tasks(tasks):
+        groups.setdefault(f"{task['platform']}/{task['doc_type']}", []).extend(api_doc_chunk_docs(task, chunks))
+    for group, docs in groups.items():
+        plan.add(api_docs_index_name, group, docs)
+
+    spec_groups = {}
+    for spec_plan in plan_specs(platform_dirs, SpecVersionState(), resolve_index(api_docs_index_name)):
+        print(f"Spec {spec_plan['spec']}: {spec_plan['diff'].summary()}")
+        platform = spec_plan["spec"].split("/", 1)[0]
+        spec_groups.setdefault(f"{platform}/api-specs", []).extend(spec_plan["upserts"])
+    for group, docs in spec_groups.items():
+        plan.add(api_docs_index_name, group, docs, cache=spec_embedding_cache())
 
 
 if __name__ == "__main__":
-    process_domain_summaries()
-    process_api_docs()
+    parser = argparse.ArgumentParser(description="Index domain summaries and API docs.")
+    parser.add_argument("--plan", action="store_true",
+                        help="chunk and count tokens/cost/time only; no embedding or upload")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DIR, default=None, metavar="DIR",
+                        help="write per-stage CPU and allocation profiles and a ranked report "
+                             "(default DIR: PROFILE_DIR or profiles)")
+    args = parser.parse_args()
+
+    with profiled("docs", args.profile):
+        if args.plan:
+            plan = BuildPlan("domain summaries + api docs")
+            plan_domain_summaries(plan)
+            plan_api_docs(plan)
+            plan.print_report()
+        else:
+            configure_sdk_logging("azure_debug.log")
+            process_domain_summaries()
+            process_api_docs()
+            export_metrics()
@@ -10,39 +10,121 @@
 
 import os
 import json
-import logging
 import uuid
+import argparse
 from dotenv import load_dotenv
-from indexers.azure_indexer import AzureIndexer  # Ensure azure_indexer.py has event_id in create_index()
-from utils.embedding import embed_text
+from indexers import get_indexer
+from utils.embedding import embed_texts
+from utils.lexical_index import LexicalIndex, add_lexical_docs, save_lexical_index, snapshot_fields
+from utils.metrics import span, configure_sdk_logging, export_metrics
+from utils.build_plan import BuildPlan
+from utils.profiling import profiled, PROFILE_DIR
+from utils.gc_pause import paused_gc
 
 load_dotenv()
 
-# Create a logger
-logger = logging.getLogger("azure")
-logger.setLevel(logging.DEBUG)
 
-# Create a file handler to write logs to a file
-log_file = "events_debug.log"
-file_handler = logging.FileHandler(log_file)
-file_handler.setLevel(logging.DEBUG)
-
-# Create a formatter
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(formatter)
-
-# Add the file handler to the logger
-logger.addHandler(file_handler)
-
-print(f"Logging Azure SDK details to {log_file}")
+def normalize_event(event: dict) -> dict:
+    """
+    Converts one raw event into an upload-ready doc (without the embedding):
+    { id, event_id, event_name, event_type, content, additional_info }.
+    """
+    # 1) Extract top-level fields
+    event_type = event.get("event_type", "unknown_type")
+
+    # 2) If there's an 'additional_info' field, read from there
+    additional_info_raw = event.get("additional_info", {})
+
+    zone_id = additional_info_raw.get("zone_id")
+    timestamp = additional_info_raw.get("timestamp")
+    camera_id = additional_info_raw.get("camera_id")
+    building = additional_info_raw.get("building")
+    floor = additional_info_raw.get("floor")
+    location_str = additional_info_raw.get("location")
+    cisco_ai = additional_info_raw.get("cisco_ai")
+
+    recommended_actions = additional_info_raw.get("recommended_actions", [])
+    urls_for_further_action = additional_info_raw.get("urls_for_further_action", [])
+    extra_notes = additional_info_raw.get("extra_notes", [])
+
+    # 3) Build 'content' text from event data (optional)
+    #    e.g., using top-level zone_id, timestamp, camera from additional_info
+    #    so the LLM sees it in plain text
+    content_parts = []
+    content_parts.append(f"Detected event: {event_type}")
+
+    if zone_id:
+        content_parts.append(f"in zone: {zone_id}")
+    if timestamp:
+        content_parts.append(f"at {timestamp}")
+    if camera_id:
+        content_parts.append(f"camera={camera_id}")
+
+    # minimal fallback if no location
+    location_line = []
+    if building:
+        location_line.append(building)
+    if floor:
+        location_line.append(f"floor {floor}")
+    if location_str:
+        location_line.append(location_str)
+
+    if location_line:
+        content_parts.append("Location: " + " / ".join(location_line))
+
+    # join them all
+    content = ". ".join(content_parts) + "."
+
+    # 4) Build additional_info (omitting None)
+    refined_info = {}
+    if zone_id:
+        refined_info["zone_id"] = zone_id
+    if timestamp:
+        refined_info["timestamp"] = timestamp
+    if camera_id:
+        refined_info["camera_id"] = camera_id
+    if building:
+        refined_info["building"] = building
+    if floor:
+        refined_info["floor"] = floor
+    if location_str:
+        refined_info["location"] = location_str
+    if cisco_ai:
+        refined_info["cisco_ai"] = cisco_ai
+
+    if recommended_actions:
+        refined_info["recommended_actions"] = recommended_actions
+    if urls_for_further_action:
+        refined_info["urls_for_further_action"] = urls_for_further_action
+    if extra_notes:
+        refined_info["extra_notes"] = extra_notes
+
+    # 5) The doc's key in Azure is 'event_id'
+    #    If event_id missing, fallback to a new random string
+    event_id = event.get("event_id") or str(uuid.uuid4())
+
+    # 6) Build final doc
+    return {
+        "id": event_id,    # <--- ensures doc key in Azure = event_id
+        "event_id": event_id,
+        "event_name": event.get("event", "Spaces"),
+        "event_type": event_type,
+        "content": content,
+        "additional_info": refined_info
+    }
+
+
+EVENTS_BATCH_SIZE = int(os.getenv("EVENTS_BATCH_SIZE", "50000"))
+
+
+def normalize_events(events: list) -> list:
+    """
+    normalize_event over a batch, with the cyclic garbage collector paused (see
+    utils/gc_pause.py); the output is identical.
+    """
+    with paused_gc():
+        return [normalize_event(event) for event in events]
 
-def get_indexer(index_name):
-    """Returns an AzureIndexer for the given index."""
-    backend = os.getenv("VECTOR_BACKEND", "azure")
-    if backend == "azure":
-        return AzureIndexer(index_name)
-    else:
-        raise ValueError(f"Unsupported backend: {backend}")
 
 def process_events():
     """
@@ -59,109 +141,63 @@ def process_events():
     events_indexer.create_index()
 
     events_path = "events/sample_events.json"
-    with open(events_path, "r", encoding="utf-8") as f:
-        events = json.load(f)
-
-    docs = []
+    with span("read", index=events_index_name):
+        with open(events_path, "r", encoding="utf-8") as f, paused_gc():
+            events = json.load(f)
+
+    # Normalize, embed and upload EVENTS_BATCH_SIZE events at a time. The lexical
+    # snapshot takes each batch as it is uploaded, so only one batch of docs
+    # and embeddings is held at a time (the raw events stay loaded).
+    lexical = LexicalIndex()
     doc_count = 0
-
-    for event in events:
-        # 1) Extract top-level fields
-        event_type = event.get("event_type", "unknown_type")
-
-        # 2) If there's an 'additional_info' field, read from there
-        additional_info_raw = event.get("additional_info", {})
-
-        zone_id = additional_info_raw.get("zone_id")
-        timestamp = additional_info_raw.get("timestamp")
-        camera_id = additional_info_raw.get("camera_id")
-        building = additional_info_raw.get("building")
-        floor = additional_info_raw.get("floor")
-        location_str = additional_info_raw.get("location")
-        cisco_ai = additional_info_raw.get("cisco_ai")
-
-        recommended_actions = additional_info_raw.get("recommended_actions", [])
-        urls_for_further_action = additional_info_raw.get("urls_for_further_action", [])
-        extra_notes = additional_info_raw.get("extra_notes", [])
-
-        # 3) Build 'content' text from event data (optional)
-        #    e.g., using top-level zone_id, timestamp, camera from additional_info
-        #    so the LLM sees it in plain text
-        content_parts = []
-        content_parts.append(f"Detected event: {event_type}")
-
-        if zone_id:
-            content_parts.append(f"in zone: {zone_id}")
-        if timestamp:
-            content_parts.append(f"at {timestamp}")
-        if camera_id:
-            content_parts.append(f"camera={camera_id}")
-
-        # minimal fallback if no location
-        location_line = []
-        if building:
-            location_line.append(building)
-        if floor:
-            location_line.append(f"floor {floor}")
-        if location_str:
-            location_line.append(location_str)
-
-        if location_line:
-            content_parts.append("Location: " + " / ".join(location_line))
-
-        # join them all
-        content = ". ".join(content_parts) + "."
-
-        # 4) Build additional_info (omitting None)
-        refined_info = {}
-        if zone_id:
-            refined_info["zone_id"] = zone_id
-        if timestamp:
-            refined_info["timestamp"] = timestamp
-        if camera_id:
-            refined_info["camera_id"] = camera_id
-        if building:
-            refined_info["building"] = building
-        if floor:
-            refined_info["floor"] = floor
-        if location_str:
-            refined_info["location"] = location_str
-        if cisco_ai:
-            refined_info["cisco_ai"] = cisco_ai
-
-        if recommended_actions:
-            refined_info["recommended_actions"] = recommended_actions
-        if urls_for_further_action:
-            refined_info["urls_for_further_action"] = urls_for_further_action
-        if extra_notes:
-            refined_info["extra_notes"] = extra_notes
-
-        # 5) The doc's key in Azure is 'event_id'
-        #    If event_id missing, fallback to a new random string
-        event_id = event.get("event_id") or str(uuid.uuid4())
-
-        # 6) Build final doc
-        doc = {
-            "id": event_id,    # <--- ensures doc key in Azure = event_id
-            "event_id": event_id,
-            "event_name": event.get("event", "Spaces"),
-            "event_type": event_type,
-            "content": content,
-            "additional_info": refined_info
-        }
-
-        # 7) Generate embeddings from 'content' if needed
-        doc["embedding"] = embed_text(doc["content"])
-
-        docs.append(doc)
-        doc_count += 1
-
-    print(f"Preparing to upload {doc_count} documents to the index...")
-
-    # Index them in one batch
-    events_indexer.index_documents(docs)
+    for start in range(0, len(events), EVENTS_BATCH_SIZE):
+        with span("normalize", index=events_index_name):
+            batch = normalize_events(events[start:start + EVENTS_BATCH_SIZE])
+
+        # 7) Generate embeddings from 'content' (batched)
+        vectors = embed_texts([doc["content"] for doc in batch])
+        for doc, vector in zip(batch, vectors):
+            doc["embedding"] = vector
+
+        print(f"Preparing to upload {len(batch)} documents to the index...")
+        events_indexer.index_documents(batch)
+        with span("lexical_index", index=events_index_name):
+            add_lexical_docs(lexical, batch, **snapshot_fields(events_index_name))
+        doc_count += len(batch)
+        del batch, vectors
+
+    save_lexical_index(lexical, events_index_name)
     print(f"Indexed {doc_count} documents into '{events_index_name}'.")
 
 
+def plan_events(plan: BuildPlan):
+    """Adds the events to a dry-run plan, one row per event type (no embedding or upload)."""
+    events_index_name = os.getenv("AZURE_SEARCH_EVENTS_INDEX", "events-index")
+    with open("events/sample_events.json", "r", encoding="utf-8") as f:
+        events = json.load(f)
+
+    by_type = {}
+    for doc in normalize_events(events):
+        by_type.setdefault(doc["event_type"], []).append(doc)
+    for event_type, docs in sorted(by_type.items()):
+        plan.add(events_index_name, event_type, docs)
+
+
 if __name__ == "__main__":
-    process_events()
+    parser = argparse.ArgumentParser(description="Index event data.")
+    parser.add_argument("--plan", action="store_true",
+                        help="normalize and count tokens/cost/time only; no embedding or upload")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DIR, default=None, metavar="DIR",
+                        help="write per-stage CPU and allocation profiles and a ranked report "
+                             "(default DIR: PROFILE_DIR or profiles)")
+    args = parser.parse_args()
+
+    with profiled("events", args.profile):
+        if args.plan:
+            plan = BuildPlan("events")
+            plan_events(plan)
+            plan.print_report()
+        else:
+            configure_sdk_logging("events_debug.log")
+            process_events()
+            export_metrics()
@@ -11,42 +11,60 @@
 import os
 import json
 import glob
-import uuid
+import argparse
 from dotenv import load_dotenv
-from indexers.azure_indexer import AzureIndexer
-from utils.embedding import embed_text
+from indexers import get_indexer
+from utils.embedding import embed_texts
+from utils.lexical_index import build_lexical_index, snapshot_fields
+from utils.metrics import span, export_metrics
+from utils.build_plan import BuildPlan
+from utils.profiling import profiled, PROFILE_DIR
+from utils.lob_joins import build_join_index, discover_joins, denormalize_docs
+from utils.lob_schema import infer_lob_schema
 
 load_dotenv()
 
-def get_indexer(index_name):
-    return AzureIndexer(index_name)
 
-def process_lob():
+def load_lob_sources(folder_name: str) -> list:
+    """[(file name, record)] for every record of every *.json file in lob_samples/<folder>."""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sources = []
+    for jf in sorted(glob.glob(os.path.join(base_dir, "lob_samples", folder_name, "*.json"))):
+        with open(jf, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        records = data if isinstance(data, list) else [data] if isinstance(data, dict) else []
+        sources.extend((os.path.basename(jf), record) for record in records)
+    return sources
+
+
+def process_lob(denormalize: bool = None, index_name: str = None, folder_name: str = None):
     """
     Creates and populates a LOB index (e.g. 'lob-healthcare') from a folder:
-      - LOB_INDEX_NAME (e.g. lob-healthcare)
-      - LOB_INDEX_FOLDER_NAME (e.g. healthcare)
+      - index_name, else LOB_INDEX_NAME (e.g. lob-healthcare)
+      - folder_name, else LOB_INDEX_FOLDER_NAME (e.g. healthcare)
     We gather all *.json files from lob_samples/<folder> and combine them.
     
-    Each JSON file is assumed to be a list of objects with fields
-    that we can adapt into { id, content, metadata, embedding }.
-    The flexible index schema in azure_indexer.py uses:
-      - id -> key
-      - content -> main text
+    Each JSON file is assumed to be a list of objects. A schema is inferred per
+    file (utils/lob_schema.py) and each record becomes:
+      - id -> key (the record's id / first *_id field)
+      - content -> every value, nested ones flattened, as the embedded text
       - embedding -> vector
-      - metadata -> optional string
+      - typed, filterable fields (e.g. dob, address_state, patient_id)
+      - metadata -> only what the fields and text cannot carry (lists of objects)
+
+    Cross-record references (foreign keys) are discovered into a join index
+    (lob_joins/<folder>.json). With denormalize (or LOB_DENORMALIZE=1) each
+    document also carries its linked records.
     """
-    lob_index_name = os.getenv("LOB_INDEX_NAME", "lob-healthcare")
-    folder_name = os.getenv("LOB_INDEX_FOLDER_NAME", "healthcare")
+    if denormalize is None:
+        denormalize = os.getenv("LOB_DENORMALIZE", "0").lower() in ("1", "true", "yes")
+    lob_index_name = index_name or os.getenv("LOB_INDEX_NAME", "lob-healthcare")
+    folder_name = folder_name or os.getenv("LOB_INDEX_FOLDER_NAME", "healthcare")
 
     print(f"Using LOB index name: {lob_index_name}")
     print(f"Using LOB folder: {folder_name}")
 
-    # 1) Create the index if not exists
-    indexer = get_indexer(lob_index_name)
-    indexer.create_index()
-
-    # 2) Build path to lob_samples/<folder_name>/
+    # 1) Build path to lob_samples/<folder_name>/
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     # e.g. /home/jefteete/cisco-data-bridge-domain-index/scripts
     # go up one level => /home/jefteete/cisco-data-bridge-domain-index
@@ -56,74 +74,107 @@ def process_lob():
         print(f"ERROR: No directory found at {lob_path}")
         return
 
-    # 3) Gather all *.json files in that folder
-    json_files = glob.glob(os.path.join(lob_path, "*.json"))
+    # 2) Gather all *.json files in that folder
+    json_files = sorted(glob.glob(os.path.join(lob_path, "*.json")))
     if not json_files:
         print(f"No .json files found in {lob_path}")
         return
 
-    # 4) Load each file and combine them into a single list of records
+    # 3) Load each file and combine them into a single list of records
     all_records = []
-    for jf in json_files:
-        print(f"Reading file: {jf}")
-        try:
-            with open(jf, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # data might be a list or a dict; we assume list of objects
-                if isinstance(data, list):
-                    all_records.extend(data)
-                elif isinstance(data, dict):
-                    # in case it's a single record
-                    all_records.append(data)
-                else:
-                    print(f"Skipping {jf}: not a list or dict.")
-        except Exception as e:
-            print(f"Error reading {jf}: {e}")
+    sources = []  # (file name, record), aligned with all_records
+    with span("read", index=lob_index_name):
+        for jf in json_files:
+            print(f"Reading file: {jf}")
+            try:
+                with open(jf, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                    # data might be a list or a dict; we assume list of objects
+                    if isinstance(data, list):
+                        all_records.extend(data)
+                        sources.extend((os.path.basename(jf), record) for record in data)
+                    elif isinstance(data, dict):
+                        # in case it's a single record
+                        all_records.append(data)
+                        sources.append((os.path.basename(jf), data))
+                    else:
+                        print(f"Skipping {jf}: not a list or dict.")
+            except Exception as e:
+                print(f"Error reading {jf}: {e}")
 
     if not all_records:
         print("No valid records found in the LOB folder. Exiting.")
         return
 
-    # 5) Convert each record into { id, content, metadata, embedding }
-    docs = []
-    for record in all_records:
-        # Fallback to a random UUID if no ID
-        doc_id = str(record.get("id") or uuid.uuid4())
-
-        # We'll assume each record might have some text fields that we can
-        # combine as 'content'. Adjust as needed. For example:
-        #   "content" -> put entire record in a big text block
-        # Or if you have a known field like "name", "description", "notes",
-        # you can combine them. We'll do a naive approach:
-        # We'll join all string fields except "id" or "embedding".
-        content_parts = []
-        for k, v in record.items():
-            if k.lower() in ["id", "embedding"]:
-                continue
-            if isinstance(v, str):
-                content_parts.append(v)
-
-        # Join the strings with a newline
-        content_str = "\n".join(content_parts)
-
-        # We'll store the entire record as JSON in "metadata"
-        metadata_str = json.dumps(record, ensure_ascii=False)
-
-        # 6) Generate embedding for "content_str"
-        embedding = embed_text(content_str)
-
-        doc = {
-            "id": doc_id,
-            "content": content_str,
-            "embedding": embedding,
-            "metadata": metadata_str
-        }
-        docs.append(doc)
-
-    # 7) Upload them in batches
+    # 4) Infer the typed schema and convert records with the compiled per-file extractors
+    with span("schema", index=lob_index_name):
+        schema = infer_lob_schema(sources)
+        # Keyless records get the ids distributed and watch builds give them
+        docs = schema.to_docs(sources, folder_name)
+    print(f"Inferred {len(schema.fields)} typed fields from {len(json_files)} files.")
+
+    # 5) Create the index if not exists, with the typed fields
+    indexer = get_indexer(lob_index_name)
+    indexer.set_field_schema(schema.fields)
+    indexer.create_index()
+
+    # 6) Discover cross-record links; optionally fold linked records into each doc
+    with span("join", index=lob_index_name):
+        join_index = build_join_index(sources, folder_name, denormalized=denormalize)
+        if denormalize:
+            docs = denormalize_docs(docs, join_index)
+
+    # 7) Generate embeddings for each doc's "content" (batched)
+    vectors = embed_texts([doc["content"] for doc in docs])
+    for doc, embedding in zip(docs, vectors):
+        doc["embedding"] = embedding
+
+    # 8) Upload them in batches
     print(f"Uploading {len(docs)} total LOB docs to index '{lob_index_name}'...")
     indexer.index_documents(docs, batch_size=100)
     print("Done uploading LOB docs.")
+    build_lexical_index(docs, lob_index_name, **snapshot_fields(lob_index_name))
+
+
+def plan_lob(plan: BuildPlan, folders: list, denormalize: bool = False):
+    """Adds LOB folders to a dry-run plan, one row per JSON file (no embedding or upload)."""
+    for folder_name in folders:
+        index_name = os.getenv("LOB_INDEX_NAME", "lob-healthcare") if len(folders) == 1 else f"lob-{folder_name}"
+        sources = load_lob_sources(folder_name)
+        docs = infer_lob_schema(sources).to_docs(sources, folder_name)
+        if denormalize:
+            docs = denormalize_docs(docs, discover_joins(sources, folder_name))
+        for file_name in dict.fromkeys(name for name, _ in sources):
+            file_docs = [doc for doc, (name, _) in zip(docs, sources) if name == file_name]
+            plan.add(index_name, f"{folder_name}/{file_name}", file_docs, upload_batch_size=100)
+
 
 if __name__ == "__main__":
-    process_lob()
+    parser = argparse.ArgumentParser(description="Index a Line of Business (LOB) sample folder.")
+    parser.add_argument("--plan", action="store_true",
+                        help="convert records and count tokens/cost/time only; no embedding or upload")
+    parser.add_argument("--folders", default=None,
+                        help="with --plan: comma-separated lob_samples folders, or 'all' "
+                             "(default: LOB_INDEX_FOLDER_NAME)")
+    parser.add_argument("--denormalize", action="store_true", default=None,
+                        help="embed each record together with its linked records (also LOB_DENORMALIZE=1)")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DIR, default=None, metavar="DIR",
+                        help="write per-stage CPU and allocation profiles and a ranked report "
+                             "(default DIR: PROFILE_DIR or profiles)")
+    args = parser.parse_args()
+
+    with profiled("lob", args.profile):
+        if args.plan:
+            lob_root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lob_samples")
+            if args.folders == "all":
+                folders = sorted(d for d in os.listdir(lob_root) if os.path.isdir(os.path.join(lob_root, d)))
+            elif args.folders:
+                folders = [f.strip() for f in args.folders.split(",") if f.strip()]
+            else:
+                folders = [os.getenv("LOB_INDEX_FOLDER_NAME", "healthcare")]
+            plan = BuildPlan("LOB: " + ", ".join(folders) if len(folders) <= 3 else f"LOB: {len(folders)} folders")
+            plan_lob(plan, folders, denormalize=bool(args.denormalize))
+            plan.print_report()
+        else:
+            process_lob(denormalize=args.denormalize)
+            export_metrics()
@@ -0,0 +1,149 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/rebuild_index.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Blue/green index rebuilds with no query outage.
+#
+# For each logical index the corpus is loaded into a new physical version
+# ('api-docs-index-v8') created with the current schema and HNSW settings,
+# while queries keep hitting the live one. The new version is loaded with
+# build-optimized settings, then validated: the document count must match
+# and sampled documents must come back for their own embedding. Only then is
+# the pointer swapped (see utils/index_versions.py) and the logical index's
+# lexical snapshot is rebuilt from the same docs, so the retrieval server
+# hydrates and filters the new version's hits. Versions older than the
+# INDEX_KEEP_VERSIONS most recent previous ones are then dropped. A version
+# that fails validation is dropped and the live one is left as it was. A
+# --no-swap build is recorded as staged, so the next rebuild takes a new
+# version number and the staged one is dropped once a later version goes live.
+#
+#   python scripts/rebuild_index.py --corpora api-docs
+#   python scripts/rebuild_index.py --corpora lob --lob-folders healthcare
+#   python scripts/rebuild_index.py --rollback api-docs-index
+
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+from indexers import get_indexer
+from utils.index_versions import (
+    ValidationSampler, validate_index, next_version_name, record_swap, resolve_index,
+    expired_versions, forget_versions, record_staged, load_aliases, INDEX_KEEP_VERSIONS
+)
+from utils.lexical_index import build_lexical_index, snapshot_fields
+from utils.metrics import span, export_metrics
+from utils.spec_versions import SpecVersionState, record_spec_versions, spec_files
+from distributed_build import plan_units, build_unit_docs, _lob_folder, _lob_schema, PLATFORM_DIRS
+
+load_dotenv()
+
+
+def swap_to(logical: str, physical: str):
+    record_swap(logical, physical)
+    # Backends with native aliases follow the pointer file
+    get_indexer(physical).point_alias(logical)
+    print(f"'{logical}' now served by '{physical}'.")
+
+
+def collect_garbage(logical: str, keep: int = None):
+    expired = expired_versions(logical, keep)
+    for name in expired:
+        get_indexer(name, resolve_alias=False).drop_index()
+    if expired:
+        forget_versions(logical, expired)
+        spec_state = SpecVersionState()
+        if any(spec_state.indexes.pop(name, None) for name in expired):
+            spec_state.save()
+
+
+def rebuild(logical: str, units: list, keep: int = None, swap: bool = True) -> bool:
+    live = resolve_index(logical)
+    physical = next_version_name(logical)
+    print(f"Rebuilding '{logical}' (live: '{live}') into '{physical}' from {len(units)} units...")
+    start = time.time()
+
+    indexer = get_indexer(physical)
+    folder = _lob_folder(logical)
+    if folder:
+        indexer.set_field_schema(_lob_schema(folder).fields)
+    # A leftover from an interrupted rebuild would otherwise keep its stale docs
+    indexer.drop_index()
+    indexer.create_index()
+
+    ids = set()
+    sampler = ValidationSampler()
+    fields = snapshot_fields(logical)
+    kept_fields = {"id", *fields["text_fields"], *fields["stored_fields"]}
+    lexical_docs = []
+    indexer.begin_bulk_load()
+    try:
+        with span("bulk_load", index=physical):
+            for unit in units:
+                docs = build_unit_docs(unit)
+                indexer.index_documents(docs)
+                ids.update(doc["id"] for doc in docs)
+                sampler.add(docs)
+                lexical_docs.extend({k: v for k, v in doc.items() if k in kept_fields} for doc in docs)
+    finally:
+        indexer.end_bulk_load()
+
+    with span("validate", index=physical):
+        valid = validate_index(indexer, len(ids), sampler.samples)
+    if not valid:
+        print(f"Keeping '{live}' live; dropping '{physical}'.")
+        indexer.drop_index()
+        return False
+
+    print(f"Built and validated '{physical}' in {time.time() - start:.1f}s.")
+    if logical == os.getenv("API_DOCS_INDEX_NAME", "api-docs-index"):
+        # Spec syncs into the new version start from what was just loaded
+        record_spec_versions(physical, spec_files(PLATFORM_DIRS))
+    if swap:
+        swap_to(logical, physical)
+        build_lexical_index(lexical_docs, logical, **fields)
+        collect_garbage(logical, keep)
+    else:
+        record_staged(logical, physical)
+        print(f"'{physical}' staged; '{logical}' is still served by '{live}'.")
+    return True
+
+
+def rollback(logical: str):
+    entry = load_aliases().get(logical)
+    versions = entry["versions"] if entry else []
+    if not entry or versions.index(entry["current"]) == 0:
+        print(f"No previous version of '{logical}' to roll back to.")
+        return
+    swap_to(logical, versions[versions.index(entry["current"]) - 1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blue/green rebuild of one or more indexes.")
+    parser.add_argument("--corpora", default="summaries,api-docs,events,lob",
+                        help="comma-separated: summaries,api-docs,events,lob")
+    parser.add_argument("--lob-folders", default="", help="comma-separated lob_samples folders (default: all)")
+    parser.add_argument("--keep", type=int, default=INDEX_KEEP_VERSIONS,
+                        help="previous versions to keep for rollback")
+    parser.add_argument("--no-swap", action="store_true", help="build and validate only")
+    parser.add_argument("--rollback", metavar="INDEX", help="point INDEX back at its previous version")
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback(args.rollback)
+    else:
+        lob_folders = [f.strip() for f in args.lob_folders.split(",") if f.strip()] or None
+        units = plan_units([c.strip() for c in args.corpora.split(",") if c.strip()], lob_folders)
+        by_index = {}
+        for unit in units:
+            by_index.setdefault(unit["index_name"], []).append(unit)
+        failed = [name for name, index_units in by_index.items()
+                  if not rebuild(name, index_units, args.keep, swap=not args.no_swap)]
+        export_metrics()
+        if failed:
+            print(f"Validation failed for: {', '.join(failed)}")
+            sys.exit(1)
@@ -0,0 +1,297 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/retrieval_server.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Async (aiohttp) retrieval service over the built indexes, for many
+# concurrent agent sessions.
+#
+#   GET|POST /route              stage-1 platform routing (platform_router.npz);
+#                                when it abstains, domain-summary hits instead
+#   GET|POST /search/domain      domain-summaries-index
+#   GET|POST /search/api-docs    api-docs-index    (filters: platform, doc_type, api_version)
+#   GET|POST /search/events      events-index      (filters: event_type, event_name)
+#   GET|POST /search/lob/{name}  lob-{name}
+#   GET /health, GET /stats, GET /metrics (Prometheus text)
+#
+# Queries go as ?q=...&top=... or a JSON body { "query", "top", "filters" }.
+# Each search fuses BM25 hits from the local lexical snapshot
+# (lexical_indexes/*.bm25) with vector hits from the configured backend
+# (BaseIndexer.search_ids), hydrated from the snapshot's stored fields. The
+# snapshots follow the live version: process_*, watch_index.py and
+# rebuild_index.py rewrite them, and the server reloads a changed file.
+# Identifier-style queries answered by the snapshot skip the embedding call.
+# With --backend local only the snapshots (and the router) are used.
+#
+# Identical in-flight queries are coalesced, query embeddings are
+# micro-batched across requests (utils/query_batching.py), and each index has
+# one backend client shared by all requests. Blocking backend calls run on a
+# pool of RETRIEVAL_BACKEND_CONCURRENCY threads (SEARCH_HTTP_POOL_SIZE for
+# Azure, so every thread has a pooled keep-alive connection).
+#
+#   INDEX_QUIET=1 python scripts/retrieval_server.py --port 8088
+#   python scripts/load_test_retrieval.py --url http://127.0.0.1:8088 --concurrency 64
+
+import os
+import json
+import time
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from dotenv import load_dotenv
+from indexers import get_indexer
+from embedders import get_embedder
+from utils.embedding import embed_texts
+from utils.index_versions import resolve_index
+from utils.lexical_index import LexicalIndex, lexical_index_path, is_exact_lookup, reciprocal_rank_fusion
+from utils.metrics import metrics, inc, observe
+from utils.platform_router import get_platform_router
+from utils.query_batching import Coalescer, EmbeddingBatcher
+
+load_dotenv()
+
+RETRIEVAL_HOST = os.getenv("RETRIEVAL_HOST", "127.0.0.1")
+RETRIEVAL_PORT = int(os.getenv("RETRIEVAL_PORT", "8088"))
+RETRIEVAL_BACKEND_CONCURRENCY = int(
+    os.getenv("RETRIEVAL_BACKEND_CONCURRENCY") or os.getenv("SEARCH_HTTP_POOL_SIZE") or "16"
+)
+# How often index_aliases.json and the snapshot files are re-checked, so
+# blue/green swaps and rebuilt snapshots are picked up without a restart
+RETRIEVAL_REFRESH_SECONDS = float(os.getenv("RETRIEVAL_REFRESH_SECONDS", "5"))
+RETRIEVAL_MAX_TOP = int(os.getenv("RETRIEVAL_MAX_TOP", "50"))
+
+DOMAIN_INDEX = os.getenv("AZURE_SEARCH_DOMAIN_INDEX", "domain-summaries-index")
+API_DOCS_INDEX = os.getenv("API_DOCS_INDEX_NAME", "api-docs-index")
+EVENTS_INDEX = os.getenv("AZURE_SEARCH_EVENTS_INDEX", "events-index")
+
+# Filterable stored fields per endpoint
+FILTERS = {
+    "domain": (),
+    "api-docs": ("platform", "doc_type", "api_version"),
+    "events": ("event_type", "event_name"),
+    "lob": ("source_file",),
+}
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+class RetrievalService:
+    def __init__(self, backend: str = None):
+        self.backend = backend  # None: VECTOR_BACKEND; "local": snapshots only
+        self.executor = ThreadPoolExecutor(max_workers=RETRIEVAL_BACKEND_CONCURRENCY,
+                                           thread_name_prefix="retrieval")
+        self.batcher = EmbeddingBatcher(embed_texts, executor=self.executor)
+        self.coalescer = Coalescer()
+        self.router = get_platform_router()
+        self._lock = threading.Lock()
+        self._indexers = {}   # physical index -> indexer (one client per index)
+        self._physical = {}   # logical index -> (physical, checked at)
+        self._snapshots = {}  # logical index -> (LexicalIndex or None, mtime, checked at)
+        self.searches = 0
+
+        expected = self.router.meta.get("embedder") if self.router else None
+        if expected and expected != get_embedder().cache_key:
+            print(f"Platform router was built with embedder '{expected}'; routing disabled until it is rebuilt.")
+            self.router = None
+
+    def snapshot(self, index: str):
+        """The index's lexical snapshot (reloaded when the file changes), or None."""
+        now = time.monotonic()
+        entry = self._snapshots.get(index)
+        if entry and now - entry[2] < RETRIEVAL_REFRESH_SECONDS:
+            return entry[0]
+        path = lexical_index_path(index)
+        mtime = os.path.getmtime(path) if os.path.isfile(path) else None
+        if entry and entry[1] == mtime:
+            snapshot = entry[0]
+        else:
+            snapshot = LexicalIndex.load(path) if mtime else None
+        self._snapshots[index] = (snapshot, mtime, now)
+        return snapshot
+
+    def indexer(self, index: str):
+        """The shared backend client for the physical index serving a logical name."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._physical.get(index)
+            if entry is None or now - entry[1] >= RETRIEVAL_REFRESH_SECONDS:
+                entry = self._physical[index] = (resolve_index(index), now)
+            physical = entry[0]
+            indexer = self._indexers.get(physical)
+            if indexer is None:
+                indexer = self._indexers[physical] = get_indexer(physical, backend=self.backend, resolve_alias=False)
+            return indexer
+
+    def _search_ids(self, index: str, vector: list, text: str, top: int) -> list:
+        return self.indexer(index).search_ids(vector, text=text, top=top)
+
+    async def search(self, index: str, query: str, top: int = 10, filters: dict = None) -> list:
+        key = ("search", index, query, top, tuple(sorted((filters or {}).items())))
+        return await self.coalescer.run(key, lambda: self._search(index, query, top, filters or {}))
+
+    async def _search(self, index: str, query: str, top: int, filters: dict) -> list:
+        self.searches += 1
+        fetch = top * 4 if filters else top  # filtered on the stored fields, so over-fetch
+        snapshot = self.snapshot(index)
+        loop = asyncio.get_running_loop()
+        lexical_hits = []
+        if snapshot is not None:
+            # BM25 over a large snapshot takes milliseconds; keep it off the event loop
+            lexical_hits = _filtered(
+                await loop.run_in_executor(self.executor, snapshot.search, query, fetch), filters
+            )
+        if self.backend == "local" or (lexical_hits and is_exact_lookup(query)):
+            return lexical_hits[:top]
+
+        vector = await self.batcher.embed(query)
+        ids = await loop.run_in_executor(self.executor, self._search_ids, index, vector, query, fetch)
+        vector_hits = [(snapshot.get(doc_id) if snapshot else None) or {"id": doc_id} for doc_id in ids]
+        return reciprocal_rank_fusion(lexical_hits, _filtered(vector_hits, filters), top=top)
+
+    async def route(self, query: str, top: int = 10) -> dict:
+        return await self.coalescer.run(("route", query, top), lambda: self._route(query, top))
+
+    async def _route(self, query: str, top: int) -> dict:
+        routes = []
+        if self.router is not None:
+            routes = self.router.route(await self.batcher.embed(query))
+        result = {"platforms": [{"platform": platform, "score": score} for platform, score in routes]}
+        if not routes:
+            # Abstained (or no router built): fall back to the domain summaries
+            result["domain_summaries"] = await self.search(DOMAIN_INDEX, query, top)
+        return result
+
+    def stats(self) -> dict:
+        return dict(
+            self.batcher.stats(),
+            backend=self.backend or os.getenv("VECTOR_BACKEND", "azure"),
+            searches=self.searches,
+            coalesced=self.coalescer.joined,
+            backend_clients=len(self._indexers),
+            snapshots=sorted(name for name, entry in self._snapshots.items() if entry[0] is not None),
+        )
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _filtered(hits: list, filters: dict) -> list:
+    if not filters:
+        return hits
+    return [hit for hit in hits if all(str(hit.get(field)) == str(value) for field, value in filters.items())]
+
+
+async def _query_args(request: web.Request, endpoint: str) -> tuple:
+    body = {}
+    if request.method == "POST" and request.can_read_body:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise _bad_request("body must be JSON")
+        if not isinstance(body, dict):
+            raise _bad_request("body must be a JSON object")
+    query = str(body.get("query") or request.query.get("q") or "").strip()
+    if not query:
+        raise _bad_request("query is required (?q= or {\"query\": ...})")
+    try:
+        top = max(1, min(int(body.get("top") or request.query.get("top") or 10), RETRIEVAL_MAX_TOP))
+    except (TypeError, ValueError):
+        raise _bad_request("top must be an integer")
+    filters = body.get("filters") or {
+        field: request.query[field] for field in FILTERS[endpoint] if field in request.query
+    }
+    # Filters are compared as scalars (and are part of the coalescing key)
+    if not isinstance(filters, dict) or not all(
+            isinstance(value, (str, int, float, bool)) for value in filters.values()):
+        raise _bad_request("filters must be an object of string, number or boolean values")
+    unknown = set(filters) - set(FILTERS[endpoint])
+    if unknown:
+        raise _bad_request(f"unsupported filters: {', '.join(sorted(unknown))}")
+    return query, top, filters
+
+
+def _bad_request(message: str):
+    return web.HTTPBadRequest(text=json.dumps({"error": message}), content_type="application/json")
+
+
+def _timed(endpoint: str, handler):
+    async def wrapper(request: web.Request):
+        start = time.perf_counter()
+        status = 200
+        try:
+            return await handler(request)
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        except Exception:
+            status = 500
+            raise
+        finally:
+            inc("retrieval_requests_total", endpoint=endpoint, status=status)
+            observe("retrieval_request_seconds", time.perf_counter() - start, buckets=LATENCY_BUCKETS,
+                    endpoint=endpoint)
+    return wrapper
+
+
+def create_app(service: RetrievalService) -> web.Application:
+    async def route(request):
+        query, top, _ = await _query_args(request, "domain")
+        return web.json_response(dict(await service.route(query, top), query=query))
+
+    def search_handler(endpoint: str, index: str = None):
+        async def handler(request):
+            query, top, filters = await _query_args(request, endpoint)
+            name = index or f"lob-{request.match_info['name']}"
+            results = await service.search(name, query, top, filters)
+            return web.json_response({"query": query, "index": name, "results": results})
+        return handler
+
+    async def health(request):
+        return web.json_response({"status": "ok"})
+
+    async def stats(request):
+        return web.json_response(service.stats())
+
+    async def prometheus(request):
+        return web.Response(text=metrics.to_prometheus(), content_type="text/plain")
+
+    async def on_cleanup(app):
+        service.close()
+
+    app = web.Application()
+    handlers = [
+        ("/route", _timed("route", route)),
+        ("/search/domain", _timed("domain", search_handler("domain", DOMAIN_INDEX))),
+        ("/search/api-docs", _timed("api-docs", search_handler("api-docs", API_DOCS_INDEX))),
+        ("/search/events", _timed("events", search_handler("events", EVENTS_INDEX))),
+        ("/search/lob/{name}", _timed("lob", search_handler("lob"))),
+    ]
+    for path, handler in handlers:
+        app.router.add_get(path, handler)
+        app.router.add_post(path, handler)
+    app.router.add_get("/health", health)
+    app.router.add_get("/stats", stats)
+    app.router.add_get("/metrics", prometheus)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Async retrieval service over the built indexes.")
+    parser.add_argument("--host", default=RETRIEVAL_HOST)
+    parser.add_argument("--port", type=int, default=RETRIEVAL_PORT)
+    parser.add_argument("--backend", default=None,
+                        help="vector backend (default VECTOR_BACKEND), or 'local' for the lexical snapshots only")
+    args = parser.parse_args()
+
+    service = RetrievalService(args.backend)
+    for name in (DOMAIN_INDEX, API_DOCS_INDEX, EVENTS_INDEX):
+        service.snapshot(name)  # load the snapshots before the first request
+    print(f"Retrieval service ({service.stats()['backend']}) on http://{args.host}:{args.port}; "
+          f"snapshots: {', '.join(service.stats()['snapshots']) or 'none'}; "
+          f"router: {'loaded' if service.router else 'not built'}")
+    web.run_app(create_app(service), host=args.host, port=args.port, print=None)
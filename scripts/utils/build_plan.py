@@ -0,0 +1,174 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/build_plan.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Dry-run build planner used by the `--plan` option of the process_* scripts.
+# It works from the docs a real run would build (chunked, not embedded), makes no
+# network calls, and reports per platform/LOB:
+#   chunks, tokens to embed, tokens already in the embedding cache,
+#   upload bytes and upload batches, and a projected wall-clock time.
+#
+# Projection inputs (environment):
+#   EMBEDDING_TPM / EMBEDDING_RPM       quota (tokens / requests per minute)
+#   AZURE_OPENAI_EMBEDDING_BATCH        texts per embedding request (default 16)
+#   EMBEDDING_CONCURRENCY               concurrent embedding requests (default 1)
+#   EMBEDDING_LATENCY_S                 seconds per embedding request (default 0.3)
+#   UPLOAD_LATENCY_S                    seconds per upload batch (default 1.0)
+#   UPLOAD_MBPS                         upload bandwidth in MB/s (default 10)
+
+import os
+import json
+import math
+
+from utils.embedding_cache import get_embedding_cache, text_key
+
+# Average length of one serialized float in an upload payload, e.g. "-0.01234567,"
+FLOAT_JSON_BYTES = 20
+
+_encoder = None
+
+
+def count_tokens(text: str) -> int:
+    """cl100k_base token count when tiktoken is installed, else a ~4 chars/token estimate."""
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            _encoder = False
+    if _encoder:
+        return len(_encoder.encode(text, disallowed_special=()))
+    return max(1, math.ceil(len(text) / 4))
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+class BuildPlan:
+    def __init__(self, title: str, dimension: int = None, embedder_key: str = None):
+        """
+        dimension / embedder_key default to the configured embedder; pass them to
+        plan without instantiating it.
+        """
+        if dimension is None or embedder_key is None:
+            from embedders import get_embedder
+            embedder = get_embedder()
+            dimension = dimension or embedder.dimension
+            embedder_key = embedder_key or embedder.cache_key
+        self.title = title
+        self.dimension = dimension
+        self.embedder_key = embedder_key
+        self.rows = []
+        self.cache = get_embedding_cache()
+
+    def add(self, index_name: str, group: str, docs: list, upload_batch_size: int = 500,
+            text_field: str = "content", cache=None):
+        """
+        Adds one row (e.g. one platform or LOB file) from unembedded docs.
+        cache overrides the embedding cache the docs' chunks are looked up in.
+        """
+        texts = [doc.get(text_field) or "" for doc in docs]
+        tokens = [count_tokens(text) for text in texts]
+        cached_tokens = cached = 0
+        cache = cache or self.cache
+        if cache is not None and texts:
+            keys = [text_key(self.embedder_key, text) for text in texts]
+            hits = set(cache.get_many(keys))
+            cached = sum(1 for key in keys if key in hits)
+            cached_tokens = sum(n for key, n in zip(keys, tokens) if key in hits)
+
+        vector_bytes = self.dimension * FLOAT_JSON_BYTES
+        upload_bytes = sum(
+            len(json.dumps({k: v for k, v in doc.items() if k != "embedding"}, ensure_ascii=False).encode("utf-8"))
+            + vector_bytes
+            for doc in docs
+        )
+        self.rows.append({
+            "index": index_name,
+            "group": group,
+            "chunks": len(docs),
+            "tokens": sum(tokens),
+            "cached_chunks": cached,
+            "cached_tokens": cached_tokens,
+            "upload_bytes": upload_bytes,
+            "upload_batches": math.ceil(len(docs) / upload_batch_size) if docs else 0,
+            "upload_batch_size": upload_batch_size,
+        })
+
+    def totals(self) -> dict:
+        keys = ("chunks", "tokens", "cached_chunks", "cached_tokens", "upload_bytes")
+        totals = {key: sum(row[key] for row in self.rows) for key in keys}
+        # Uploads batch per index, not per row
+        per_index = {}
+        for row in self.rows:
+            chunks, batch_size = per_index.get(row["index"], (0, row["upload_batch_size"]))
+            per_index[row["index"]] = (chunks + row["chunks"], batch_size)
+        totals["upload_batches"] = sum(math.ceil(chunks / size) for chunks, size in per_index.values())
+        return totals
+
+    def projection(self) -> dict:
+        """Projected seconds for embedding and upload under the configured quota."""
+        totals = self.totals()
+        chunks_to_embed = totals["chunks"] - totals["cached_chunks"]
+        tokens_to_embed = totals["tokens"] - totals["cached_tokens"]
+        batch = int(os.getenv("AZURE_OPENAI_EMBEDDING_BATCH", "16"))
+        requests = math.ceil(chunks_to_embed / batch) if chunks_to_embed else 0
+
+        tpm = _env_float("EMBEDDING_TPM", 0)
+        rpm = _env_float("EMBEDDING_RPM", 0)
+        concurrency = max(1, int(os.getenv("EMBEDDING_CONCURRENCY", "1")))
+        latency = _env_float("EMBEDDING_LATENCY_S", 0.3)
+
+        bounds = {"latency": requests * latency / concurrency}
+        if tpm:
+            bounds["tpm"] = tokens_to_embed / tpm * 60
+        if rpm:
+            bounds["rpm"] = requests / rpm * 60
+        limiter = max(bounds, key=bounds.get)
+
+        upload_s = (totals["upload_batches"] * _env_float("UPLOAD_LATENCY_S", 1.0)
+                    + totals["upload_bytes"] / (_env_float("UPLOAD_MBPS", 10) * 1e6))
+        return {
+            "embed_requests": requests,
+            "tokens_to_embed": tokens_to_embed,
+            "embed_seconds": bounds[limiter],
+            "embed_bound_by": limiter,
+            "upload_seconds": upload_s,
+            "total_seconds": bounds[limiter] + upload_s,
+        }
+
+    def print_report(self):
+        print(f"\n=== Build plan: {self.title} (no network calls made) ===")
+        header = f"{'index':<26}{'group':<40}{'chunks':>8}{'tokens':>11}{'cached':>9}{'upload MB':>11}{'batches':>9}"
+        print(header)
+        print("-" * len(header))
+        for row in self.rows:
+            print(
+                f"{row['index']:<26}{row['group'][:39]:<40}{row['chunks']:>8}{row['tokens']:>11}"
+                f"{row['cached_chunks']:>9}{row['upload_bytes'] / 1e6:>11.2f}{row['upload_batches']:>9}"
+            )
+        totals = self.totals()
+        print("-" * len(header))
+        print(
+            f"{'TOTAL':<66}{totals['chunks']:>8}{totals['tokens']:>11}"
+            f"{totals['cached_chunks']:>9}{totals['upload_bytes'] / 1e6:>11.2f}{totals['upload_batches']:>9}"
+        )
+
+        projection = self.projection()
+        print(
+            f"\nTo embed: {totals['chunks'] - totals['cached_chunks']} chunks, "
+            f"{projection['tokens_to_embed']} tokens in {projection['embed_requests']} requests "
+            f"(embedding dimension {self.dimension})."
+        )
+        print(
+            f"Projected wall clock: embed {projection['embed_seconds']:.0f}s "
+            f"(bound by {projection['embed_bound_by']}), upload {projection['upload_seconds']:.0f}s, "
+            f"total ~{projection['total_seconds'] / 60:.1f} min."
+        )
@@ -0,0 +1,333 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/build_scheduler.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Shared resource budgets and a job graph for scripts/build_all.py, which
+# builds every index in one process with the corpora running concurrently.
+#
+#   EmbeddingQuota   one embedding budget for every job: EMBEDDING_TPM and
+#                    EMBEDDING_RPM (per minute; 0 = unlimited) and
+#                    EMBEDDING_CONCURRENCY requests in flight (default 4). The
+#                    --plan projection (utils/build_plan.py) reads the same
+#                    variables. embed_texts() splits its texts into requests of
+#                    AZURE_OPENAI_EMBEDDING_BATCH and runs them concurrently.
+#   UploadLimiter    UPLOAD_CONCURRENCY upload batches in flight (default 4).
+#
+# Both admit waiting requests by job priority (lower first, then arrival), so
+# a stage-1 job is never queued behind a bulk corpus. The hooks below are
+# no-ops until install_budgets() is called: the process_* scripts run as
+# before.
+#
+#   JobGraph         jobs with dependencies and priorities on a thread pool.
+#                    A job starts once its dependencies succeed; the
+#                    dependents of a failed job are skipped.
+
+import os
+import time
+import heapq
+import itertools
+import threading
+import traceback
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils.build_plan import count_tokens
+
+EMBEDDING_TPM = int(os.getenv("EMBEDDING_TPM", "0") or 0)
+EMBEDDING_RPM = int(os.getenv("EMBEDDING_RPM", "0") or 0)
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+EMBEDDING_REQUEST_SIZE = int(os.getenv("AZURE_OPENAI_EMBEDDING_BATCH", "16"))
+
+_embedding_quota = None
+_upload_limiter = None
+_local = threading.local()
+_stats_lock = threading.Lock()
+
+
+class _PriorityGate:
+    """Admits up to `limit` holders at once; waiters go in (priority, arrival) order."""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, int(limit))
+        self.in_use = 0
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiting)
+
+    def _delay(self, cost: float) -> float:
+        """Seconds until the head of the queue may go (0 = now)."""
+        return 0.0
+
+    def _take(self, cost: float):
+        pass
+
+    def acquire(self, priority: int = 0, cost: float = 0) -> float:
+        """Blocks until admitted; returns the seconds spent waiting."""
+        start = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                if self._waiting[0] == ticket and self.in_use < self.limit:
+                    delay = self._delay(cost)
+                    if delay <= 0:
+                        heapq.heappop(self._waiting)
+                        self._take(cost)
+                        self.in_use += 1
+                        self._cond.notify_all()
+                        return time.monotonic() - start
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+
+    def release(self):
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify_all()
+
+
+class _Bucket:
+    """Refills at per_minute / 60 per second; holds at most 10 seconds' worth."""
+
+    def __init__(self, per_minute: int):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, per_minute / 6.0)
+        self.level = self.capacity
+        self.stamp = time.monotonic()
+
+    def delay(self, amount: float) -> float:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+        short = min(amount, self.capacity) - self.level
+        return short / self.rate if short > 0 else 0.0
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+
+class EmbeddingQuota(_PriorityGate):
+    def __init__(self, tpm: int = EMBEDDING_TPM, rpm: int = EMBEDDING_RPM,
+                 concurrency: int = EMBEDDING_CONCURRENCY, request_size: int = EMBEDDING_REQUEST_SIZE):
+        super().__init__(concurrency)
+        self.tpm, self.rpm = tpm, rpm
+        self.request_size = max(1, request_size)
+        self._tokens = _Bucket(tpm) if tpm > 0 else None
+        self._requests = _Bucket(rpm) if rpm > 0 else None
+
+    def counts_tokens(self) -> bool:
+        return self._tokens is not None
+
+    def _delay(self, cost: float) -> float:
+        return max(self._tokens.delay(cost) if self._tokens else 0.0,
+                   self._requests.delay(1) if self._requests else 0.0)
+
+    def _take(self, cost: float):
+        if self._tokens:
+            self._tokens.take(cost)
+        if self._requests:
+            self._requests.take(1)
+
+    def describe(self) -> str:
+        tpm = f"{self.tpm:,} TPM" if self.tpm else "no TPM limit"
+        rpm = f"{self.rpm:,} RPM" if self.rpm else "no RPM limit"
+        return f"{tpm}, {rpm}, {self.limit} requests in flight, {self.request_size} texts per request"
+
+
+class UploadLimiter(_PriorityGate):
+    def describe(self) -> str:
+        return f"{self.limit} upload batches in flight"
+
+
+def install_budgets(embedding_quota: EmbeddingQuota = None, upload_limiter: UploadLimiter = None):
+    """Routes every embedding request and upload batch in the process through these budgets."""
+    global _embedding_quota, _upload_limiter
+    _embedding_quota, _upload_limiter = embedding_quota, upload_limiter
+
+
+def current_job():
+    """The Job running on this thread (JobGraph), or None."""
+    return getattr(_local, "job", None)
+
+
+def _record(job, **amounts):
+    with _stats_lock:
+        for name, amount in amounts.items():
+            setattr(job, name, getattr(job, name) + amount)
+
+
+@contextmanager
+def embedding_slot(texts: list, job=None):
+    """Holds one embedding request's share of the quota (no-op without one)."""
+    quota = _embedding_quota
+    if quota is None:
+        yield
+        return
+    job = job or current_job()
+    tokens = sum(count_tokens(text) for text in texts) if quota.counts_tokens() else 0
+    waited = quota.acquire(job.priority if job else 0, tokens)
+    try:
+        yield
+    finally:
+        quota.release()
+    if job is not None:
+        _record(job, embed_requests=1, embedded=len(texts), tokens=tokens, embed_wait=waited)
+
+
+def embed_with_quota(texts: list, embed) -> list:
+    """
+    embed(texts) -> vectors, under the installed quota: texts are split into
+    requests that run concurrently, each holding a slot. Without a quota this
+    is a single embed() call.
+    """
+    quota = _embedding_quota
+    if quota is None:
+        return embed(list(texts))
+    job = current_job()
+    size = quota.request_size
+    batches = [list(texts[start:start + size]) for start in range(0, len(texts), size)]
+
+    def request(batch):
+        with embedding_slot(batch, job):
+            return embed(batch)
+
+    if len(batches) == 1:
+        return request(batches[0])
+    # Up to `limit` requests of this call queue at the gate, where priority decides
+    with ThreadPoolExecutor(max_workers=min(quota.limit, len(batches))) as pool:
+        return [vector for vectors in pool.map(request, batches) for vector in vectors]
+
+
+@contextmanager
+def upload_slot(docs: int):
+    """Holds one upload batch's slot (no-op without an upload limiter)."""
+    limiter = _upload_limiter
+    if limiter is None:
+        yield
+        return
+    job = current_job()
+    waited = limiter.acquire(job.priority if job else 0)
+    try:
+        yield
+    finally:
+        limiter.release()
+    if job is not None:
+        _record(job, upload_batches=1, uploaded=docs, upload_wait=waited)
+
+
+class Job:
+    def __init__(self, name: str, run, priority: int = 0, after: tuple = ()):
+        """run(results) gets {dependency name: its return value}."""
+        self.name = name
+        self.run = run
+        self.priority = priority
+        self.after = tuple(after)
+        self.state = "pending"  # pending, running, done, failed, skipped
+        self.result = None
+        self.error = None
+        self.started = self.finished = None
+        self.embed_requests = self.embedded = self.tokens = 0
+        self.upload_batches = self.uploaded = 0
+        self.embed_wait = self.upload_wait = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+
+class JobGraph:
+    def __init__(self):
+        self.jobs = {}
+        self.started = self.finished = None
+
+    def add(self, name: str, run, priority: int = 0, after: tuple = ()) -> Job:
+        if name in self.jobs:
+            raise ValueError(f"Duplicate job: {name}")
+        self.jobs[name] = Job(name, run, priority, after)
+        return self.jobs[name]
+
+    def _check(self):
+        for job in self.jobs.values():
+            missing = [dep for dep in job.after if dep not in self.jobs]
+            if missing:
+                raise ValueError(f"Job {job.name} depends on unknown jobs: {', '.join(missing)}")
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through job {name}")
+            visiting.add(name)
+            for dep in self.jobs[name].after:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.jobs:
+            visit(name)
+
+    def _execute(self, job: Job):
+        _local.job = job
+        job.started = time.monotonic()
+        try:
+            job.result = job.run({dep: self.jobs[dep].result for dep in job.after})
+            job.state = "done"
+        except Exception as e:
+            job.error = e
+            job.state = "failed"
+            print(f"Job {job.name} failed: {e}")
+            traceback.print_exc()
+        finally:
+            job.finished = time.monotonic()
+            _local.job = None
+
+    def run(self, workers: int = None, report_every: float = None, report=None) -> bool:
+        """
+        Runs every job; ready jobs start in priority order. report(graph) is
+        called every report_every seconds while jobs run. True if all succeeded.
+        """
+        self._check()
+        order = {name: i for i, name in enumerate(self.jobs)}
+        self.started = time.monotonic()
+        running = {}
+        last_report = self.started
+        with ThreadPoolExecutor(max_workers=workers or len(self.jobs) or 1,
+                                thread_name_prefix="build") as executor:
+            while True:
+                for job in self.jobs.values():
+                    if job.state == "pending" and any(
+                            self.jobs[dep].state in ("failed", "skipped") for dep in job.after):
+                        job.state = "skipped"
+                ready = sorted(
+                    (job for job in self.jobs.values()
+                     if job.state == "pending" and all(self.jobs[dep].state == "done" for dep in job.after)),
+                    key=lambda job: (job.priority, order[job.name])
+                )
+                for job in ready:
+                    job.state = "running"
+                    running[executor.submit(self._execute, job)] = job
+                if not running:
+                    break
+                timeout = None
+                if report is not None and report_every:
+                    timeout = max(0.0, last_report + report_every - time.monotonic())
+                finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    running.pop(future)
+                if timeout is not None and time.monotonic() - last_report >= report_every:
+                    report(self)
+                    last_report = time.monotonic()
+        self.finished = time.monotonic()
+        return all(job.state == "done" for job in self.jobs.values())
@@ -0,0 +1,37 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/doc_ids.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Deterministic document ids, shared by every builder (process_docs.py,
+# distributed_build.py, watch_index.py, rebuild_index.py), so re-indexing a
+# file overwrites its documents instead of adding copies next to them.
+
+import uuid
+
+# Namespace for deterministic document ids (uuid5)
+DOC_ID_NAMESPACE = uuid.UUID("5b0f8d0e-3c1e-4f4e-9a57-1c2d0e6b7a10")
+
+
+def deterministic_id(*parts) -> str:
+    return str(uuid.uuid5(DOC_ID_NAMESPACE, "|".join(str(p) for p in parts)))
+
+
+def api_doc_chunk_docs(task: dict, chunks: list) -> list:
+    """Upload-ready (unembedded) docs for the chunks of one markdown task."""
+    seen = {}
+    docs = []
+    for chunk in chunks:
+        # Content-addressed, so an edit only changes the ids of the chunks it touched
+        seen[chunk] = seen.get(chunk, -1) + 1
+        docs.append({
+            # None stands where specs had a path range, so markdown ids stay as they were
+            "id": deterministic_id(task["file_path"], None, chunk, seen[chunk]),
+            "content": chunk,
+            "platform": task["platform"],
+            "doc_type": task["doc_type"],
+        })
+    return docs
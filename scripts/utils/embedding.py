@@ -7,48 +7,80 @@
 ################################################################################
 
 import os
-import openai
+import threading
 from dotenv import load_dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential
+
+from embedders import get_embedder
+from utils.embedding_cache import get_embedding_cache, text_key
+from utils.metrics import inc, progress
+from utils.build_scheduler import embed_with_quota
 
 # A simple module-level counter
 _embedding_count = 0
+_count_lock = threading.Lock()
 
 load_dotenv()
 
-@retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=10))
-def embed_text(text: str) -> list:
+
+def get_embedding_dimension() -> int:
+    """Vector length of the configured embedder (EMBEDDING_BACKEND)."""
+    return get_embedder().dimension
+
+
+def embed_texts(texts: list, cache=None) -> list:
     """
-    Generates an embedding vector for the provided text using Azure OpenAI.
-    Retries on failure with exponential backoff.
+    Generates embedding vectors for a list of texts with the configured
+    embedder (EMBEDDING_BACKEND: azure_openai [default], onnx, hash).
+    Batching and retries are handled by the embedder. When EMBEDDING_CACHE_PATH
+    is set (or a cache is passed), cached vectors are reused and only the
+    misses are embedded. Repeated texts are embedded once.
     Tracks how many embeddings we've generated so far.
     """
     global _embedding_count
-    _embedding_count += 1
+    if not texts:
+        return []
 
-    print(f"Generating embedding #{_embedding_count}...")
+    cache = cache or get_embedding_cache()
+    if cache is not None:
+        embedder_key = get_embedder().cache_key
+        keys = [text_key(embedder_key, text) for text in texts]
+        cached = cache.get_many(keys)
+        inc("embedding_cache_hits_total", len(cached))
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        if missing:
+            fresh = _embed_uncached(list(missing.values()))
+            new_items = dict(zip(missing, fresh))
+            cache.put_many(new_items)
+            cached.update(new_items)
+        return [cached[key] for key in keys]
 
-    azure_openai_key = os.getenv("AZURE_OPENAI_EMBEDDING_KEY")
-    azure_openai_endpoint = os.getenv("AZURE_OPENAI_EMBEDDING_ENDPOINT")
-    azure_openai_api_version = os.getenv("AZURE_OPENAI_API_VERSION")
-    azure_openai_deployment = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
+    unique = list(dict.fromkeys(texts))
+    if len(unique) == len(texts):
+        return _embed_uncached(texts)
+    vectors = dict(zip(unique, _embed_uncached(unique)))
+    return [vectors[text] for text in texts]
 
-    if not all([azure_openai_key, azure_openai_endpoint, azure_openai_api_version, azure_openai_deployment]):
-        raise ValueError("Missing Azure OpenAI env vars")
 
-    openai.api_key = azure_openai_key
-    openai.api_base = azure_openai_endpoint
-    openai.api_type = "azure"
-    openai.api_version = azure_openai_api_version
+def _embed_uncached(texts: list) -> list:
+    global _embedding_count
+    with _count_lock:
+        first = _embedding_count + 1
+        _embedding_count += len(texts)
+    progress(f"Generating embeddings #{first}-#{first + len(texts) - 1}...")
 
     try:
-        resp = openai.Embedding.create(
-            input=text,
-            engine=azure_openai_deployment
-        )
-        embedding = resp["data"][0]["embedding"]
-        print(f"Generated embedding #{_embedding_count} of length {len(embedding)}")
-        return embedding
+        # Under a shared quota (scripts/build_all.py) the requests run concurrently
+        vectors = embed_with_quota(texts, get_embedder().embed)
     except Exception as e:
+        inc("embed_errors_total")
         print(f"Embedding error: {e}")
         raise
+
+    inc("embeddings_total", len(vectors))
+    progress(f"Generated {len(vectors)} embeddings of length {len(vectors[0]) if vectors else 0}")
+    return vectors
+
+
+def embed_text(text: str) -> list:
+    """Generates an embedding vector for a single text (see embed_texts)."""
+    return embed_texts([text])[0]
@@ -0,0 +1,83 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/embedding_cache.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# On-disk embedding cache (SQLite), keyed by embedder + text hash, so reruns
+# only pay for chunks whose text actually changed. Enabled by setting
+# EMBEDDING_CACHE_PATH (e.g. embedding_cache.db).
+
+import os
+import sqlite3
+import hashlib
+import threading
+from array import array
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")
+
+# SQLite limits the number of host parameters per statement
+_LOOKUP_CHUNK = 500
+
+
+def text_key(embedder_key: str, text: str) -> str:
+    return hashlib.sha256(f"{embedder_key}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        conn.commit()
+
+    def _conn(self):
+        # One connection per thread; sqlite connections are not shareable
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+        return conn
+
+    def get_many(self, keys: list) -> dict:
+        """{ key: vector } for the keys that are cached."""
+        found = {}
+        conn = self._conn()
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            part = keys[i : i + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(part))
+            for key, blob in conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", part):
+                found[key] = array("f", blob).tolist()
+        return found
+
+    def count_cached(self, keys: list) -> int:
+        count = 0
+        conn = self._conn()
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            part = keys[i : i + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(part))
+            (n,) = conn.execute(f"SELECT COUNT(*) FROM embeddings WHERE key IN ({marks})", part).fetchone()
+            count += n
+        return count
+
+    def put_many(self, items: dict):
+        conn = self._conn()
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+            [(key, array("f", vector).tobytes()) for key, vector in items.items()]
+        )
+        conn.commit()
+
+
+_cache = None
+
+
+def get_embedding_cache():
+    """The process-wide cache, or None when EMBEDDING_CACHE_PATH is not set."""
+    global _cache
+    if _cache is None and EMBEDDING_CACHE_PATH:
+        _cache = EmbeddingCache(EMBEDDING_CACHE_PATH)
+    return _cache
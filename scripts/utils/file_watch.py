@@ -0,0 +1,206 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/file_watch.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# File change notification for watch mode.
+#
+# On Linux the kernel's inotify API is used directly through ctypes (no extra
+# dependency): the watcher blocks in select() and costs no CPU while idle.
+# Elsewhere, or with WATCH_BACKEND=poll, directory trees are re-scanned every
+# WATCH_POLL_SECONDS comparing mtime and size.
+#
+# watch_batches() debounces bursts (an editor save, a git checkout) into one
+# batch of paths once the tree has been quiet for WATCH_DEBOUNCE_SECONDS.
+
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+WATCH_BACKEND = os.getenv("WATCH_BACKEND", "auto").lower()  # auto / inotify / poll
+WATCH_POLL_SECONDS = float(os.getenv("WATCH_POLL_SECONDS", "2"))
+WATCH_DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", "0.5"))
+# A continuous stream of changes is still flushed at least this often
+WATCH_MAX_DELAY_SECONDS = float(os.getenv("WATCH_MAX_DELAY_SECONDS", "5"))
+
+# Returned in a batch when events were lost and the caller should rescan everything
+RESCAN = "<rescan>"
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE
+               | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF)
+_EVENT = struct.Struct("iIII")
+
+
+def _ignored(name: str) -> bool:
+    # Editor swap/backup files and hidden temp files
+    return name.startswith(".") or name.endswith(("~", ".swp", ".swx", ".tmp"))
+
+
+class InotifyWatcher:
+    def __init__(self, roots: list):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        for root in roots:
+            self._add_tree(root)
+
+    def _add_dir(self, path: str):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+            return
+        self.dirs[wd] = path
+
+    def _add_tree(self, root: str) -> set:
+        """Watches root and its subdirectories; returns the files already in them."""
+        files = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            self._add_dir(dirpath)
+            files.update(os.path.join(dirpath, name) for name in filenames if not _ignored(name))
+        return files
+
+    def wait(self, timeout: float = None) -> set:
+        """Blocks up to timeout (None = forever) and returns the paths that changed."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size : offset + _EVENT.size + length].rstrip(b"\0").decode(
+                    "utf-8", "surrogateescape"
+                )
+                offset += _EVENT.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    changed.add(RESCAN)
+                    continue
+                if mask & _IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    continue
+                directory = self.dirs.get(wd)
+                if directory is None or not name or _ignored(name):
+                    continue
+                path = os.path.join(directory, name)
+                if mask & _IN_ISDIR:
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        # A new directory: watch it and treat its files as changed
+                        changed.update(self._add_tree(path))
+                    elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                        changed.add(RESCAN)
+                else:
+                    changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    def __init__(self, roots: list, interval: float = None):
+        self.roots = roots
+        self.interval = interval or WATCH_POLL_SECONDS
+        self.snapshot = self._scan()
+        self._next_scan = time.monotonic() + self.interval
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        for root in self.roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                for name in filenames:
+                    if _ignored(name):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: float = None) -> set:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            sleep_for = self._next_scan - now
+            if deadline is not None:
+                sleep_for = min(sleep_for, deadline - now)
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+            if time.monotonic() >= self._next_scan:
+                self._next_scan = time.monotonic() + self.interval
+                snapshot = self._scan()
+                changed = {p for p, sig in snapshot.items() if self.snapshot.get(p) != sig}
+                changed |= set(self.snapshot) - set(snapshot)
+                self.snapshot = snapshot
+                if changed:
+                    return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def close(self):
+        pass
+
+
+def get_watcher(roots: list, backend: str = None):
+    """An inotify watcher where available (unless backend='poll'), else a polling one."""
+    backend = (backend or WATCH_BACKEND).lower()
+    roots = [root for root in roots if os.path.isdir(root)]
+    if backend in ("auto", "inotify"):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError, TypeError) as e:
+            if backend == "inotify":
+                raise
+            print(f"inotify unavailable ({e}); polling every {WATCH_POLL_SECONDS}s instead.")
+    return PollingWatcher(roots)
+
+
+def watch_batches(watcher, debounce: float = None, max_delay: float = None):
+    """Yields (paths, first_event_time) once changes have been quiet for `debounce` seconds."""
+    debounce = WATCH_DEBOUNCE_SECONDS if debounce is None else debounce
+    max_delay = WATCH_MAX_DELAY_SECONDS if max_delay is None else max_delay
+    while True:
+        batch = watcher.wait(None)
+        if not batch:
+            continue
+        first = time.time()
+        started = time.monotonic()
+        while time.monotonic() - started < max_delay:
+            more = watcher.wait(debounce)
+            if not more:
+                break
+            batch |= more
+        yield batch, first
@@ -0,0 +1,54 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/hnsw_params.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Per-index HNSW parameters. The values measured by scripts/eval_retrieval.py are
+# written to HNSW_PARAMS_FILE (default hnsw_params.json) and picked up by the
+# index schemas; indexes without an entry keep the historical defaults.
+#
+# File layout:
+#   { "lob-healthcare": { "m": 8, "ef_construction": 200, "ef_search": 100,
+#                         "measured": { "recall@10": 0.99, "p99_ms": 0.4, ... } } }
+
+import os
+import json
+
+HNSW_PARAMS_FILE = os.getenv("HNSW_PARAMS_FILE", "hnsw_params.json")
+
+DEFAULT_HNSW = {"m": 4, "ef_construction": 400, "ef_search": 500}
+
+# Ranges accepted by Azure AI Search for HnswParameters
+AZURE_HNSW_LIMITS = {"m": (4, 10), "ef_construction": (100, 1000), "ef_search": (100, 1000)}
+
+
+def within_azure_limits(params: dict) -> bool:
+    return all(lo <= params[name] <= hi for name, (lo, hi) in AZURE_HNSW_LIMITS.items())
+
+
+def _load(path: str) -> dict:
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def hnsw_parameters(index_name: str, path: str = None) -> dict:
+    """{ m, ef_construction, ef_search } for an index (tuned values or defaults)."""
+    tuned = _load(path or HNSW_PARAMS_FILE).get(index_name, {})
+    return {name: int(tuned.get(name, default)) for name, default in DEFAULT_HNSW.items()}
+
+
+def save_hnsw_parameters(index_name: str, params: dict, measured: dict = None, path: str = None):
+    """Records tuned parameters (and the measurements behind them) for one index."""
+    path = path or HNSW_PARAMS_FILE
+    data = _load(path)
+    entry = {name: int(params[name]) for name in DEFAULT_HNSW}
+    if measured:
+        entry["measured"] = measured
+    data[index_name] = entry
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
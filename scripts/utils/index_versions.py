@@ -0,0 +1,186 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/index_versions.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Versioned physical indexes behind stable logical names, for blue/green
+# rebuilds (scripts/rebuild_index.py).
+#
+# A logical index ('api-docs-index') is served by a physical one
+# ('api-docs-index-v7'). The pointer lives in INDEX_ALIASES_PATH (default
+# index_aliases.json) and get_indexer() resolves it, so every script reads and
+# writes the live version; backends with native aliases (Elasticsearch, Azure
+# preview API versions) are re-pointed as well for outside query clients.
+# An index built before versioning is the logical name itself ("v0").
+# Versions built without a swap (rebuild_index.py --no-swap) are kept under
+# "staged": they take a version number and are dropped once a later version
+# goes live.
+#
+# File layout:
+#   { "api-docs-index": { "current": "api-docs-index-v7",
+#                         "versions": ["api-docs-index-v6", "api-docs-index-v7"],
+#                         "staged": ["api-docs-index-v8"],
+#                         "swapped_at": "2025-06-01T12:00:00+00:00" } }
+
+import os
+import re
+import json
+import time
+import random
+from datetime import datetime, timezone
+
+INDEX_ALIASES_PATH = os.getenv("INDEX_ALIASES_PATH", "index_aliases.json")
+# Previous versions kept (for --rollback) after a swap; older ones are dropped
+INDEX_KEEP_VERSIONS = int(os.getenv("INDEX_KEEP_VERSIONS", "1"))
+INDEX_VALIDATE_SAMPLES = int(os.getenv("INDEX_VALIDATE_SAMPLES", "20"))
+INDEX_VALIDATE_TOP = int(os.getenv("INDEX_VALIDATE_TOP", "10"))
+INDEX_VALIDATE_MIN_HIT_RATE = float(os.getenv("INDEX_VALIDATE_MIN_HIT_RATE", "0.9"))
+# Document counts are eventually consistent on the hosted backends
+INDEX_VALIDATE_TIMEOUT = float(os.getenv("INDEX_VALIDATE_TIMEOUT", "120"))
+
+_VERSION_RE = re.compile(r"^(.+)-v(\d+)$")
+
+
+def logical_index_name(name: str) -> str:
+    """'api-docs-index-v7' -> 'api-docs-index' (unversioned names are returned as is)."""
+    match = _VERSION_RE.match(name)
+    return match.group(1) if match else name
+
+
+def index_version(name: str) -> int:
+    match = _VERSION_RE.match(name)
+    return int(match.group(2)) if match else 0
+
+
+def load_aliases(path: str = None) -> dict:
+    path = path or INDEX_ALIASES_PATH
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_aliases(aliases: dict, path: str = None):
+    path = path or INDEX_ALIASES_PATH
+    # Written to a temp file and renamed, so readers never see a partial pointer
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(aliases, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def resolve_index(name: str, path: str = None) -> str:
+    """The physical index currently serving a logical name (versioned names resolve to themselves)."""
+    if _VERSION_RE.match(name):
+        return name
+    return load_aliases(path).get(name, {}).get("current", name)
+
+
+def next_version_name(logical: str, path: str = None) -> str:
+    entry = load_aliases(path).get(logical, {})
+    known = entry.get("versions", []) + entry.get("staged", []) + [entry.get("current", logical)]
+    return f"{logical}-v{max(index_version(name) for name in known) + 1}"
+
+
+def record_swap(logical: str, physical: str, path: str = None) -> dict:
+    """Points logical at physical and returns the updated entry."""
+    aliases = load_aliases(path)
+    entry = aliases.setdefault(logical, {"current": logical, "versions": [logical]})
+    if physical not in entry["versions"]:
+        entry["versions"].append(physical)
+    entry["current"] = physical
+    entry["swapped_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    _save_aliases(aliases, path)
+    return entry
+
+
+def record_staged(logical: str, physical: str, path: str = None) -> dict:
+    """Records a version that was built but not swapped in, and returns the updated entry."""
+    aliases = load_aliases(path)
+    entry = aliases.setdefault(logical, {"current": logical, "versions": [logical]})
+    if physical not in entry.setdefault("staged", []):
+        entry["staged"].append(physical)
+    _save_aliases(aliases, path)
+    return entry
+
+
+def forget_versions(logical: str, names: list, path: str = None):
+    aliases = load_aliases(path)
+    entry = aliases.get(logical)
+    if entry:
+        entry["versions"] = [name for name in entry["versions"] if name not in names]
+        if "staged" in entry:
+            entry["staged"] = [name for name in entry["staged"] if name not in names]
+        _save_aliases(aliases, path)
+
+
+def expired_versions(logical: str, keep: int = None, path: str = None) -> list:
+    """
+    Versions older than the current one beyond the `keep` most recent, plus
+    staged versions a later swap superseded.
+    """
+    keep = INDEX_KEEP_VERSIONS if keep is None else keep
+    entry = load_aliases(path).get(logical)
+    if not entry:
+        return []
+    current = index_version(entry["current"])
+    older = [name for name in entry["versions"] if index_version(name) < current]
+    superseded = [name for name in entry.get("staged", []) if index_version(name) < current]
+    return older[:max(len(older) - keep, 0)] + superseded
+
+
+class ValidationSampler:
+    """Reservoir sample of built documents, re-queried to validate a new version."""
+
+    def __init__(self, size: int = None, seed: int = 0):
+        self.size = INDEX_VALIDATE_SAMPLES if size is None else size
+        self.rng = random.Random(seed)
+        self.seen = 0
+        self.samples = []
+
+    def add(self, docs: list):
+        for doc in docs:
+            self.seen += 1
+            sample = {"id": doc["id"], "content": doc.get("content", ""), "embedding": doc.get("embedding")}
+            if len(self.samples) < self.size:
+                self.samples.append(sample)
+            else:
+                slot = self.rng.randrange(self.seen)
+                if slot < self.size:
+                    self.samples[slot] = sample
+
+
+def validate_index(indexer, expected_count: int, samples: list, top: int = None,
+                   min_hit_rate: float = None, timeout: float = None) -> bool:
+    """
+    Count check (the index holds expected_count documents) plus sample-query
+    check (each sampled document comes back in the top results for itself).
+    """
+    top = top or INDEX_VALIDATE_TOP
+    min_hit_rate = INDEX_VALIDATE_MIN_HIT_RATE if min_hit_rate is None else min_hit_rate
+    deadline = time.monotonic() + (INDEX_VALIDATE_TIMEOUT if timeout is None else timeout)
+
+    count = indexer.document_count()
+    while count != expected_count and time.monotonic() < deadline:
+        time.sleep(2)
+        count = indexer.document_count()
+    if count != expected_count:
+        print(f"Validation failed for '{indexer.index_name}': {count} documents, expected {expected_count}.")
+        return False
+
+    hits = sum(
+        sample["id"] in indexer.search_ids(sample["embedding"], sample["content"], top=top)
+        for sample in samples
+    )
+    hit_rate = hits / len(samples) if samples else 1.0
+    print(
+        f"Validated '{indexer.index_name}': {count} documents, "
+        f"{hits}/{len(samples)} sample queries found their document in the top {top}."
+    )
+    if hit_rate < min_hit_rate:
+        print(f"Validation failed: sample hit rate {hit_rate:.2f} < {min_hit_rate:.2f}.")
+        return False
+    return True
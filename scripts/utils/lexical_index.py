@@ -0,0 +1,376 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/lexical_index.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# A small local inverted index (BM25) that is built next to the vector indexes.
+# It answers exact-token lookups such as operationIds, API paths or camera MACs
+# without an embedding call, and can fuse its ranking with vector results.
+
+import os
+import re
+import json
+import math
+import heapq
+import struct
+from array import array
+from collections import defaultdict
+
+from utils.metrics import span
+
+LEXICAL_INDEX_DIR = os.getenv("LEXICAL_INDEX_DIR", "lexical_indexes")
+
+_MAGIC = b"BM25v1\n"
+
+# Decoded posting lists kept per index; query terms repeat across searches
+POSTINGS_CACHE_TERMS = int(os.getenv("LEXICAL_POSTINGS_CACHE_TERMS", "4096"))
+
+# Identifier-ish spans: keeps paths, MACs, dotted names and snake/camel case intact
+_SPAN_RE = re.compile(r"[/A-Za-z0-9_.:{}\-]+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+_EXACT_HINT_RE = re.compile(r"[/:_.{}]|[a-z][A-Z]|^[0-9a-fA-F]{2}(?:[:\-][0-9a-fA-F]{2}){5}$")
+
+
+def tokenize(text: str) -> list:
+    """
+    Splits text into lowercase BM25 terms.
+
+    Every identifier-like span is emitted whole (e.g. '/dna/intent/api/v1/network-device',
+    'getnetworkclients', '0c:8d:db:00:81:d7') followed by its word pieces, so both
+    exact lookups and ordinary keyword queries match.
+    """
+    terms = []
+    for span in _SPAN_RE.findall(text):
+        span = span.strip(".:-")
+        if not span:
+            continue
+        pieces = _CAMEL_RE.findall(span)
+        whole = span.lower()
+        if len(pieces) != 1 or pieces[0].lower() != whole:
+            terms.append(whole)
+        terms.extend(p.lower() for p in pieces)
+    return terms
+
+
+def is_exact_lookup(query: str) -> bool:
+    """
+    True for single-token queries that look like identifiers (paths, MACs,
+    camelCase operationIds, snake_case names) rather than natural language.
+    """
+    query = query.strip()
+    return bool(query) and " " not in query and bool(_EXACT_HINT_RE.search(query))
+
+
+def _encode_varints(values, out: bytearray):
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+
+def _decode_varints(buf, start: int, end: int) -> list:
+    values = []
+    value = shift = 0
+    for i in range(start, end):
+        byte = buf[i]
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index with delta + varint compressed postings.
+
+    Postings for each term are stored as interleaved (doc gap, term frequency)
+    varints. A small set of stored fields per document is kept so exact hits
+    can be answered entirely from the local file.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids = []
+        self.doc_lengths = array("I")
+        self.stored = []
+        self.vocab = {}          # term -> (offset, length, df)
+        self.postings = b""
+        self.avgdl = 1.0
+        self._pending = defaultdict(list)  # term -> [(doc_no, tf)] while building
+        self._doc_numbers = None           # doc id -> doc_no, built on first get()
+        self._norms = None                 # doc_no -> BM25 length norm, built on first search()
+        self._decoded = {}                 # term -> decoded [gap, tf, ...] postings
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def get(self, doc_id: str):
+        """{ 'id', **stored_fields } for a document id, or None (e.g. to hydrate vector hits of a loaded index)."""
+        if self._doc_numbers is None:
+            self._doc_numbers = {doc_id: doc_no for doc_no, doc_id in enumerate(self.doc_ids)}
+        doc_no = self._doc_numbers.get(doc_id)
+        if doc_no is None:
+            return None
+        return dict(self.stored[doc_no], id=doc_id)
+
+    def add(self, doc_id: str, text: str, stored: dict = None):
+        """Adds a document to the index. Call finalize() once all docs are added."""
+        doc_no = len(self.doc_ids)
+        terms = tokenize(text)
+        counts = defaultdict(int)
+        for term in terms:
+            counts[term] += 1
+        for term, tf in counts.items():
+            self._pending[term].append((doc_no, tf))
+        self.doc_ids.append(doc_id)
+        self.doc_lengths.append(len(terms))
+        self.stored.append(stored or {})
+
+    def finalize(self):
+        """Compresses pending postings (merging with any already compressed ones)."""
+        merged = defaultdict(list)
+        for term, (offset, length, _) in self.vocab.items():
+            decoded = _decode_varints(self.postings, offset, offset + length)
+            doc_no = 0
+            for i in range(0, len(decoded), 2):
+                doc_no += decoded[i]
+                merged[term].append((doc_no, decoded[i + 1]))
+        for term, entries in self._pending.items():
+            merged[term].extend(entries)
+        self._pending = defaultdict(list)
+
+        blob = bytearray()
+        vocab = {}
+        for term in sorted(merged):
+            entries = merged[term]
+            start = len(blob)
+            prev = 0
+            flat = []
+            for doc_no, tf in entries:
+                flat.append(doc_no - prev)
+                flat.append(tf)
+                prev = doc_no
+            _encode_varints(flat, blob)
+            vocab[term] = (start, len(blob) - start, len(entries))
+        self.vocab = vocab
+        self.postings = bytes(blob)
+        self.avgdl = (sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0) or 1.0
+        self._doc_numbers = self._norms = None
+        self._decoded = {}
+        return self
+
+    def _decoded_postings(self, term: str, entry: tuple) -> list:
+        decoded = self._decoded.get(term)
+        if decoded is None:
+            offset, length, _ = entry
+            decoded = _decode_varints(self.postings, offset, offset + length)
+            if len(self._decoded) >= POSTINGS_CACHE_TERMS:
+                self._decoded.clear()
+            self._decoded[term] = decoded
+        return decoded
+
+    def search(self, query: str, top: int = 10) -> list:
+        """
+        Scores documents against the query with BM25.
+
+        Returns:
+            List[dict]: [{ 'id', 'score', **stored_fields }] best first.
+        """
+        if self._pending:
+            self.finalize()
+        n_docs = len(self.doc_ids)
+        if not n_docs:
+            return []
+        avgdl = self.avgdl
+
+        terms = set(tokenize(query))
+        if is_exact_lookup(query):
+            # Score only the whole identifier when it is indexed; its word pieces
+            # ('api', 'v', '1', ...) have long postings and add nothing but latency.
+            whole = query.strip().strip(".:-").lower()
+            if whole in self.vocab:
+                terms = {whole}
+
+        norms = self._norms
+        if norms is None:
+            k1, b = self.k1, self.b
+            norms = self._norms = [k1 * (1 - b + b * dl / avgdl) for dl in self.doc_lengths]
+        k1_plus_1 = self.k1 + 1
+
+        scores = defaultdict(float)
+        for term in terms:
+            entry = self.vocab.get(term)
+            if not entry:
+                continue
+            df = entry[2]
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            decoded = self._decoded_postings(term, entry)
+            doc_no = 0
+            for i in range(0, len(decoded), 2):
+                doc_no += decoded[i]
+                tf = decoded[i + 1]
+                scores[doc_no] += idf * tf * k1_plus_1 / (tf + norms[doc_no])
+
+        candidates = scores.items()
+        if len(scores) > top:
+            # Only documents scoring at least the top-th best need a full sort
+            cutoff = heapq.nlargest(top, scores.values())[-1]
+            candidates = [item for item in candidates if item[1] >= cutoff]
+        ranked = sorted(candidates, key=lambda item: (-item[1], item[0]))[:top]
+        return [
+            dict(self.stored[doc_no], id=self.doc_ids[doc_no], score=score)
+            for doc_no, score in ranked
+        ]
+
+    def save(self, path: str):
+        """Writes the index as: magic, header length, JSON header, postings blob."""
+        if self._pending:
+            self.finalize()
+        header = json.dumps({
+            "k1": self.k1,
+            "b": self.b,
+            "doc_ids": self.doc_ids,
+            "doc_lengths": self.doc_lengths.tolist(),
+            "stored": self.stored,
+            "vocab": self.vocab,
+        }, ensure_ascii=False).encode("utf-8")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            f.write(self.postings)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a lexical index file")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+            postings = f.read()
+
+        index = cls(k1=header["k1"], b=header["b"])
+        index.doc_ids = header["doc_ids"]
+        index.doc_lengths = array("I", header["doc_lengths"])
+        index.stored = header["stored"]
+        index.vocab = {term: tuple(entry) for term, entry in header["vocab"].items()}
+        index.postings = postings
+        index.avgdl = (sum(index.doc_lengths) / len(index.doc_lengths) if index.doc_lengths else 0) or 1.0
+        return index
+
+
+def lexical_index_path(index_name: str) -> str:
+    return os.path.join(LEXICAL_INDEX_DIR, f"{index_name}.bm25")
+
+
+def add_lexical_docs(index: LexicalIndex, docs, text_fields=("content",), stored_fields=("content",)):
+    """
+    Adds upload-ready docs to an index being built. Callers can feed it one
+    batch at a time and drop each batch afterwards.
+    """
+    for doc in docs:
+        text = " ".join(str(doc[field]) for field in text_fields if doc.get(field))
+        stored = {field: doc[field] for field in stored_fields if field in doc}
+        index.add(str(doc["id"]), text, stored)
+
+
+def save_lexical_index(index: LexicalIndex, index_name: str) -> LexicalIndex:
+    """Finalizes an index built with add_lexical_docs() and saves it as the index's snapshot."""
+    with span("lexical_index", index=index_name):
+        index.finalize()
+        path = lexical_index_path(index_name)
+        index.save(path)
+    print(f"Saved lexical index for '{index_name}' ({len(index)} docs, {len(index.vocab)} terms) to {path}")
+    return index
+
+
+def build_lexical_index(docs: list, index_name: str, text_fields=("content",), stored_fields=("content",)) -> LexicalIndex:
+    """
+    Builds and saves the lexical index for a list of upload-ready docs
+    (the same dicts passed to index_documents()).
+    """
+    index = LexicalIndex()
+    with span("lexical_index", index=index_name):
+        add_lexical_docs(index, docs, text_fields, stored_fields)
+    return save_lexical_index(index, index_name)
+
+
+def snapshot_fields(index_name: str) -> dict:
+    """
+    text_fields / stored_fields of a logical index's snapshot. Every builder
+    uses these, so a snapshot can be updated from its own stored fields.
+    """
+    if index_name.startswith("lob-"):
+        return {"text_fields": ("content", "id"), "stored_fields": ("content", "source_file")}
+    if index_name == os.getenv("AZURE_SEARCH_EVENTS_INDEX", "events-index"):
+        fields = ("content", "event_id", "event_type", "event_name")
+        return {"text_fields": fields, "stored_fields": fields}
+    if index_name == os.getenv("API_DOCS_INDEX_NAME", "api-docs-index"):
+        return {"text_fields": ("content",), "stored_fields": ("content", "platform", "doc_type", "api_version")}
+    return {"text_fields": ("content",), "stored_fields": ("content", "platform", "doc_type")}
+
+
+def update_lexical_index(index_name: str, upserts: list = (), delete_ids=()) -> LexicalIndex:
+    """
+    Applies upserted docs and deleted ids to the saved snapshot. The postings
+    are immutable, so the snapshot is rebuilt from its stored fields.
+    """
+    docs = {}
+    path = lexical_index_path(index_name)
+    if os.path.isfile(path):
+        snapshot = LexicalIndex.load(path)
+        docs = {doc_id: snapshot.get(doc_id) for doc_id in snapshot.doc_ids}
+    for doc_id in delete_ids:
+        docs.pop(str(doc_id), None)
+    for doc in upserts:
+        docs[str(doc["id"])] = doc
+    return build_lexical_index(list(docs.values()), index_name, **snapshot_fields(index_name))
+
+
+def reciprocal_rank_fusion(*ranked_lists, k: int = 60, top: int = 10) -> list:
+    """
+    Fuses several ranked result lists (each a list of dicts with an 'id') using
+    reciprocal rank fusion: score(d) = sum(1 / (k + rank)).
+    """
+    fused = {}
+    merged_docs = {}
+    for results in ranked_lists:
+        for rank, result in enumerate(results, start=1):
+            doc_id = result["id"]
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+            merged_docs.setdefault(doc_id, result)
+    ranked = sorted(fused.items(), key=lambda item: -item[1])[:top]
+    return [dict(merged_docs[doc_id], score=score) for doc_id, score in ranked]
+
+
+class HybridScorer:
+    """
+    Combines a LexicalIndex with a vector search callable.
+
+    vector_search(query, top) must return a ranked list of dicts with an 'id'.
+    Identifier-style queries that hit the lexical index are answered locally,
+    skipping the embedding call entirely.
+    """
+
+    def __init__(self, lexical_index: LexicalIndex, vector_search=None, rrf_k: int = 60):
+        self.lexical_index = lexical_index
+        self.vector_search = vector_search
+        self.rrf_k = rrf_k
+
+    def search(self, query: str, top: int = 10) -> list:
+        lexical_hits = self.lexical_index.search(query, top=top)
+        if (lexical_hits and is_exact_lookup(query)) or self.vector_search is None:
+            return lexical_hits
+        vector_hits = self.vector_search(query, top)
+        return reciprocal_rank_fusion(lexical_hits, vector_hits, k=self.rrf_k, top=top)
@@ -0,0 +1,263 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/lob_joins.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Foreign-key discovery and joins across the records of one LOB folder.
+#
+# LOB records reference each other in two ways:
+#   - structured *_id fields:  patients.primary_physician_id = "DR-3001"
+#   - ids mentioned in text:   "relation": ["Near Dr. Amelia Grant's office (DOC-101)"]
+# A value is resolved to the record that owns it: a record's own key ('id', or
+# its first *_id field), else a unique *_id column of another file (e.g.
+# physician_directory.provider_id). The result is an adjacency index over
+# record ids, saved as JSON under LOB_JOIN_DIR, and can be used to emit
+# denormalized documents that carry their linked records, so a multi-hop
+# question ("who is Alice Johnson's physician and where do they practice")
+# is answered by one retrieval. The saved index records whether the folder was
+# built denormalized, so incremental builds (watch_index.py, rebuild_index.py)
+# keep that mode; LOB_DENORMALIZE, when set, overrides it.
+
+import os
+import re
+import json
+from collections import deque
+
+LOB_JOIN_DIR = os.getenv("LOB_JOIN_DIR", "lob_joins")
+LOB_JOIN_MAX_LINKS = int(os.getenv("LOB_JOIN_MAX_LINKS", "10"))
+LOB_JOIN_SNIPPET_CHARS = int(os.getenv("LOB_JOIN_SNIPPET_CHARS", "300"))
+
+_ID_TOKEN_RE = re.compile(r"\b[A-Z][A-Z0-9]*-\d+[A-Z0-9]*\b")
+
+
+def _is_id_field(name: str) -> bool:
+    name = name.lower()
+    return name == "id" or name.endswith("_id") or name.endswith("_ids")
+
+
+def record_key(record: dict):
+    """A record's own id: 'id', else its first *_id field (e.g. patient_id)."""
+    if record.get("id"):
+        return str(record["id"])
+    return next(
+        (str(v) for k, v in record.items() if k.lower().endswith("_id") and isinstance(v, (str, int)) and v),
+        None
+    )
+
+
+def _primary_column(record: dict):
+    if record.get("id"):
+        return "id"
+    return next((k for k, v in record.items() if k.lower().endswith("_id") and isinstance(v, (str, int)) and v), None)
+
+
+def _iter_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_strings(item)
+
+
+def _key_columns(records: list) -> dict:
+    """{ column: is_primary } for one file: its primary column plus unique scalar *_id columns."""
+    columns = {}
+    primary = {_primary_column(r) for r in records} - {None}
+    for column in primary:
+        columns[column] = True
+    candidates = {k for r in records for k, v in r.items() if _is_id_field(k) and isinstance(v, (str, int))}
+    for column in candidates - set(columns):
+        values = [r.get(column) for r in records]
+        if all(values) and len(set(values)) == len(values):
+            columns[column] = False
+    return columns
+
+
+class JoinIndex:
+    """Adjacency over the records of one LOB folder; nodes are in source order."""
+
+    def __init__(self, nodes: list, edges: list, folder: str = None, denormalized: bool = False):
+        self.folder = folder
+        self.denormalized = denormalized
+        self.nodes = nodes  # [{ "key", "file" }]
+        self.edges = edges  # [[src, dst, via]]
+        self.out_edges = {}
+        self.in_edges = {}
+        for src, dst, via in edges:
+            self.out_edges.setdefault(src, []).append((dst, via))
+            self.in_edges.setdefault(dst, []).append((src, via))
+        self.by_key = {}
+        for i, node in enumerate(nodes):
+            self.by_key.setdefault(node["key"], []).append(i)
+
+    def neighbors(self, node: int, hops: int = 1) -> list:
+        """[(node, relation, depth)] breadth first; relation is 'via' for links out, '<via> of' for links in."""
+        seen = {node}
+        found = []
+        queue = deque([(node, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            if depth == hops:
+                continue
+            links = [(dst, via) for dst, via in self.out_edges.get(current, [])]
+            links += [(src, f"{via} of") for src, via in self.in_edges.get(current, [])]
+            for other, relation in links:
+                if other in seen:
+                    continue
+                seen.add(other)
+                found.append((other, relation, depth + 1))
+                queue.append((other, depth + 1))
+        return found
+
+    def lookup(self, key: str, hops: int = 1) -> list:
+        """Linked records of a record id: [{ key, file, relation, depth }]."""
+        results = []
+        for node in self.by_key.get(key, []):
+            for other, relation, depth in self.neighbors(node, hops):
+                results.append(dict(self.nodes[other], relation=relation, depth=depth))
+        return results
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"folder": self.folder, "denormalized": self.denormalized,
+                       "nodes": self.nodes, "edges": self.edges}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["nodes"], [tuple(edge) for edge in data["edges"]], data.get("folder"),
+                   bool(data.get("denormalized")))
+
+
+def discover_joins(sources: list, folder: str = None) -> JoinIndex:
+    """
+    Builds the adjacency index for one folder. sources is [(file_name, record)]
+    in document order; node i is sources[i].
+    """
+    by_file = {}
+    for i, (file_name, record) in enumerate(sources):
+        by_file.setdefault(file_name, []).append(i)
+
+    # value -> [(node, is_primary, column size, number of *_id columns in the file)]
+    owners = {}
+    own_columns = {}
+    for file_name, rows in by_file.items():
+        records = [sources[i][1] for i in rows]
+        columns = _key_columns(records)
+        id_columns = len({k for r in records for k in r if _is_id_field(k)})
+        for column, is_primary in columns.items():
+            for i in rows:
+                value = sources[i][1].get(column)
+                if value:
+                    owners.setdefault(str(value), []).append((i, is_primary, len(rows), id_columns))
+        for i in rows:
+            own_columns[i] = set(columns)
+
+    def resolve(value: str):
+        candidates = owners.get(value)
+        if not candidates:
+            return None
+        primaries = [c for c in candidates if c[1]]
+        if primaries:
+            return primaries[0][0] if len(primaries) == 1 else None
+        # Prefer the fuller column, then the file that looks most like an entity table
+        ranked = sorted(candidates, key=lambda c: (-c[2], c[3]))
+        if len(ranked) > 1 and (ranked[0][2], ranked[0][3]) == (ranked[1][2], ranked[1][3]):
+            return None
+        return ranked[0][0]
+
+    edges = []
+    for src, (file_name, record) in enumerate(sources):
+        linked = set()
+        # Structured references first, so they name the relation
+        for field, value in record.items():
+            if not _is_id_field(field) or field in own_columns[src]:
+                continue
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, (str, int)):
+                    dst = resolve(str(item))
+                    if dst is not None and dst != src and dst not in linked:
+                        linked.add(dst)
+                        edges.append((src, dst, field))
+        for field, value in record.items():
+            if field in own_columns[src]:
+                continue
+            for text in _iter_strings(value):
+                for token in _ID_TOKEN_RE.findall(text):
+                    dst = resolve(token)
+                    if dst is not None and dst != src and dst not in linked:
+                        linked.add(dst)
+                        edges.append((src, dst, "mention"))
+
+    nodes = [
+        {"key": record_key(record) or f"{file_name}#{i}", "file": file_name}
+        for i, (file_name, record) in enumerate(sources)
+    ]
+    return JoinIndex(nodes, edges, folder)
+
+
+def join_index_path(folder: str) -> str:
+    return os.path.join(LOB_JOIN_DIR, f"{folder}.json")
+
+
+def lob_denormalize(folder: str) -> bool:
+    """Whether a folder's docs carry their linked records: LOB_DENORMALIZE, else the saved mode."""
+    value = os.getenv("LOB_DENORMALIZE")
+    if value:
+        return value.lower() in ("1", "true", "yes")
+    path = join_index_path(folder)
+    if not os.path.isfile(path):
+        return False
+    with open(path, "r", encoding="utf-8") as f:
+        return bool(json.load(f).get("denormalized"))
+
+
+def build_join_index(sources: list, folder: str, denormalized: bool = False) -> JoinIndex:
+    """Discovers the joins for a folder and saves the adjacency index with the build mode."""
+    join_index = discover_joins(sources, folder)
+    join_index.denormalized = denormalized
+    join_index.save(join_index_path(folder))
+    linked = len({src for src, _, _ in join_index.edges} | {dst for _, dst, _ in join_index.edges})
+    print(
+        f"Join index for '{folder}': {len(join_index.edges)} links across "
+        f"{linked}/{len(join_index.nodes)} records -> {join_index_path(folder)}"
+    )
+    return join_index
+
+
+def denormalize_docs(docs: list, join_index: JoinIndex, hops: int = 1, max_links: int = None) -> list:
+    """
+    Copies of docs (aligned with the join index nodes) whose content carries the
+    linked records and whose metadata lists their ids under '_links'.
+    """
+    max_links = LOB_JOIN_MAX_LINKS if max_links is None else max_links
+    denormalized = []
+    for node, doc in enumerate(docs):
+        links = join_index.neighbors(node, hops)[:max_links]
+        if not links:
+            denormalized.append(doc)
+            continue
+        lines = []
+        for other, relation, _ in links:
+            target = join_index.nodes[other]
+            snippet = " | ".join(docs[other]["content"].split("\n"))[:LOB_JOIN_SNIPPET_CHARS]
+            lines.append(f"- {target['key']} ({target['file']}, {relation}): {snippet}")
+        metadata = json.loads(doc["metadata"]) if doc.get("metadata") else {}
+        if isinstance(metadata, dict):
+            metadata["_links"] = [
+                {"key": join_index.nodes[other]["key"], "relation": relation} for other, relation, _ in links
+            ]
+        denormalized.append(dict(
+            doc,
+            content=doc["content"] + "\n\nLinked records:\n" + "\n".join(lines),
+            metadata=json.dumps(metadata, ensure_ascii=False)
+        ))
+    return denormalized
@@ -0,0 +1,336 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/lob_schema.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Schema inference and compiled record extractors for LOB folders.
+#
+# Each JSON file is scanned once to infer its fields; the files of a folder are
+# merged into one index schema (conflicting types widen to string). Scalars and
+# short strings, including those nested in objects (address.state ->
+# address_state), become typed, filterable index fields. Every value,
+# nested or not, is flattened into the text that is embedded. Values that are
+# not promoted (lists of objects, long free text) are kept in a compact
+# 'metadata' JSON remainder instead of a copy of the whole record.
+#
+# For each file an extractor function is generated from its schema and
+# compiled once, so converting a record is straight-line key lookups instead
+# of a generic walk over the dict.
+
+import os
+import re
+import json
+import uuid
+
+from utils.doc_ids import deterministic_id
+
+# Strings longer than this (anywhere in a column) are treated as free text, not filter values
+LOB_MAX_FILTER_CHARS = int(os.getenv("LOB_MAX_FILTER_CHARS", "64"))
+MAX_DEPTH = 3
+
+STRING, INT64, DOUBLE, BOOLEAN, DATETIME = "string", "int64", "double", "boolean", "datetime"
+RESERVED_FIELDS = {"id", "content", "embedding", "metadata", "source_file"}
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_DATETIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:\d{2})?$")
+_KEY_CHARS_RE = re.compile(r"[^A-Za-z0-9_\-=]")
+
+
+def _scalar_type(value):
+    if isinstance(value, bool):
+        return BOOLEAN
+    if isinstance(value, int):
+        return INT64 if -2**63 <= value < 2**63 else STRING
+    if isinstance(value, float):
+        return DOUBLE
+    if isinstance(value, str):
+        if _DATE_RE.match(value) or _DATETIME_RE.match(value):
+            return DATETIME
+        return STRING
+    return None
+
+
+def _widen(a, b):
+    if a is None or a == b:
+        return b
+    if {a, b} == {INT64, DOUBLE}:
+        return DOUBLE
+    return STRING
+
+
+def field_name(path: tuple) -> str:
+    """('address', 'zip_code') -> 'address_zip_code', made safe for index field names."""
+    name = re.sub(r"[^A-Za-z0-9_]", "_", "_".join(path)).strip("_") or "field"
+    if not name[0].isalpha():
+        name = "f_" + name
+    return "f_" + name if name in RESERVED_FIELDS else name
+
+
+def _key_column(records: list):
+    """The column holding each record's own id: 'id', else the first *_id column."""
+    for record in records:
+        if record.get("id"):
+            return "id"
+    for record in records:
+        for k, v in record.items():
+            if k.lower().endswith("_id") and isinstance(v, (str, int)) and v:
+                return k
+    return None
+
+
+class _Column:
+    def __init__(self):
+        self.kinds = set()  # scalar / dict / list_scalar / list_complex
+        self.type = None
+        self.max_chars = 0
+        self.children = {}
+
+
+def _observe(columns: dict, record: dict, depth: int = 1):
+    for key, value in record.items():
+        if value is None or value == "":
+            continue
+        column = columns.setdefault(key, _Column())
+        if isinstance(value, dict):
+            column.kinds.add("dict")
+            if depth < MAX_DEPTH:
+                _observe(column.children, value, depth + 1)
+        elif isinstance(value, list):
+            if all(_scalar_type(item) is not None for item in value):
+                column.kinds.add("list_scalar")
+                column.max_chars = max([column.max_chars] + [len(str(item)) for item in value])
+            else:
+                column.kinds.add("list_complex")
+        else:
+            column.kinds.add("scalar")
+            column.type = _widen(column.type, _scalar_type(value) or STRING)
+            if isinstance(value, str):
+                column.max_chars = max(column.max_chars, len(value))
+
+
+def _promoted(columns: dict, path: tuple = ()) -> dict:
+    """{ path: (type, collection) } for the columns that become typed fields."""
+    fields = {}
+    for key, column in columns.items():
+        if len(column.kinds) != 1 or (not path and key in RESERVED_FIELDS):
+            continue  # mixed shapes and the record's own content/metadata text stay text-only
+        kind = next(iter(column.kinds))
+        sub = path + (key,)
+        if kind == "dict" and column.children:
+            fields.update(_promoted(column.children, sub))
+        elif kind == "scalar" and column.max_chars <= LOB_MAX_FILTER_CHARS:
+            fields[sub] = (column.type, False)
+        elif kind == "list_scalar" and column.max_chars <= LOB_MAX_FILTER_CHARS:
+            fields[sub] = (STRING, True)
+    return fields
+
+
+def to_datetime(value):
+    """ISO date/datetime string -> 'YYYY-MM-DDTHH:MM:SSZ' style value, or None."""
+    if not isinstance(value, str):
+        return None
+    if _DATE_RE.match(value):
+        return value + "T00:00:00Z"
+    if _DATETIME_RE.match(value):
+        return value if value.endswith("Z") or re.search(r"[+-]\d{2}:\d{2}$", value) else value + "Z"
+    return None
+
+
+def _as_int(value):
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def _as_double(value):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _as_bool(value):
+    return value if isinstance(value, bool) else None
+
+
+def _as_string(value):
+    return value if isinstance(value, str) else str(value)
+
+
+def flatten_text(value, label: str = "") -> list:
+    """Text lines for any value: 'label: value' for leaves, recursing into objects and lists."""
+    if value is None or value == "":
+        return []
+    if isinstance(value, dict):
+        lines = []
+        for key, item in value.items():
+            lines.extend(flatten_text(item, f"{label}.{key}" if label else key))
+        return lines
+    if isinstance(value, list):
+        if all(_scalar_type(item) is not None for item in value):
+            return [f"{label}: {', '.join(str(item) for item in value)}"] if value else []
+        lines = []
+        for item in value:
+            lines.extend(flatten_text(item, label))
+        return lines
+    return [f"{label}: {value}" if label else str(value)]
+
+
+_CONVERTERS = {STRING: "_as_string", INT64: "_as_int", DOUBLE: "_as_double",
+               BOOLEAN: "_as_bool", DATETIME: "to_datetime"}
+
+
+def _generate_source(columns: dict, key_column, promoted: dict, field_types: dict, source_file: str) -> str:
+    """Python source of extract(record, fallback_id) for one file."""
+    lines = [
+        "def extract(record, fallback_id=None):",
+        "    text = []",
+        "    rest = {}",
+        f"    doc = {{'source_file': {source_file!r}}}",
+    ]
+    counter = [0]
+
+    def var():
+        counter[0] += 1
+        return f"v{counter[0]}"
+
+    def emit(columns: dict, source: str, path: tuple, indent: str):
+        for key, column in columns.items():
+            sub = path + (key,)
+            v = var()
+            lines.append(f"{indent}{v} = {source}.get({key!r})")
+            lines.append(f"{indent}if {v} is not None and {v} != '':")
+            body = indent + "    "
+            label = ".".join(sub)
+            kind = next(iter(column.kinds)) if len(column.kinds) == 1 else None
+
+            if sub in promoted:
+                name = field_name(sub)
+                target_type, target_collection = field_types[name]
+                if promoted[sub][1]:
+                    lines.append(f"{body}doc[{name!r}] = [str(x) for x in {v} if x is not None]")
+                elif target_collection:
+                    # Another file holds lists here, so the merged field is Collection(String)
+                    lines.append(f"{body}doc[{name!r}] = [_as_string({v})]")
+                else:
+                    converted = var()
+                    lines.append(f"{body}{converted} = {_CONVERTERS[target_type]}({v})")
+                    lines.append(f"{body}if {converted} is not None:")
+                    lines.append(f"{body}    doc[{name!r}] = {converted}")
+                if kind == "scalar" and column.type == STRING and len(sub) == 1 and not target_collection:
+                    # Top-level strings go into the text as-is, like the original content;
+                    # a column widened to string can still hold ints or bools
+                    lines.append(f"{body}text.append(_as_string({v}))")
+                else:
+                    lines.append(f"{body}text.extend(flatten_text({v}, {label!r}))")
+            elif kind == "dict" and column.children and len(sub) < MAX_DEPTH:
+                lines.append(f"{body}if isinstance({v}, dict):")
+                emit(column.children, v, sub, body + "    ")
+                lines.append(f"{body}else:")
+                lines.append(f"{body}    text.extend(flatten_text({v}, {label!r}))")
+            else:
+                if len(sub) == 1 and kind == "scalar" and column.type == STRING:
+                    lines.append(f"{body}text.append(_as_string({v}))")
+                else:
+                    lines.append(f"{body}text.extend(flatten_text({v}, {label!r}))")
+                if len(sub) == 1 and kind not in ("scalar", "list_scalar"):
+                    # Structure the flattened text cannot carry (lists of objects, mixed shapes)
+                    lines.append(f"{body}rest[{key!r}] = {v}")
+
+    body_columns = {k: c for k, c in columns.items() if k not in (key_column, "embedding")}
+    if key_column:
+        lines.append(f"    key = record.get({key_column!r})")
+        if key_column != "id":
+            # A named key (patient_id) stays filterable and searchable; 'id' is only the doc key
+            lines.append(f"    doc[{field_name((key_column,))!r}] = _as_string(key) if key else None")
+            lines.append("    if key:")
+            lines.append("        text.append(_as_string(key))")
+    else:
+        lines.append("    key = None")
+    emit(body_columns, "record", (), "    ")
+    lines += [
+        "    doc['id'] = _sanitize_key(key) if key else (fallback_id or str(uuid.uuid4()))",
+        "    doc['content'] = '\\n'.join(text)",
+        "    doc['metadata'] = json.dumps(rest, ensure_ascii=False) if rest else ''",
+        "    return {k: v for k, v in doc.items() if v is not None}",
+    ]
+    return "\n".join(lines)
+
+
+def _sanitize_key(value) -> str:
+    return _KEY_CHARS_RE.sub("_", str(value))
+
+
+class LobSchema:
+    """Merged typed fields for a LOB folder plus one compiled extractor per file."""
+
+    def __init__(self, fields: list, extractors: dict, sources: dict):
+        self.fields = fields          # [{ "name", "type", "collection" }]
+        self.extractors = extractors  # { file_name: extract(record, fallback_id) }
+        self.sources = sources        # { file_name: generated source }, for debugging
+
+    def to_doc(self, file_name: str, record: dict, fallback_id: str = None) -> dict:
+        return self.extractors[file_name](record, fallback_id)
+
+    def to_docs(self, sources: list, folder: str = None) -> list:
+        """
+        Docs for [(file_name, record)] in order. With the folder, records without
+        a key get the deterministic ids every LOB build uses (utils/doc_ids.py).
+        """
+        if folder is None:
+            return [self.extractors[file_name](record) for file_name, record in sources]
+        offsets = {}
+        docs = []
+        for file_name, record in sources:
+            offset = offsets[file_name] = offsets.get(file_name, -1) + 1
+            fallback_id = deterministic_id(os.path.join("lob_samples", folder, file_name), offset)
+            docs.append(self.extractors[file_name](record, fallback_id))
+        return docs
+
+
+def infer_lob_schema(sources: list) -> LobSchema:
+    """Infers the folder schema from [(file_name, record)] and compiles the extractors."""
+    by_file = {}
+    for file_name, record in sources:
+        by_file.setdefault(file_name, []).append(record)
+
+    per_file = {}
+    field_types = {}  # name -> (type, collection)
+    for file_name, records in by_file.items():
+        columns = {}
+        for record in records:
+            _observe(columns, record)
+        key_column = _key_column(records)
+        promoted = _promoted({k: c for k, c in columns.items() if k not in (key_column, "embedding")})
+        if key_column and key_column != "id":
+            promoted_key = {(key_column,): (STRING, False)}
+        else:
+            promoted_key = {}
+        per_file[file_name] = (columns, key_column, promoted)
+        for path, (ftype, collection) in list(promoted.items()) + list(promoted_key.items()):
+            name = field_name(path)
+            if name in field_types:
+                old_type, old_collection = field_types[name]
+                if old_collection != collection:
+                    ftype, collection = STRING, True
+                else:
+                    ftype = _widen(old_type, ftype)
+            field_types[name] = (ftype, collection)
+
+    extractors, generated = {}, {}
+    namespace_base = {
+        "json": json, "uuid": uuid, "flatten_text": flatten_text, "to_datetime": to_datetime,
+        "_as_int": _as_int, "_as_double": _as_double, "_as_bool": _as_bool, "_as_string": _as_string,
+        "_sanitize_key": _sanitize_key,
+    }
+    for file_name, (columns, key_column, promoted) in per_file.items():
+        source = _generate_source(columns, key_column, promoted, field_types, file_name)
+        namespace = dict(namespace_base)
+        exec(compile(source, f"<lob extractor {file_name}>", "exec"), namespace)
+        extractors[file_name] = namespace["extract"]
+        generated[file_name] = source
+
+    fields = [
+        {"name": name, "type": ftype, "collection": collection}
+        for name, (ftype, collection) in sorted(field_types.items())
+    ]
+    fields.insert(0, {"name": "source_file", "type": STRING, "collection": False})
+    return LobSchema(fields, extractors, generated)
@@ -0,0 +1,324 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/metrics.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Lightweight per-stage instrumentation for the index builds.
+#
+#   with span("embed", index="api-docs-index"):      # timed span + histogram
+#       ...
+#   inc("embeddings_total")                           # counter
+#   observe("upload_batch_bytes", n)                  # histogram sample
+#   progress("Uploading batch 3...")                  # per-item console output
+#
+# Environment:
+#   INDEX_QUIET=1            suppress per-item/per-batch console output
+#   METRICS_PROM_FILE=path   write a Prometheus textfile on export_metrics()
+#   METRICS_OTEL_FILE=path   write OpenTelemetry-compatible JSON spans + metrics
+#   METRICS_MAX_SPANS=N      cap on retained span records (default 10000)
+#   AZURE_SDK_LOG_LEVEL      level for the 'azure' SDK log file (default DEBUG,
+#                            WARNING in quiet mode)
+
+import os
+import json
+import time
+import uuid
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+
+QUIET = os.getenv("INDEX_QUIET", "0").lower() in ("1", "true", "yes")
+PROM_FILE = os.getenv("METRICS_PROM_FILE")
+OTEL_FILE = os.getenv("METRICS_OTEL_FILE")
+MAX_SPANS = int(os.getenv("METRICS_MAX_SPANS", "10000"))
+# Extra measurements that cost real work (e.g. serializing upload payloads just
+# to size them) only run when an export is configured
+EXPORT_ENABLED = bool(PROM_FILE or OTEL_FILE)
+
+# Seconds for durations; byte/count histograms pass their own buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 4e6, 1.6e7, 6.4e7)
+
+
+def progress(message: str):
+    """Per-item console output; a no-op in quiet mode."""
+    if not QUIET:
+        print(message)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Bucket upper bound containing the q-quantile (Prometheus-style estimate)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        running = 0
+        for i, n in enumerate(self.counts):
+            running += n
+            if running >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}     # (name, labels) -> float
+        self.histograms = {}   # (name, labels) -> Histogram
+        self.spans = []
+        self.dropped_spans = 0
+        self.trace_id = uuid.uuid4().hex
+        self._local = threading.local()
+        # Objects with span_started(stage, attributes) and
+        # span_finished(stage, attributes, duration), e.g. utils/profiling.py
+        self.listeners = []
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, buckets=DEFAULT_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(buckets)
+            hist.observe(value)
+
+    @contextmanager
+    def span(self, stage: str, **attributes):
+        """
+        Times a stage. Records a 'stage_duration_seconds{stage=...}' sample and a
+        span (with parent/child nesting per thread) for the OpenTelemetry export.
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        span_id = uuid.uuid4().hex[:16]
+        parent_id = stack[-1] if stack else None
+        stack.append(span_id)
+        for listener in self.listeners:
+            listener.span_started(stage, attributes)
+        start_ns = time.time_ns()
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield attributes
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            for listener in reversed(self.listeners):
+                listener.span_finished(stage, attributes, duration)
+            labels = {"stage": stage}
+            if "index" in attributes:
+                labels["index"] = attributes["index"]
+            self.observe("stage_duration_seconds", duration, **labels)
+            record = {
+                "name": stage,
+                "span_id": span_id,
+                "parent_span_id": parent_id,
+                "start_ns": start_ns,
+                "end_ns": start_ns + int(duration * 1e9),
+                "status": status,
+                "attributes": attributes,
+            }
+            with self.lock:
+                if len(self.spans) < MAX_SPANS:
+                    self.spans.append(record)
+                else:
+                    self.dropped_spans += 1
+
+    def summary(self) -> list:
+        """[(stage, labels, count, total_s, p50_s, p99_s)] for stage durations."""
+        rows = []
+        with self.lock:
+            for (name, labels), hist in sorted(self.histograms.items()):
+                if name == "stage_duration_seconds":
+                    rows.append((dict(labels).get("stage"), dict(labels), hist.count,
+                                 hist.sum, hist.quantile(0.5), hist.quantile(0.99)))
+        return rows
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self.lock:
+            seen = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} counter")
+                    seen.add(name)
+                lines.append(f"{name}{_prom_labels(labels)} {value}")
+            for (name, labels), hist in sorted(self.histograms.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} histogram")
+                    seen.add(name)
+                running = 0
+                for bound, n in zip(hist.buckets + (float("inf"),), hist.counts):
+                    running += n
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f"{name}_bucket{_prom_labels(labels + (('le', le),))} {running}")
+                lines.append(f"{name}_sum{_prom_labels(labels)} {hist.sum}")
+                lines.append(f"{name}_count{_prom_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_otel(self, service_name: str = "cisco-data-bridge-domain-index") -> dict:
+        """OTLP/JSON-shaped document with the recorded spans, counters and histograms."""
+        resource = {"attributes": [_otel_attr("service.name", service_name)]}
+        with self.lock:
+            spans = [{
+                "traceId": self.trace_id,
+                "spanId": s["span_id"],
+                "parentSpanId": s["parent_span_id"] or "",
+                "name": s["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(s["start_ns"]),
+                "endTimeUnixNano": str(s["end_ns"]),
+                "attributes": [_otel_attr(k, v) for k, v in s["attributes"].items()],
+                "status": {"code": 2 if s["status"] == "error" else 1},
+            } for s in self.spans]
+            now = str(time.time_ns())
+            metrics = [{
+                "name": name,
+                "sum": {
+                    "isMonotonic": True,
+                    "aggregationTemporality": 2,
+                    "dataPoints": [{
+                        "attributes": [_otel_attr(k, v) for k, v in labels],
+                        "timeUnixNano": now,
+                        "asDouble": value,
+                    }],
+                },
+            } for (name, labels), value in sorted(self.counters.items())]
+            metrics += [{
+                "name": name,
+                "histogram": {
+                    "aggregationTemporality": 2,
+                    "dataPoints": [{
+                        "attributes": [_otel_attr(k, v) for k, v in labels],
+                        "timeUnixNano": now,
+                        "count": str(hist.count),
+                        "sum": hist.sum,
+                        "explicitBounds": list(hist.buckets),
+                        "bucketCounts": [str(n) for n in hist.counts],
+                    }],
+                },
+            } for (name, labels), hist in sorted(self.histograms.items())]
+        scope = {"name": "scripts.utils.metrics"}
+        return {
+            "resourceSpans": [{"resource": resource, "scopeSpans": [{"scope": scope, "spans": spans}]}],
+            "resourceMetrics": [{"resource": resource, "scopeMetrics": [{"scope": scope, "metrics": metrics}]}],
+        }
+
+
+def _prom_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v)}"'.replace("\n", " ") for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _otel_attr(key, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+# Module-level registry used by the scripts
+metrics = MetricsRegistry()
+span = metrics.span
+inc = metrics.inc
+observe = metrics.observe
+
+
+def extras_enabled() -> bool:
+    """Whether to run the extra measurements: an export is configured or a profiler is attached."""
+    return EXPORT_ENABLED or bool(metrics.listeners)
+
+
+def is_429(exc: BaseException) -> bool:
+    """True if an exception represents an HTTP 429 / rate-limit response."""
+    status = getattr(exc, "status_code", None) or getattr(exc, "http_status", None)
+    if status is None and getattr(exc, "response", None) is not None:
+        status = getattr(exc.response, "status_code", None)
+    return status == 429 or "429" in str(exc) or type(exc).__name__ == "RateLimitError"
+
+
+def record_retry(retry_state):
+    """tenacity before_sleep hook: counts retries and 429s per stage function."""
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    stage = getattr(retry_state.fn, "__name__", "unknown")
+    inc("retries_total", function=stage)
+    if exc is not None and is_429(exc):
+        inc("throttled_total", function=stage)
+    observe("retry_sleep_seconds", retry_state.next_action.sleep if retry_state.next_action else 0,
+            function=stage)
+
+
+def configure_sdk_logging(log_file: str):
+    """
+    Sends Azure SDK logs to a file. Quiet mode defaults to WARNING. Request and
+    response bodies are only logged for a sample (SEARCH_HTTP_LOG_SAMPLE) or
+    with AZURE_SDK_LOG_BODIES=1 (see indexers/azure_transport.py).
+    """
+    level_name = os.getenv("AZURE_SDK_LOG_LEVEL", "WARNING" if QUIET else "DEBUG").upper()
+    logger = logging.getLogger("azure")
+    logger.setLevel(getattr(logging, level_name, logging.DEBUG))
+
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setLevel(logger.level)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    logger.addHandler(file_handler)
+    print(f"Logging Azure SDK details ({level_name}) to {log_file}")
+    return logger
+
+
+def print_stage_summary():
+    rows = metrics.summary()
+    if not rows:
+        return
+    print(f"{'stage':<22}{'index':<28}{'count':>8}{'total s':>11}{'p50 s':>9}{'p99 s':>9}")
+    for stage, labels, count, total, p50, p99 in rows:
+        print(f"{stage:<22}{labels.get('index', ''):<28}{count:>8}{total:>11.3f}{p50:>9.3f}{p99:>9.3f}")
+
+
+def export_metrics(prom_file: str = None, otel_file: str = None):
+    """Writes the configured exports and prints a per-stage summary."""
+    prom_file = prom_file or PROM_FILE
+    otel_file = otel_file or OTEL_FILE
+    print_stage_summary()
+    if prom_file:
+        tmp_path = prom_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(metrics.to_prometheus())
+        os.replace(tmp_path, prom_file)  # textfile collectors must never see a partial file
+        print(f"Wrote Prometheus metrics to {prom_file}")
+    if otel_file:
+        with open(otel_file, "w", encoding="utf-8") as f:
+            json.dump(metrics.to_otel(), f)
+        print(f"Wrote OpenTelemetry JSON to {otel_file}")
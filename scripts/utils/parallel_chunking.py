@@ -0,0 +1,111 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/parallel_chunking.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Process-pool preprocessing stage: reads and chunks the api-docs markdown files
+# in parallel and streams the results back in a deterministic (task) order, so
+# the embedding stage sees exactly the same sequence regardless of worker count.
+#
+# OpenAPI specs are not chunked here; they are split into operation and schema
+# units by utils/spec_versions.py.
+
+import os
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.chunking import chunk_file
+from utils.metrics import observe, span, metrics
+
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", "0")) or (os.cpu_count() or 1)
+
+
+def _task(file_path, platform, doc_type, chunk_size=1000, chunk_overlap=200):
+    """A work unit: one markdown file."""
+    return {
+        "file_path": file_path,
+        "platform": platform,
+        "doc_type": doc_type,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+    }
+
+
+def plan_api_doc_tasks(platform_dirs: list, chunk_size: int = 1000, chunk_overlap: int = 200) -> list:
+    """
+    Lists the chunking work units for the api-docs markdown files, in the same
+    order the sequential pipeline walks them.
+    """
+    tasks = []
+    for platform_dir in platform_dirs:
+        docs_path = os.path.join(platform_dir, "api-docs")
+        for file_path in sorted(glob.glob(os.path.join(docs_path, "*.md"))):
+            tasks.extend(plan_file_tasks(file_path, platform_dir, "api-docs", chunk_size, chunk_overlap))
+    return tasks
+
+
+def plan_file_tasks(file_path: str, platform: str, doc_type: str,
+                    chunk_size: int = 1000, chunk_overlap: int = 200) -> list:
+    """The work units of one api-docs file."""
+    return [_task(file_path, platform, doc_type, chunk_size, chunk_overlap)]
+
+
+def task_text(task: dict) -> str:
+    """Returns the raw text of a work unit."""
+    with open(task["file_path"], "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def chunk_task(task: dict) -> list:
+    """Reads/parses one unit and splits it into chunks."""
+    return chunk_file(task_text(task), chunk_size=task["chunk_size"], chunk_overlap=task["chunk_overlap"])
+
+
+def _timed_chunk_task(task: dict) -> tuple:
+    # Worker entry point; timings travel back with the result because each
+    # worker process has its own metrics registry
+    start = time.perf_counter()
+    text = task_text(task)
+    read_s = time.perf_counter() - start
+    chunks = chunk_file(text, chunk_size=task["chunk_size"], chunk_overlap=task["chunk_overlap"])
+    return chunks, read_s, time.perf_counter() - start - read_s
+
+
+def iter_chunked_tasks(tasks: list, workers: int = None):
+    """
+    Chunks tasks on a process pool and yields (task, chunks) in task order.
+
+    Results stream as soon as the next task in order is ready, so embedding can
+    start on the first file while later ones are still being chunked.
+    """
+    if metrics.listeners:
+        # A profiler is attached: read and split in-process, under real spans,
+        # so the profiles include the parsing and the splitter
+        for task in tasks:
+            with span("read"):
+                text = task_text(task)
+            with span("chunk"):
+                chunks = chunk_file(text, chunk_size=task["chunk_size"], chunk_overlap=task["chunk_overlap"])
+            yield task, chunks
+        return
+
+    workers = workers or CHUNK_WORKERS
+    if workers <= 1 or len(tasks) <= 1:
+        results = map(_timed_chunk_task, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+        results = pool.map(_timed_chunk_task, tasks)
+
+    try:
+        for task, (chunks, read_s, chunk_s) in zip(tasks, results):
+            observe("stage_duration_seconds", read_s, stage="read")
+            observe("stage_duration_seconds", chunk_s, stage="chunk")
+            yield task, chunks
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
@@ -0,0 +1,228 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/platform_router.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# In-process stage-1 platform router.
+#
+# The domain summaries are a handful of chunks per platform, so choosing a
+# platform does not need a vector search round trip. At build time each
+# platform gets a centroid (mean of its summary vectors) plus its exemplar
+# vectors; all rows are stored in one matrix grouped by platform. Routing is a
+# single matmul of the query embedding(s) against that matrix, then a max per
+# platform group (np.maximum.reduceat).
+#
+# Calibrated thresholds:
+#   min_score - below this best score the router abstains (returns []) and the
+#               caller falls back to searching domain-summaries-index
+#   margin    - every platform within `margin` of the best score is returned,
+#               so ambiguous questions route to several platforms
+# Both are fitted on calibration queries: leave-one-out summary chunks, plus
+# any golden queries ({ "query", "platforms": [...] }).
+
+import os
+import json
+
+import numpy as np
+
+PLATFORM_ROUTER_PATH = os.getenv("PLATFORM_ROUTER_PATH", "platform_router.npz")
+
+# Percentile of correct-platform scores used as the abstain floor
+FLOOR_PERCENTILE = 5
+MARGIN_GRID = np.round(np.arange(0.0, 0.305, 0.01), 2)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _stack(platform_vectors: dict) -> tuple:
+    """(platforms, matrix, row_starts): per platform its centroid row, then its exemplars."""
+    platforms = sorted(platform_vectors)
+    rows, starts = [], []
+    for platform in platforms:
+        exemplars = _normalize(platform_vectors[platform])
+        starts.append(sum(len(r) for r in rows))
+        rows.append(_normalize(exemplars.mean(axis=0)))
+        rows.append(exemplars)
+    return platforms, np.vstack(rows), np.asarray(starts, dtype=np.int64)
+
+
+def _select(scores: np.ndarray, min_score: float, margin: float) -> np.ndarray:
+    """Boolean (n x platforms) mask of the platforms routed to."""
+    best = scores.max(axis=1, keepdims=True)
+    return (scores >= best - margin) & (best >= min_score)
+
+
+def calibrate(scores: np.ndarray, truth: list, platforms: list) -> tuple:
+    """
+    Fits (min_score, margin) on calibration score rows (n x platforms) and their
+    sets of correct platforms: margin maximizes mean F1 of the routed sets
+    (smallest margin on ties), min_score is a low percentile of the scores the
+    correct platforms received.
+    """
+    target = np.zeros(scores.shape, dtype=bool)
+    for i, correct in enumerate(truth):
+        for platform in correct:
+            target[i, platforms.index(platform)] = True
+
+    best_margin, best_f1 = 0.0, -1.0
+    for margin in MARGIN_GRID:
+        picked = _select(scores, -1.0, margin)
+        hits = (picked & target).sum(axis=1)
+        f1 = 2 * hits / (picked.sum(axis=1) + target.sum(axis=1))
+        if f1.mean() > best_f1 + 1e-9:
+            best_margin, best_f1 = float(margin), float(f1.mean())
+
+    min_score = float(np.percentile(scores[target], FLOOR_PERCENTILE)) if target.any() else -1.0
+    return min_score, best_margin
+
+
+class PlatformRouter:
+    def __init__(self, platforms: list, matrix: np.ndarray, row_starts: np.ndarray,
+                 min_score: float = -1.0, margin: float = 0.0, meta: dict = None):
+        self.platforms = list(platforms)
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.row_starts = row_starts
+        self.min_score = min_score
+        self.margin = margin
+        self.meta = meta or {}
+
+    @property
+    def dimension(self) -> int:
+        return self.matrix.shape[1]
+
+    def scores(self, query_vectors) -> np.ndarray:
+        """(n x platforms) best cosine score per platform for each query."""
+        queries = _normalize(query_vectors)
+        if queries.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query dimension {queries.shape[1]} does not match router dimension {self.dimension}"
+            )
+        return np.maximum.reduceat(queries @ self.matrix.T, self.row_starts, axis=1)
+
+    def route_many(self, query_vectors) -> list:
+        """For each query, [(platform, score), ...] best first; [] means abstain."""
+        scores = self.scores(query_vectors)
+        picked = _select(scores, self.min_score, self.margin)
+        routes = []
+        for row, mask in zip(scores, picked):
+            order = np.argsort(-row)
+            routes.append([(self.platforms[j], float(row[j])) for j in order if mask[j]])
+        return routes
+
+    def route(self, query_vector) -> list:
+        return self.route_many(query_vector)[0]
+
+    def save(self, path: str = None) -> str:
+        path = path or PLATFORM_ROUTER_PATH
+        meta = dict(self.meta, min_score=self.min_score, margin=self.margin)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                matrix=self.matrix,
+                row_starts=self.row_starts,
+                platforms=np.asarray(self.platforms),
+                meta=np.asarray(json.dumps(meta)),
+            )
+        return path
+
+    @classmethod
+    def load(cls, path: str = None):
+        with np.load(path or PLATFORM_ROUTER_PATH, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            return cls(
+                platforms=[str(p) for p in data["platforms"]],
+                matrix=data["matrix"],
+                row_starts=data["row_starts"],
+                min_score=meta.pop("min_score"),
+                margin=meta.pop("margin"),
+                meta=meta,
+            )
+
+
+def _leave_one_out_scores(platform_vectors: dict) -> tuple:
+    """Scores of each summary chunk against a router built without that chunk."""
+    rows, truth = [], []
+    for platform, vectors in platform_vectors.items():
+        for i, vector in enumerate(vectors):
+            held_out = dict(platform_vectors)
+            rest = [v for j, v in enumerate(vectors) if j != i]
+            if rest:
+                held_out[platform] = rest
+            else:
+                del held_out[platform]
+            if len(held_out) != len(platform_vectors):
+                continue  # a platform with one chunk cannot be held out
+            platforms, matrix, starts = _stack(held_out)
+            rows.append(PlatformRouter(platforms, matrix, starts).scores(vector)[0])
+            truth.append([platform])
+    return rows, truth
+
+
+def build_platform_router(docs: list, calibration: list = None, embedder_key: str = None,
+                          output_path: str = None) -> PlatformRouter:
+    """
+    Builds and saves the router from embedded summary docs ({ platform,
+    embedding }). calibration is an optional list of (query_vector, [platforms]).
+    """
+    platform_vectors = {}
+    for doc in docs:
+        platform_vectors.setdefault(doc.get("platform", "unknown"), []).append(doc["embedding"])
+    platforms, matrix, starts = _stack(platform_vectors)
+    router = PlatformRouter(platforms, matrix, starts)
+
+    rows, truth = _leave_one_out_scores(platform_vectors)
+    for vector, correct in calibration or []:
+        rows.append(router.scores(vector)[0])
+        truth.append([p for p in correct if p in platforms])
+    if rows:
+        router.min_score, router.margin = calibrate(np.vstack(rows), truth, platforms)
+
+    router.meta = {
+        "embedder": embedder_key,
+        "dimension": router.dimension,
+        "chunks": len(docs),
+        "calibration_queries": len(rows),
+    }
+    path = router.save(output_path)
+    print(
+        f"Platform router saved to {path}: {len(platforms)} platforms, {len(docs)} exemplars, "
+        f"min_score={router.min_score:.3f}, margin={router.margin:.2f}"
+    )
+    return router
+
+
+_router = None
+
+
+def get_platform_router():
+    """The saved router (loaded once per process), or None if it has not been built."""
+    global _router
+    if _router is None and os.path.isfile(PLATFORM_ROUTER_PATH):
+        _router = PlatformRouter.load(PLATFORM_ROUTER_PATH)
+    return _router
+
+
+def route_query(query: str) -> list:
+    """Embeds a question and routes it; [] means abstain (fall back to vector search)."""
+    from embedders import get_embedder
+    from utils.embedding import embed_text
+
+    router = get_platform_router()
+    if router is None:
+        return []
+    expected = router.meta.get("embedder")
+    if expected and expected != get_embedder().cache_key:
+        raise ValueError(
+            f"Platform router was built with embedder '{expected}'; rebuild it for the configured embedder."
+        )
+    return router.route(embed_text(query))
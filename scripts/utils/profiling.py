@@ -0,0 +1,299 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/profiling.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Profiling mode for the index builds (the --profile option of process_*.py).
+#
+# The profiler attaches to the metrics spans (utils/metrics.py) and, per stage
+# (read, chunk, normalize, embed, serialize, upload, ...):
+#   - wall-clock and process CPU seconds
+#   - a cProfile profile of the main thread, exclusive of nested stages
+#   - tracemalloc peak and held allocations per top-level stage, by allocation
+#     site for its first PROFILE_MAX_SNAPSHOTS calls
+# It writes a ranked report plus .pstats files (for pstats, snakeviz, ...) to
+# PROFILE_DIR/<build>-<timestamp>/.
+#
+# Runs offline with the stand-ins:
+#   VECTOR_BACKEND=null EMBEDDING_BACKEND=hash python scripts/process_events.py --profile
+#
+# cProfile and tracemalloc slow everything down; compare stages with each other
+# rather than with normal runs. API-doc chunking runs in-process while profiling
+# (CHUNK_WORKERS is ignored) so the splitter shows up in the profiles.
+#
+#   PROFILE_DIR                  output directory (default profiles)
+#   PROFILE_TOP                  functions/allocation sites in the overall rankings (default 25)
+#   PROFILE_STAGE_TOP            functions/allocation sites per stage (default 8)
+#   PROFILE_MAX_SNAPSHOTS        tracemalloc snapshot diffs per stage (default 3)
+#   PROFILE_TRACEMALLOC_FRAMES   frames kept per allocation (default 1)
+
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from utils.metrics import metrics
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "25"))
+PROFILE_STAGE_TOP = int(os.getenv("PROFILE_STAGE_TOP", "8"))
+PROFILE_MAX_SNAPSHOTS = int(os.getenv("PROFILE_MAX_SNAPSHOTS", "3"))
+PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1"))
+
+OUTSIDE_STAGES = "(outside stages)"
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The profiler's own snapshots and bookkeeping are not allocation sites of the build
+# (skipped when reporting; Snapshot.filter_traces costs more than the snapshot)
+_OWN_FILES = {tracemalloc.__file__, __file__}
+
+
+def stage_key(stage: str, attributes: dict) -> str:
+    index = attributes.get("index")
+    return f"{stage}[{index}]" if index else stage
+
+
+def _short_path(path: str) -> str:
+    if "site-packages" + os.sep in path:
+        return path.split("site-packages" + os.sep, 1)[1]
+    if path.startswith(_REPO_ROOT + os.sep):
+        return os.path.relpath(path, _REPO_ROOT)
+    if path.startswith(sys.prefix):
+        return os.path.basename(path)
+    return path
+
+
+def _function_label(func: tuple) -> str:
+    path, line, name = func
+    if path == "~":  # built-ins
+        return name
+    return f"{_short_path(path)}:{line}({name})"
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3  # bytes on macOS, KiB elsewhere
+
+
+def _site_label(traceback) -> str:
+    return " <- ".join(f"{_short_path(frame.filename)}:{frame.lineno}" for frame in reversed(traceback))
+
+
+class StageProfile:
+    def __init__(self, key: str):
+        self.key = key
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.top_level = False
+        self.memory_tracked = False
+        self.peak_bytes = 0
+        self.net_bytes = 0
+        self.snapshots = 0
+        self.sites = {}  # traceback -> [bytes, blocks], summed over snapshots
+        self.profile = cProfile.Profile()
+        self.stats = None  # pstats.Stats, once stopped
+
+
+class BuildProfiler:
+    """
+    Per-stage CPU and allocation profiles of one build, reported on stop().
+
+    Tracing restarts at every top-level stage boundary, so a stage's snapshot
+    only holds what that stage allocated and still held when it ended. Whole-heap
+    snapshot diffs would cost gigabytes once the embeddings are in memory.
+    """
+
+    def __init__(self, name: str, out_dir: str = None):
+        self.name = name
+        self.out_dir = os.path.join(out_dir or PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        self.stages = {OUTSIDE_STAGES: StageProfile(OUTSIDE_STAGES)}
+        self._stack = []  # (key, cpu at entry)
+        self._thread = None
+        self._overhead = 0.0  # seconds spent in snapshots and restarting tracemalloc
+        self._overhead_cpu = 0.0
+
+    def _active(self) -> StageProfile:
+        return self.stages[self._stack[-1][0] if self._stack else OUTSIDE_STAGES]
+
+    @contextmanager
+    def _overhead_timer(self):
+        started, started_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._overhead += time.perf_counter() - started
+            self._overhead_cpu += time.process_time() - started_cpu
+
+    def _begin_segment(self):
+        with self._overhead_timer():
+            tracemalloc.stop()  # drops the traces of the previous segment
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+
+    def _end_segment(self, current: StageProfile):
+        traced, peak = tracemalloc.get_traced_memory()
+        current.memory_tracked = True
+        current.net_bytes += traced
+        current.peak_bytes = max(current.peak_bytes, peak)
+        if current.snapshots >= PROFILE_MAX_SNAPSHOTS:
+            return
+        current.snapshots += 1
+        with self._overhead_timer():
+            for stat in tracemalloc.take_snapshot().statistics("traceback"):
+                if stat.traceback[-1].filename in _OWN_FILES:
+                    continue
+                site = current.sites.setdefault(stat.traceback, [0, 0])
+                site[0] += stat.size
+                site[1] += stat.count
+
+    def start(self):
+        self._thread = threading.get_ident()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+        metrics.listeners.append(self)
+        self._active().profile.enable()
+
+    def span_started(self, stage: str, attributes: dict):
+        if threading.get_ident() != self._thread:
+            return  # worker threads count towards wall/CPU of the span that waits on them
+        self._active().profile.disable()
+        key = stage_key(stage, attributes)
+        current = self.stages.get(key)
+        if current is None:
+            current = self.stages[key] = StageProfile(key)
+        if not self._stack:
+            current.top_level = True
+            self._end_segment(self.stages[OUTSIDE_STAGES])
+            self._begin_segment()
+        self._stack.append((key, time.process_time()))
+        current.profile.enable()
+
+    def span_finished(self, stage: str, attributes: dict, duration: float):
+        if threading.get_ident() != self._thread or not self._stack:
+            return
+        key, cpu_start = self._stack.pop()
+        current = self.stages[key]
+        current.profile.disable()
+        current.calls += 1
+        current.wall += duration
+        current.cpu += time.process_time() - cpu_start
+        if not self._stack:
+            self._end_segment(current)
+            self._begin_segment()
+        self._active().profile.enable()
+
+    def stop(self) -> str:
+        """Detaches, writes the report and .pstats files, prints the report; returns the report path."""
+        self._active().profile.disable()
+        metrics.listeners.remove(self)
+        outside = self.stages[OUTSIDE_STAGES]
+        self._end_segment(outside)
+        tracemalloc.stop()
+        wall = time.perf_counter() - self._start_wall
+        cpu = time.process_time() - self._start_cpu
+
+        outside.calls = 1
+        # Profiler overhead is spent between stages; it is reported on its own
+        outside.wall = wall - self._overhead - sum(s.wall for s in self.stages.values() if s.top_level)
+        outside.cpu = cpu - self._overhead_cpu - sum(s.cpu for s in self.stages.values() if s.top_level)
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        total = pstats.Stats()
+        for current in self.stages.values():
+            current.profile.create_stats()
+            if not current.profile.stats:
+                continue
+            # Stats() takes over (and clears) the profile's data
+            current.stats = pstats.Stats(current.profile)
+            file_name = "stage-" + "".join(c if c.isalnum() or c in "-_" else "_" for c in current.key) + ".pstats"
+            current.stats.dump_stats(os.path.join(self.out_dir, file_name))
+            total.add(current.stats)
+        total.dump_stats(os.path.join(self.out_dir, "total.pstats"))
+
+        report = self._report(wall, cpu, total)
+        report_path = os.path.join(self.out_dir, "report.txt")
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(report)
+        print(report)
+        print(f"Wrote profile report and .pstats files to {self.out_dir}")
+        return report_path
+
+    def _report(self, wall: float, cpu: float, total: pstats.Stats) -> str:
+        out = io.StringIO()
+        out.write(f"Profile of '{self.name}': {wall:.2f}s wall, {cpu:.2f}s CPU, peak RSS {_peak_rss_mb():.0f} MB "
+                  f"(profiler snapshots took {self._overhead:.2f}s of it, excluded below)\n\n")
+
+        out.write("Stages (wall/CPU include nested stages; CPU counts all threads; "
+                  "held = allocated in the stage and still held at its end)\n")
+        out.write(f"{'stage':<40}{'calls':>7}{'wall s':>10}{'cpu s':>10}{'cpu %':>7}{'held MB':>9}{'peak MB':>9}\n")
+        for current in sorted(self.stages.values(), key=lambda s: -s.wall):
+            if not current.calls:
+                continue
+            cpu_pct = 100 * current.cpu / current.wall if current.wall > 0 else 0
+            memory = (f"{current.net_bytes / 1e6:>9.1f}{current.peak_bytes / 1e6:>9.1f}"
+                      if current.memory_tracked else f"{'':>9}{'':>9}")
+            out.write(f"{current.key:<40}{current.calls:>7}{current.wall:>10.3f}{current.cpu:>10.3f}"
+                      f"{cpu_pct:>6.0f}%{memory}\n")
+
+        out.write("\nHottest functions, all stages (main thread, by own time)\n")
+        out.write(self._functions(total, PROFILE_TOP))
+
+        sites = [(size, count, current.key, traceback)
+                 for current in self.stages.values()
+                 for traceback, (size, count) in current.sites.items()]
+        out.write("\nLargest allocation sites (held at the end of their stage, first "
+                  f"{PROFILE_MAX_SNAPSHOTS} calls of each stage)\n")
+        out.write(self._sites(sites, PROFILE_TOP, with_stage=True))
+
+        for current in sorted(self.stages.values(), key=lambda s: -s.wall):
+            if current.stats is None:
+                continue
+            out.write(f"\n{current.key}: hottest functions\n")
+            out.write(self._functions(current.stats, PROFILE_STAGE_TOP))
+            if current.sites:
+                out.write(f"{current.key}: largest allocation sites (first {current.snapshots} calls)\n")
+                out.write(self._sites([(size, count, current.key, traceback)
+                                       for traceback, (size, count) in current.sites.items()], PROFILE_STAGE_TOP))
+        return out.getvalue()
+
+    @staticmethod
+    def _sites(sites: list, top: int, with_stage: bool = False) -> str:
+        lines = []
+        for size, count, key, traceback in sorted(sites, key=lambda site: -site[0])[:top]:
+            stage = f"{key:<32}" if with_stage else ""
+            lines.append(f"  {size / 1e6:>10.2f} MB {count:>10} blocks  {stage}{_site_label(traceback)}\n")
+        return "".join(lines)
+
+    @staticmethod
+    def _functions(stats: pstats.Stats, top: int) -> str:
+        rows = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:top]
+        lines = [f"  {'own s':>9}{'cum s':>9}{'calls':>11}  function\n"]
+        for func, (_, calls, own, cumulative, _) in rows:
+            lines.append(f"  {own:>9.3f}{cumulative:>9.3f}{calls:>11}  {_function_label(func)}\n")
+        return "".join(lines)
+
+
+@contextmanager
+def profiled(name: str, out_dir: str = None):
+    """Profiles the block into out_dir (the --profile option); a no-op when out_dir is None."""
+    if not out_dir:
+        yield None
+        return
+    profiler = BuildProfiler(name, out_dir)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
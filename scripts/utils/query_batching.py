@@ -0,0 +1,112 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/query_batching.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# asyncio helpers for serving many concurrent retrieval requests
+# (scripts/retrieval_server.py):
+#
+#   Coalescer         identical in-flight requests share one computation
+#   EmbeddingBatcher  query texts arriving within QUERY_BATCH_WINDOW_MS of each
+#                     other (up to QUERY_BATCH_MAX) are embedded in one call
+#
+# The embedder and vector backends are blocking, so the batched embedding call
+# runs on an executor thread and the event loop keeps accepting requests.
+
+import os
+import asyncio
+
+from utils.metrics import observe
+
+QUERY_BATCH_WINDOW_MS = float(os.getenv("QUERY_BATCH_WINDOW_MS", "2"))
+QUERY_BATCH_MAX = int(os.getenv("QUERY_BATCH_MAX", "64"))
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Coalescer:
+    """Shares one in-flight computation among concurrent callers with the same key."""
+
+    def __init__(self):
+        self._inflight = {}  # key -> task
+        self.started = 0
+        self.joined = 0
+
+    async def run(self, key, factory):
+        """Awaits factory() for key, or the call already in flight for it."""
+        task = self._inflight.get(key)
+        if task is None:
+            self.started += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.joined += 1
+        # Shielded, so one caller disconnecting does not cancel the others' result
+        return await asyncio.shield(task)
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batches query embeddings across concurrent requests. embed_fn(texts)
+    is a blocking batch embedder (e.g. utils.embedding.embed_texts); duplicate
+    texts within a window are embedded once.
+    """
+
+    def __init__(self, embed_fn, executor=None, window_ms: float = None, max_batch: int = None):
+        self.embed_fn = embed_fn
+        self.executor = executor
+        self.window = (QUERY_BATCH_WINDOW_MS if window_ms is None else window_ms) / 1000.0
+        self.max_batch = max_batch or QUERY_BATCH_MAX
+        self._pending = {}  # text -> future
+        self._timer = None
+        self.batches = 0
+        self.texts = 0
+        self.largest = 0
+
+    async def embed(self, text: str) -> list:
+        loop = asyncio.get_running_loop()
+        future = self._pending.get(text)
+        if future is None:
+            future = self._pending[text] = loop.create_future()
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: dict):
+        texts = list(batch)
+        self.batches += 1
+        self.texts += len(texts)
+        self.largest = max(self.largest, len(texts))
+        observe("query_embed_batch_size", len(texts), buckets=BATCH_SIZE_BUCKETS)
+        try:
+            vectors = await asyncio.get_running_loop().run_in_executor(self.executor, self.embed_fn, texts)
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for text, vector in zip(texts, vectors):
+            if not batch[text].done():
+                batch[text].set_result(vector)
+
+    def stats(self) -> dict:
+        return {
+            "embed_batches": self.batches,
+            "embedded_queries": self.texts,
+            "mean_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest,
+        }
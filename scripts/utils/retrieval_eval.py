@@ -0,0 +1,211 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/retrieval_eval.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Retrieval evaluation: golden query sets, an exact (brute-force) cosine
+# baseline, HNSW configurations, and the metrics used to compare them.
+#
+# Golden queries are { "query", "index", "relevant": [doc ids] }. They are seeded
+# from the example prompts in lob_samples/README.md (relevant = record ids named
+# in the answer excerpt) and from the domain summaries; the seeded set can be
+# written to JSON, extended by hand and passed back in.
+#
+# HNSW runs use hnswlib (pip install hnswlib), the same algorithm and parameters
+# (m, ef_construction, ef_search) the vector backends expose.
+
+import os
+import re
+import time
+import tempfile
+
+import numpy as np
+
+_SECTION_RE = re.compile(r"^##\s+(.+?)\s*$")
+_PROMPT_RE = re.compile(r"^\*\*Prompt\*\*:\s*[“\"](.+?)[”\"]\s*$")
+_RECORD_ID_RE = re.compile(r"\b[A-Z][A-Z0-9]*-\d+[A-Z0-9]*\b")
+
+
+def lob_folder_for_section(title: str) -> str:
+    """'Consumer Electronics' -> 'consumer-electronics' (the lob_samples folder name)."""
+    return re.sub(r"\s+", "-", title.strip()).lower()
+
+
+def seed_lob_queries(readme_path: str, record_ids: dict) -> list:
+    """
+    Golden queries from the README prompts. record_ids is { folder: set(ids) };
+    only ids that exist in that folder count as relevant, and prompts whose
+    answer names no known record are skipped.
+    """
+    with open(readme_path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+
+    queries = []
+    folder = None
+    for i, line in enumerate(lines):
+        section = _SECTION_RE.match(line)
+        if section:
+            folder = lob_folder_for_section(section.group(1))
+            continue
+        prompt = _PROMPT_RE.match(line.strip())
+        if not prompt or folder not in record_ids:
+            continue
+        # The answer excerpt follows the prompt, up to the follow-up line
+        answer = []
+        for following in lines[i + 1 : i + 6]:
+            if following.startswith("**Follow-Up**"):
+                break
+            answer.append(following)
+        relevant = []
+        for rid in _RECORD_ID_RE.findall(" ".join(answer)):
+            if rid in record_ids[folder] and rid not in relevant:
+                relevant.append(rid)
+        if relevant:
+            queries.append({"query": prompt.group(1), "index": f"lob-{folder}", "relevant": relevant})
+    return queries
+
+
+def seed_summary_queries(summaries: list, index_name: str) -> list:
+    """One query per domain summary: its opening sentence, relevant = that summary."""
+    queries = []
+    for summary in summaries:
+        content = summary.get("content", "")
+        first = re.split(r"(?<=[.!?])\s", content.strip(), maxsplit=1)[0]
+        if first:
+            queries.append({"query": first, "index": index_name, "relevant": [summary["id"]]})
+    return queries
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile (q in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(np.ceil(q / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def recall_at_k(retrieved: list, relevant: list, k: int) -> float:
+    if not relevant:
+        return 0.0
+    top = set(retrieved[:k])
+    return sum(1 for r in relevant if r in top) / len(relevant)
+
+
+def reciprocal_rank(retrieved: list, relevant: list) -> float:
+    relevant = set(relevant)
+    for rank, doc_id in enumerate(retrieved, start=1):
+        if doc_id in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def _dedupe_ids(rows: list, doc_ids: list, k: int) -> list:
+    # Several chunks can share a document id; rank by the best chunk
+    seen = []
+    for row in rows:
+        doc_id = doc_ids[row]
+        if doc_id not in seen:
+            seen.append(doc_id)
+            if len(seen) == k:
+                break
+    return seen
+
+
+class ExactIndex:
+    """Brute-force cosine search; the ground truth for ANN recall."""
+
+    name = "exact"
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+        self.build_seconds = 0.0
+
+    def search(self, query: np.ndarray, k: int) -> list:
+        scores = self.vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])].tolist()
+
+    def memory_bytes(self) -> int:
+        return int(self.vectors.nbytes)
+
+
+class HnswIndex:
+    def __init__(self, vectors: np.ndarray, m: int, ef_construction: int, ef_search: int, seed: int = 100):
+        try:
+            import hnswlib
+        except ImportError as exc:
+            raise ImportError("HNSW sweeps need hnswlib (pip install hnswlib)") from exc
+
+        self.m, self.ef_construction, self.ef_search = m, ef_construction, ef_search
+        self.name = f"hnsw m={m} efC={ef_construction} efS={ef_search}"
+        start = time.perf_counter()
+        self.index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+        self.index.init_index(max_elements=len(vectors), M=m, ef_construction=ef_construction, random_seed=seed)
+        self.index.add_items(vectors, np.arange(len(vectors)), num_threads=1)
+        self.build_seconds = time.perf_counter() - start
+        self.index.set_num_threads(1)
+
+    def search(self, query: np.ndarray, k: int) -> list:
+        k = min(k, self.index.get_current_count())
+        self.index.set_ef(max(self.ef_search, k))
+        labels, _ = self.index.knn_query(query, k=k)
+        return labels[0].tolist()
+
+    def memory_bytes(self) -> int:
+        # The serialized graph is the in-memory layout (vectors + links per level)
+        fd, path = tempfile.mkstemp(suffix=".hnsw")
+        os.close(fd)
+        try:
+            self.index.save_index(path)
+            return os.path.getsize(path)
+        finally:
+            os.remove(path)
+
+
+def evaluate(index, query_vectors: np.ndarray, queries: list, doc_ids: list, k: int,
+             exact_rows: list = None, fetch: int = None) -> dict:
+    """
+    Runs every query one at a time against index and returns recall@k / MRR
+    against the golden ids, ANN recall@k against the exact rows (when given),
+    latency percentiles, build time and memory. fetch (default 3*k) is how many
+    chunks are retrieved before collapsing to k document ids.
+    """
+    fetch = fetch or 3 * k
+    latencies, recalls, rrs, ann_recalls, rows_per_query = [], [], [], [], []
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        rows = index.search(query_vectors[i], fetch)
+        latencies.append((time.perf_counter() - start) * 1000)
+        rows_per_query.append(rows)
+
+        retrieved = _dedupe_ids(rows, doc_ids, k)
+        recalls.append(recall_at_k(retrieved, query["relevant"], k))
+        rrs.append(reciprocal_rank(retrieved, query["relevant"]))
+        if exact_rows is not None:
+            truth = set(exact_rows[i][:k])
+            ann_recalls.append(len(truth & set(rows[:k])) / max(1, len(truth)))
+
+    n = max(1, len(queries))
+    return {
+        "config": index.name,
+        f"recall@{k}": sum(recalls) / n,
+        "mrr": sum(rrs) / n,
+        f"ann_recall@{k}": (sum(ann_recalls) / n) if exact_rows is not None else 1.0,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "build_s": index.build_seconds,
+        "memory_mb": index.memory_bytes() / 1e6,
+        "rows": rows_per_query,
+    }
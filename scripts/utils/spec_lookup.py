@@ -0,0 +1,278 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/spec_lookup.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Compiles an OpenAPI 3 / Swagger 2 spec into a compact lookup file:
+#   - operationId hash map
+#   - path-template trie (method + concrete or templated path)
+#   - tag index
+#   - operations and component schemas with every $ref resolved
+#     (each ref is resolved once and memoized at build time)
+#
+# File layout:  MAGIC | u64 header length | JSON header | schema + operation blobs
+# The header holds the maps and (offset, length) pointers into the blob area,
+# so loading only parses the header and each operation is decoded on demand
+# straight out of a memory-mapped file.
+
+import os
+import re
+import json
+import mmap
+import struct
+from functools import lru_cache
+
+SPEC_LOOKUP_DIR = os.getenv("SPEC_LOOKUP_DIR", "spec_lookups")
+
+_MAGIC = b"SPECLKv1"
+_HTTP_METHODS = ("get", "put", "post", "delete", "patch", "head", "options", "trace")
+# '{networkId}' (OpenAPI) or ':floorId' (as used in the Spaces Swagger paths)
+_TEMPLATE_RE = re.compile(r"^(\{[^}]+\}|:[A-Za-z_]\w*)$")
+
+# Trie node keys that cannot collide with path segments
+_WILDCARD = "{}"
+_LEAF = "#"
+
+
+class _RefResolver:
+    """Resolves local JSON pointers ('#/components/schemas/X', '#/definitions/X', ...)."""
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.cache = {}
+
+    def _pointer(self, ref: str):
+        node = self.spec
+        for part in ref.lstrip("#/").split("/"):
+            part = part.replace("~1", "/").replace("~0", "~")
+            node = node[part]
+        return node
+
+    def resolve(self, node, stack=()):
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str) and ref.startswith("#/"):
+                if ref in stack:
+                    # Recursive schema: leave a marker instead of expanding forever
+                    return {"$ref": ref, "x-circular": True}
+                if ref not in self.cache:
+                    self.cache[ref] = self.resolve(self._pointer(ref), stack + (ref,))
+                return self.cache[ref]
+            return {key: self.resolve(value, stack) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self.resolve(item, stack) for item in node]
+        return node
+
+
+def _base_path(spec: dict) -> str:
+    """Swagger 2 'basePath' or the path part of the first OpenAPI 3 server URL."""
+    if spec.get("basePath"):
+        return spec["basePath"].rstrip("/")
+    servers = spec.get("servers") or []
+    if servers:
+        url = servers[0].get("url", "")
+        for name, variable in (servers[0].get("variables") or {}).items():
+            url = url.replace("{" + name + "}", str(variable.get("default", "")))
+        path = re.sub(r"^[a-z]+://[^/]+", "", url)
+        return "/" + path.strip("/") if path.strip("/") else ""
+    return ""
+
+
+def _segments(path: str) -> list:
+    return [segment for segment in path.split("/") if segment]
+
+
+def compile_spec(spec: dict, platform: str = "") -> tuple:
+    """
+    Compiles a parsed spec into (header, blob) ready to be written by save_spec_lookup().
+    """
+    resolver = _RefResolver(spec)
+    header = {
+        "platform": platform,
+        "title": spec.get("info", {}).get("title", ""),
+        "version": spec.get("info", {}).get("version", ""),
+        "base_path": _base_path(spec),
+        "operations": {},   # "METHOD /path" -> [offset, length]
+        "operation_ids": {},  # operationId -> "METHOD /path"
+        "tags": {},         # tag -> ["METHOD /path", ...]
+        "schemas": {},      # schema name -> [offset, length]
+        "trie": {},
+    }
+    blob = bytearray()
+
+    schemas = spec.get("components", {}).get("schemas") or spec.get("definitions") or {}
+    schema_root = "#/components/schemas/" if "components" in spec else "#/definitions/"
+    for name in schemas:
+        resolved = resolver.resolve({"$ref": schema_root + name.replace("~", "~0").replace("/", "~1")})
+        payload = json.dumps(resolved, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        header["schemas"][name] = [len(blob), len(payload)]
+        blob.extend(payload)
+
+    for path, path_item in spec.get("paths", {}).items():
+        shared_params = path_item.get("parameters", [])
+        for method, operation in path_item.items():
+            if method not in _HTTP_METHODS or not isinstance(operation, dict):
+                continue
+            key = f"{method.upper()} {path}"
+
+            resolved = resolver.resolve(operation)
+            if shared_params:
+                own = {(p.get("name"), p.get("in")) for p in resolved.get("parameters", [])}
+                inherited = [
+                    p for p in resolver.resolve(shared_params)
+                    if (p.get("name"), p.get("in")) not in own
+                ]
+                resolved["parameters"] = inherited + resolved.get("parameters", [])
+            record = dict(resolved, method=method.upper(), path=path)
+
+            payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            header["operations"][key] = [len(blob), len(payload)]
+            blob.extend(payload)
+
+            if operation.get("operationId"):
+                header["operation_ids"][operation["operationId"]] = key
+            for tag in operation.get("tags", []):
+                header["tags"].setdefault(tag, []).append(key)
+
+            node = header["trie"]
+            for segment in _segments(path):
+                node = node.setdefault(_WILDCARD if _TEMPLATE_RE.match(segment) else segment, {})
+            node.setdefault(_LEAF, {})[method.upper()] = key
+
+    return header, bytes(blob)
+
+
+def save_spec_lookup(header: dict, blob: bytes, path: str):
+    encoded = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(encoded)
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class SpecLookup:
+    """
+    Read side of a compiled spec. Operations are sliced out of the memory-mapped
+    file and decoded on first use.
+
+    Example:
+        lookup = SpecLookup.load("spec_lookups/meraki.speclk")
+        lookup.by_operation_id("getNetworkClients")
+        lookup.by_method_path("GET", "/api/v1/networks/N_123/clients")
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(_MAGIC)] != _MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a compiled spec lookup file")
+        (header_len,) = struct.unpack_from("<Q", self._mmap, len(_MAGIC))
+        header_start = len(_MAGIC) + 8
+        self.header = json.loads(self._mmap[header_start:header_start + header_len].decode("utf-8"))
+        self._blob_start = header_start + header_len
+        self._base_segments = _segments(self.header.get("base_path", ""))
+        self.operation = lru_cache(maxsize=1024)(self._operation)
+        self.schema = lru_cache(maxsize=1024)(self._schema)
+
+    @classmethod
+    def load(cls, path: str) -> "SpecLookup":
+        return cls(path)
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def platform(self) -> str:
+        return self.header.get("platform", "")
+
+    def _read(self, entry):
+        start = self._blob_start + entry[0]
+        return json.loads(self._mmap[start:start + entry[1]].decode("utf-8"))
+
+    def _operation(self, key: str):
+        entry = self.header["operations"].get(key)
+        return self._read(entry) if entry else None
+
+    def _schema(self, name: str):
+        entry = self.header["schemas"].get(name)
+        return self._read(entry) if entry else None
+
+    def by_operation_id(self, operation_id: str):
+        key = self.header["operation_ids"].get(operation_id)
+        return self.operation(key) if key else None
+
+    def by_tag(self, tag: str) -> list:
+        return [self.operation(key) for key in self.header["tags"].get(tag, [])]
+
+    def match_path(self, method: str, path: str):
+        """
+        Walks the trie one segment at a time (literal first, then template) and
+        returns the 'METHOD /template' key, or None. Accepts templated paths,
+        concrete paths, and paths that still carry the spec's base path.
+        """
+        segments = _segments(path.split("?", 1)[0])
+        method = method.upper()
+
+        def walk(node, i):
+            if i == len(segments):
+                return node.get(_LEAF, {}).get(method)
+            segment = segments[i]
+            if _TEMPLATE_RE.match(segment):
+                child = node.get(_WILDCARD)
+                return walk(child, i + 1) if child is not None else None
+            for child in (node.get(segment), node.get(_WILDCARD)):
+                if child is not None:
+                    found = walk(child, i + 1)
+                    if found:
+                        return found
+            return None
+
+        # Strip as much of the base path as the request carries; some specs
+        # (Spaces) repeat the tail of basePath ('/v2') in their path keys.
+        base = self._base_segments
+        for i in range(len(base), 0, -1):
+            if segments[:i] == base[:i]:
+                found = walk(self.header["trie"], i)
+                if found:
+                    return found
+        return walk(self.header["trie"], 0)
+
+    def by_method_path(self, method: str, path: str):
+        key = self.match_path(method, path)
+        return self.operation(key) if key else None
+
+
+def spec_lookup_path(platform: str, spec_file: str) -> str:
+    name = os.path.splitext(os.path.basename(spec_file))[0]
+    return os.path.join(SPEC_LOOKUP_DIR, platform, f"{name}.speclk")
+
+
+def build_spec_lookup(spec_file: str, platform: str, output_path: str = None) -> str:
+    """Compiles one spec file and writes its lookup file. Returns the output path."""
+    with open(spec_file, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    header, blob = compile_spec(spec, platform=platform)
+    output_path = output_path or spec_lookup_path(platform, spec_file)
+    save_spec_lookup(header, blob, output_path)
+    print(
+        f"Compiled {spec_file}: {len(header['operations'])} operations, "
+        f"{len(header['operation_ids'])} operationIds, {len(header['tags'])} tags, "
+        f"{len(header['schemas'])} schemas -> {output_path}"
+    )
+    return output_path
@@ -0,0 +1,438 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/spec_versions.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Version-aware indexing of the OpenAPI / Swagger specs under <platform>/api-specs.
+#
+# A spec is indexed as units rather than as one opaque text: one unit per
+# operation ('operation GET /networks/{networkId}'), one per component schema
+# ('schema Device') and one for the rest of the document ('spec': info,
+# servers, tags, security, ...). Each unit is chunked on its own, and every
+# doc carries the spec's info.version as `api_version`, so several versions of
+# an API can be indexed side by side and filtered.
+#
+# SPEC_VERSIONS_DIR/state.json records, per physical index and spec file, the
+# unit hashes of every indexed version (oldest first), and a copy of each
+# indexed spec is archived next to it. A sync diffs the spec on disk against
+# the indexed version with the same api_version, or the newest one:
+#
+#   same api_version   added/changed units are upserted, removed ones deleted
+#   new api_version    the version is indexed alongside the previous ones, and
+#                      versions beyond SPEC_KEEP_VERSIONS are deleted
+#
+# Chunk vectors go through the embedding cache (EMBEDDING_CACHE_PATH, or
+# SPEC_EMBEDDING_CACHE_PATH when that is unset). A unit that did not change
+# has the same chunk texts in the new version, so only changed units are
+# embedded; the others are re-tagged with cached vectors.
+
+import os
+import glob
+import json
+import uuid
+import shutil
+import hashlib
+from functools import lru_cache
+
+from embedders import get_embedder
+from utils.chunking import chunk_file
+from utils.embedding import embed_texts
+from utils.embedding_cache import EmbeddingCache, get_embedding_cache, text_key
+from utils.lexical_index import LexicalIndex, build_lexical_index, lexical_index_path, snapshot_fields
+from utils.spec_lookup import _HTTP_METHODS
+
+SPEC_VERSIONS_DIR = os.getenv("SPEC_VERSIONS_DIR", "spec_versions")
+SPEC_KEEP_VERSIONS = int(os.getenv("SPEC_KEEP_VERSIONS", "1"))
+SPEC_EMBEDDING_CACHE_PATH = os.getenv("SPEC_EMBEDDING_CACHE_PATH", "spec_embedding_cache.db")
+
+# Namespace for spec document ids (uuid5 of spec, version, unit and chunk number)
+SPEC_DOC_NAMESPACE = uuid.UUID("0d6c2f7e-8a4b-4c1d-b5e3-9f2a7c1e4d58")
+
+def _compact(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def spec_id(path: str, platform: str) -> str:
+    """Stable identity of a spec file: '<platform>/<file name>'."""
+    return f"{platform}/{os.path.basename(path)}"
+
+
+def api_version(spec: dict) -> str:
+    return str((spec.get("info") or {}).get("version") or "unversioned")
+
+
+def spec_units(spec: dict) -> dict:
+    """{ unit key: compact JSON text } for a parsed spec, in document order."""
+    components = spec.get("components") if isinstance(spec.get("components"), dict) else {}
+    schemas = components.get("schemas") or spec.get("definitions") or {}
+
+    rest = {key: value for key, value in spec.items() if key not in ("paths", "definitions", "components")}
+    other_components = {key: value for key, value in components.items() if key != "schemas"}
+    if other_components:
+        rest["components"] = other_components
+    units = {"spec": _compact(rest)}
+
+    for path, path_item in (spec.get("paths") or {}).items():
+        shared_params = path_item.get("parameters", [])
+        for method, operation in path_item.items():
+            if method not in _HTTP_METHODS or not isinstance(operation, dict):
+                continue
+            record = dict({"method": method.upper(), "path": path}, **operation)
+            if shared_params:
+                own = {(p.get("name"), p.get("in")) for p in operation.get("parameters", [])}
+                inherited = [p for p in shared_params if (p.get("name"), p.get("in")) not in own]
+                record["parameters"] = inherited + operation.get("parameters", [])
+            units[f"operation {method.upper()} {path}"] = _compact(record)
+
+    for name, schema in schemas.items():
+        units[f"schema {name}"] = _compact({"schema": name, "definition": schema})
+    return units
+
+
+def unit_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=4)
+def _load_units(path: str, mtime: float) -> tuple:
+    # Cached per process, so the work units of one spec parse it once
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    return api_version(spec), spec_units(spec)
+
+
+def load_spec_units(path: str) -> tuple:
+    """(api_version, { unit key: text }) of a spec file."""
+    return _load_units(path, os.path.getmtime(path))
+
+
+def spec_doc_id(spec: str, version: str, key: str, n: int) -> str:
+    return str(uuid.uuid5(SPEC_DOC_NAMESPACE, f"{spec}|{version}|{key}|{n}"))
+
+
+def unit_docs(spec: str, platform: str, version: str, key: str, text: str,
+              chunk_size: int = 1000, chunk_overlap: int = 200) -> list:
+    """Upload-ready (unembedded) docs for one unit of one spec version."""
+    return [
+        {
+            "id": spec_doc_id(spec, version, key, n),
+            "content": chunk,
+            "platform": platform,
+            "doc_type": "api-specs",
+            "api_version": version,
+        }
+        for n, chunk in enumerate(chunk_file(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap))
+    ]
+
+
+def spec_docs(path: str, platform: str, start: int = 0, end: int = None) -> list:
+    """Docs of the spec file's units [start:end] (all by default), for its current version."""
+    version, units = load_spec_units(path)
+    spec = spec_id(path, platform)
+    docs = []
+    for key in list(units)[start:end]:
+        docs.extend(unit_docs(spec, platform, version, key, units[key]))
+    return docs
+
+
+def _unit_kind(key: str) -> str:
+    return key.split(" ", 1)[0]
+
+
+class SpecDiff:
+    """Unit-level differences between two versions of a spec ({ key: hash } each)."""
+
+    def __init__(self, old: dict, new: dict, old_version: str = None, new_version: str = None):
+        self.old_version = old_version
+        self.new_version = new_version
+        self.added = [key for key in new if key not in old]
+        self.removed = [key for key in old if key not in new]
+        self.changed = [key for key in new if key in old and old[key] != new[key]]
+        self.unchanged = len(new) - len(self.added) - len(self.changed)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def count(self, kind: str) -> tuple:
+        """(added, removed, changed) units of one kind ('operation', 'schema' or 'spec')."""
+        return tuple(
+            sum(1 for key in keys if _unit_kind(key) == kind)
+            for keys in (self.added, self.removed, self.changed)
+        )
+
+    def summary(self) -> str:
+        if self.new_version is None:
+            return f"{self.old_version}: spec removed ({len(self.removed)} units)"
+        versions = (f"{self.old_version} -> {self.new_version}" if self.old_version
+                    else f"new at {self.new_version}")
+        parts = []
+        for kind in ("operation", "schema"):
+            added, removed, changed = self.count(kind)
+            parts.append(f"{kind}s +{added} -{removed} ~{changed}")
+        if self.old_version and any(self.count("spec")):
+            parts.append("spec-level fields changed")
+        return f"{versions}: {', '.join(parts)}; {self.unchanged} units unchanged"
+
+    def details(self, limit: int = 20) -> list:
+        """'+ operation GET /x' style lines (added, removed, changed), at most limit per group."""
+        lines = []
+        for sign, keys in (("+", self.added), ("-", self.removed), ("~", self.changed)):
+            lines.extend(f"{sign} {key}" for key in keys[:limit])
+            if len(keys) > limit:
+                lines.append(f"{sign} ... {len(keys) - limit} more")
+        return lines
+
+
+class SpecVersionState:
+    """
+    { physical index: { spec id: [ { api_version, sha, archive, units: { key: [hash, chunks] } } ] } },
+    versions oldest first, persisted as SPEC_VERSIONS_DIR/state.json.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or SPEC_VERSIONS_DIR
+        self.path = os.path.join(self.root, "state.json")
+        self.indexes = {}
+        if os.path.isfile(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.indexes = json.load(f)
+
+    def versions(self, index_name: str, spec: str) -> list:
+        return self.indexes.get(index_name, {}).get(spec, [])
+
+    def specs(self, index_name: str) -> list:
+        return sorted(self.indexes.get(index_name, {}))
+
+    def set_versions(self, index_name: str, spec: str, versions: list):
+        specs = self.indexes.setdefault(index_name, {})
+        if versions:
+            specs[spec] = versions
+        else:
+            specs.pop(spec, None)
+
+    def archive(self, path: str, spec: str, version: str) -> str:
+        """Copies the spec file into the archive; returns the archive path (relative to root)."""
+        relative = os.path.join("archive", spec.split("/", 1)[0], version, os.path.basename(path))
+        target = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, target)
+        return relative
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.indexes, f)
+        os.replace(tmp, self.path)
+
+        # Archived specs no index version refers to any more
+        referenced = {
+            os.path.normpath(entry["archive"])
+            for specs in self.indexes.values() for versions in specs.values() for entry in versions
+        }
+        archive_root = os.path.join(self.root, "archive")
+        for dirpath, _, filenames in os.walk(archive_root, topdown=False):
+            for name in filenames:
+                relative = os.path.normpath(os.path.relpath(os.path.join(dirpath, name), self.root))
+                if relative not in referenced:
+                    os.remove(os.path.join(dirpath, name))
+            if dirpath != archive_root and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+
+
+def _file_sha(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _entry_ids(spec: str, entry: dict, keys=None) -> list:
+    units = entry["units"]
+    return [
+        spec_doc_id(spec, entry["api_version"], key, n)
+        for key in (units if keys is None else keys) for n in range(units[key][1])
+    ]
+
+
+def plan_spec_sync(path: str, platform: str, state: SpecVersionState, index_name: str,
+                   keep: int = None) -> dict:
+    """
+    Works out what syncing one spec file into index_name (a physical index)
+    takes, without touching the index. Returns None when the file is unchanged,
+    else { spec, diff, upserts: [docs], deletes: [ids], versions: new state entries }.
+    """
+    keep = max(1, keep or SPEC_KEEP_VERSIONS)
+    spec = spec_id(path, platform)
+    versions = state.versions(index_name, spec)
+
+    if not os.path.isfile(path):
+        if not versions:
+            return None
+        # The file is gone: every indexed version of it goes too
+        deletes = [doc_id for entry in versions for doc_id in _entry_ids(spec, entry)]
+        latest = versions[-1]
+        diff = SpecDiff({key: value[0] for key, value in latest["units"].items()}, {}, latest["api_version"], None)
+        return {"spec": spec, "path": path, "diff": diff, "upserts": [], "deletes": deletes, "versions": []}
+
+    sha = _file_sha(path)
+    if versions and versions[-1]["sha"] == sha:
+        return None
+
+    version, units = load_spec_units(path)
+    hashes = {key: unit_hash(text) for key, text in units.items()}
+    latest = versions[-1] if versions else None
+    diff = SpecDiff(
+        {key: value[0] for key, value in latest["units"].items()} if latest else {},
+        hashes, latest["api_version"] if latest else None, version
+    )
+
+    # Work is relative to the indexed entry of the same api_version, if any
+    base = next((entry for entry in versions if entry["api_version"] == version), None)
+    base_units = base["units"] if base else {}
+    upserts, deletes, entry_units = [], [], {}
+    for key, text in units.items():
+        old = base_units.get(key)
+        if old is not None and old[0] == hashes[key]:
+            entry_units[key] = old
+            continue
+        docs = unit_docs(spec, platform, version, key, text)
+        upserts.extend(docs)
+        entry_units[key] = [hashes[key], len(docs)]
+        if old is not None and old[1] > len(docs):
+            deletes.extend(spec_doc_id(spec, version, key, n) for n in range(len(docs), old[1]))
+    if base:
+        deletes.extend(_entry_ids(spec, base, [key for key in base_units if key not in units]))
+
+    entry = {"api_version": version, "sha": sha, "archive": None, "units": entry_units}
+    retained = [other for other in versions if other is not base] + [entry]
+    for expired in retained[:-keep]:
+        deletes.extend(_entry_ids(spec, expired))
+    return {
+        "spec": spec, "path": path, "diff": diff, "upserts": upserts, "deletes": deletes,
+        "versions": retained[-keep:],
+    }
+
+
+_spec_cache = None
+
+
+def spec_embedding_cache():
+    """The embedding cache spec chunks go through (EMBEDDING_CACHE_PATH, else SPEC_EMBEDDING_CACHE_PATH)."""
+    global _spec_cache
+    cache = get_embedding_cache()
+    if cache is None:
+        if _spec_cache is None:
+            _spec_cache = EmbeddingCache(SPEC_EMBEDDING_CACHE_PATH)
+        cache = _spec_cache
+    return cache
+
+
+def chunks_to_embed(docs: list, cache=None) -> int:
+    """How many distinct chunk texts of docs are not in the embedding cache yet."""
+    cache = cache or spec_embedding_cache()
+    keys = list(dict.fromkeys(text_key(get_embedder().cache_key, doc["content"]) for doc in docs))
+    return len(keys) - cache.count_cached(keys)
+
+
+def apply_spec_sync(plan: dict, indexer, state: SpecVersionState, index_name: str) -> dict:
+    """Embeds (through the cache) and uploads the plan's docs, deletes its ids and records the state."""
+    upserts = plan["upserts"]
+    embedded = 0
+    if upserts:
+        cache = spec_embedding_cache()
+        embedded = chunks_to_embed(upserts, cache)
+        vectors = embed_texts([doc["content"] for doc in upserts], cache=cache)
+        for doc, vector in zip(upserts, vectors):
+            doc["embedding"] = vector
+        indexer.index_documents(upserts)
+    if plan["deletes"]:
+        indexer.delete_documents(plan["deletes"])
+
+    versions = plan["versions"]
+    if versions and versions[-1]["archive"] is None:
+        versions[-1]["archive"] = state.archive(plan["path"], plan["spec"], versions[-1]["api_version"])
+    state.set_versions(index_name, plan["spec"], versions)
+    state.save()
+    return {"upserted": len(upserts), "embedded": embedded, "deleted": len(plan["deletes"])}
+
+
+def record_spec_versions(index_name: str, specs: list, state: SpecVersionState = None):
+    """
+    Records [(path, platform)] as the only indexed version of each spec, after
+    a full build loaded them with spec_docs() (distributed and blue/green builds).
+    """
+    state = state or SpecVersionState()
+    for path, platform in specs:
+        version, units = load_spec_units(path)
+        spec = spec_id(path, platform)
+        entry_units = {
+            key: [unit_hash(text), len(chunk_file(text, chunk_size=1000, chunk_overlap=200))]
+            for key, text in units.items()
+        }
+        state.set_versions(index_name, spec, [{
+            "api_version": version, "sha": _file_sha(path),
+            "archive": state.archive(path, spec, version), "units": entry_units,
+        }])
+    state.save()
+
+
+def indexed_spec_docs(state: SpecVersionState, index_name: str) -> list:
+    """Unembedded docs of every version indexed in index_name, rebuilt from the archived specs."""
+    docs = []
+    for spec in state.specs(index_name):
+        platform = spec.split("/", 1)[0]
+        for entry in state.versions(index_name, spec):
+            archived = os.path.join(state.root, entry["archive"])
+            version, units = load_spec_units(archived)
+            for key in entry["units"]:
+                docs.extend(unit_docs(spec, platform, version, key, units[key]))
+    return docs
+
+
+def refresh_spec_snapshot(index_name: str, state: SpecVersionState, physical: str):
+    """Rebuilds the lexical snapshot from its non-spec docs plus every indexed spec version."""
+    kept = []
+    path = lexical_index_path(index_name)
+    if os.path.isfile(path):
+        snapshot = LexicalIndex.load(path)
+        kept = [doc for doc in map(snapshot.get, snapshot.doc_ids) if doc.get("doc_type") != "api-specs"]
+    build_lexical_index(kept + indexed_spec_docs(state, physical), index_name, **snapshot_fields(index_name))
+
+
+def spec_files(platform_dirs: list) -> list:
+    """[(path, platform)] of the specs under <platform>/api-specs, in build order."""
+    files = []
+    for platform_dir in platform_dirs:
+        for path in sorted(glob.glob(os.path.join(platform_dir, "api-specs", "*.json"))):
+            files.append((path, platform_dir))
+    return files
+
+
+def plan_specs(platform_dirs: list, state: SpecVersionState, index_name: str, keep: int = None) -> list:
+    """Sync plans for the specs on disk and for indexed specs whose file is gone; unchanged specs are skipped."""
+    files = spec_files(platform_dirs)
+    on_disk = {spec_id(path, platform) for path, platform in files}
+    for spec in state.specs(index_name):
+        platform, name = spec.split("/", 1)
+        if spec not in on_disk and platform in platform_dirs:
+            files.append((os.path.join(platform, "api-specs", name), platform))
+    plans = (plan_spec_sync(path, platform, state, index_name, keep) for path, platform in files)
+    return [plan for plan in plans if plan is not None]
+
+
+def sync_specs(platform_dirs: list, indexer, index_name: str, state: SpecVersionState = None,
+               keep: int = None) -> dict:
+    """Brings every spec's docs in index_name (a physical index) up to date; returns the totals."""
+    state = state or SpecVersionState()
+    totals = {"specs": 0, "upserted": 0, "embedded": 0, "deleted": 0}
+    for plan in plan_specs(platform_dirs, state, index_name, keep):
+        print(f"Spec {plan['spec']}: {plan['diff'].summary()}")
+        result = apply_spec_sync(plan, indexer, state, index_name)
+        print(f"  {result['upserted']} docs upserted ({result['embedded']} chunks embedded), "
+              f"{result['deleted']} deleted")
+        totals["specs"] += 1
+        for key in ("upserted", "embedded", "deleted"):
+            totals[key] += result[key]
+    return totals
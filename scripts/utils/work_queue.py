@@ -0,0 +1,206 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/utils/work_queue.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Durable work queue with leases, backed by a single SQLite file.
+#
+# The coordinator enqueues work units; workers (local processes, or other build
+# nodes sharing the file over a shared directory) lease one unit at a time,
+# renew the lease while working, and mark it done. Units whose lease expires
+# (crashed or stalled worker) go back to 'pending' and are re-issued, until
+# they have used max_attempts; then they are 'failed' like any other error.
+# Unit ids are deterministic: a fresh enqueue replaces the previous plan, and
+# a resumed one (fresh=False) leaves units already in the queue untouched.
+
+import json
+import time
+import sqlite3
+import hashlib
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    id            TEXT PRIMARY KEY,
+    index_name    TEXT NOT NULL,
+    kind          TEXT NOT NULL,
+    payload       TEXT NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'pending',
+    lease_owner   TEXT,
+    lease_expires REAL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    result        TEXT,
+    error         TEXT,
+    seq           INTEGER NOT NULL,
+    updated       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS units_status ON units (status, seq);
+"""
+
+
+def unit_id(index_name: str, kind: str, payload: dict) -> str:
+    """Deterministic id for a work unit."""
+    key = json.dumps([index_name, kind, payload], sort_keys=True)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class WorkQueue:
+    def __init__(self, db_path: str, timeout: float = 30.0):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _write(self):
+        # BEGIN IMMEDIATE takes the write lock up front so concurrent leases
+        # from several processes never hand out the same unit
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def enqueue(self, units: list, fresh: bool = True) -> int:
+        """
+        Adds units ({ index_name, kind, payload }) in order. fresh starts a new
+        run: units of earlier runs, finished or not, are dropped first. With
+        fresh=False units already in the queue (same id) are left untouched, so
+        an interrupted run resumes. Returns the number newly added.
+        """
+        now = time.time()
+        self._write()
+        try:
+            if fresh:
+                self.conn.execute("DELETE FROM units")
+            (seq,) = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM units").fetchone()
+            added = 0
+            for unit in units:
+                seq += 1
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO units (id, index_name, kind, payload, seq, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (unit_id(unit["index_name"], unit["kind"], unit["payload"]),
+                     unit["index_name"], unit["kind"], json.dumps(unit["payload"]), seq, now)
+                )
+                added += cursor.rowcount
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def lease(self, worker_id: str, lease_seconds: float = 300.0, max_attempts: int = 3):
+        """Leases the next pending (or expired) unit. Returns a unit dict or None."""
+        now = time.time()
+        self._write()
+        try:
+            self._expire(now, max_attempts)
+            row = self.conn.execute(
+                "SELECT id, index_name, kind, payload, attempts FROM units "
+                "WHERE status = ? ORDER BY seq LIMIT 1",
+                (PENDING,)
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE units SET status = ?, lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (LEASED, worker_id, now + lease_seconds, now, row[0])
+            )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return {
+            "id": row[0],
+            "index_name": row[1],
+            "kind": row[2],
+            "payload": json.loads(row[3]),
+            "attempts": row[4] + 1,
+        }
+
+    def renew(self, unit_id_: str, worker_id: str, lease_seconds: float = 300.0) -> bool:
+        """Extends a lease. False if the lease was lost (expired and re-issued)."""
+        cursor = self.conn.execute(
+            "UPDATE units SET lease_expires = ?, updated = ? "
+            "WHERE id = ? AND status = ? AND lease_owner = ?",
+            (time.time() + lease_seconds, time.time(), unit_id_, LEASED, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, unit_id_: str, worker_id: str, result: dict = None) -> bool:
+        cursor = self.conn.execute(
+            "UPDATE units SET status = ?, result = ?, error = NULL, lease_expires = NULL, updated = ? "
+            "WHERE id = ? AND status = ? AND lease_owner = ?",
+            (DONE, json.dumps(result or {}), time.time(), unit_id_, LEASED, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, unit_id_: str, worker_id: str, error: str, max_attempts: int = 3):
+        """Returns the unit to 'pending', or marks it 'failed' after max_attempts."""
+        self.conn.execute(
+            "UPDATE units SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+            "error = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+            "WHERE id = ? AND status = ? AND lease_owner = ?",
+            (max_attempts, FAILED, PENDING, error[:2000], time.time(), unit_id_, LEASED, worker_id)
+        )
+
+    def _expire(self, now: float, max_attempts: int) -> tuple:
+        """
+        Ends expired leases: back to 'pending', or 'failed' once the unit has
+        had max_attempts (a unit that kills its worker never reaches fail()).
+        Returns (requeued, failed).
+        """
+        failed = self.conn.execute(
+            "UPDATE units SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+            "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+            (FAILED, f"lease expired on attempt {max_attempts} of {max_attempts}", now,
+             LEASED, now, max_attempts)
+        ).rowcount
+        requeued = self.conn.execute(
+            "UPDATE units SET status = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+            "WHERE status = ? AND lease_expires < ?",
+            (PENDING, now, LEASED, now)
+        ).rowcount
+        return requeued, failed
+
+    def requeue_expired(self, max_attempts: int = 3) -> tuple:
+        """Ends expired leases (see _expire). Returns (requeued, failed)."""
+        self._write()
+        try:
+            counts = self._expire(time.time(), max_attempts)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return counts
+
+    def progress(self) -> dict:
+        """{ index_name: { status: count } } plus a '_total' entry."""
+        report = {"_total": {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}}
+        for index_name, status, count in self.conn.execute(
+            "SELECT index_name, status, COUNT(*) FROM units GROUP BY index_name, status"
+        ):
+            report.setdefault(index_name, {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0})[status] = count
+            report["_total"][status] += count
+        return report
+
+    def is_drained(self) -> bool:
+        """True when no unit is pending or leased."""
+        (open_units,) = self.conn.execute(
+            "SELECT COUNT(*) FROM units WHERE status IN (?, ?)", (PENDING, LEASED)
+        ).fetchone()
+        return open_units == 0
+
+    def failures(self) -> list:
+        return self.conn.execute(
+            "SELECT index_name, kind, payload, error FROM units WHERE status = ?", (FAILED,)
+        ).fetchall()
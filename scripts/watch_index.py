@@ -0,0 +1,366 @@
+################################################################################
+## cisco-data-bridge-domain-index/scripts/watch_index.py
+## Copyright (c) 2025 Jeff Teeter, Ph.D.
+## Cisco Systems, Inc.
+## Licensed under the Apache License, Version 2.0 (see LICENSE)
+## Distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND.
+################################################################################
+
+# Watch mode: keeps the indexes in sync with the corpus files as they change.
+#
+# Watches <platform>/api-docs, <platform>/api-specs, domain_summaries/, events/
+# and lob_samples/ (inotify, or polling where inotify is unavailable; see
+# utils/file_watch.py). Bursts of changes are debounced, and then only the
+# affected files are re-chunked. Document ids are deterministic (the same
+# ones distributed_build.py uses), and the ids and content hashes each file
+# produced are kept in WATCH_STATE_PATH. So for each changed file only new or
+# changed chunks are embedded and upserted, and chunks that disappeared are
+# deleted. OpenAPI specs are synced per operation and schema instead, with
+# api_version tracking (utils/spec_versions.py). A LOB folder built
+# denormalized stays so: when one of its files changes, the folder's other
+# files are re-synced too, since their docs carry the changed records. After
+# each batch the touched indexes' lexical snapshots are updated, and the
+# platform router is rebuilt when the domain summaries changed.
+#
+# On start-up every file is compared with the saved state, so edits made
+# while the watcher was down are picked up (the first run indexes everything).
+#
+#   python scripts/watch_index.py            # run until interrupted
+#   python scripts/watch_index.py --once     # sync once and exit
+
+import os
+import json
+import time
+import hashlib
+import argparse
+from dotenv import load_dotenv
+from indexers import get_indexer
+from embedders import get_embedder
+from utils.embedding import embed_texts
+from utils.file_watch import get_watcher, watch_batches, RESCAN
+from utils.parallel_chunking import plan_file_tasks
+from utils.index_versions import resolve_index
+from utils.spec_versions import (
+    SpecVersionState, plan_spec_sync, apply_spec_sync, load_spec_units, refresh_spec_snapshot
+)
+from utils.lexical_index import update_lexical_index
+from utils.lob_joins import build_join_index, lob_denormalize
+from utils.platform_router import build_platform_router
+from utils.metrics import inc, observe, export_metrics
+import distributed_build
+from distributed_build import build_unit_docs, PLATFORM_DIRS
+
+load_dotenv()
+
+WATCH_STATE_PATH = os.getenv("WATCH_STATE_PATH", "watch_state.json")
+WATCH_ROOTS = (
+    [os.path.join(platform, "api-docs") for platform in PLATFORM_DIRS]
+    + [os.path.join(platform, "api-specs") for platform in PLATFORM_DIRS]
+    + ["domain_summaries", "events", "lob_samples"]
+)
+
+
+def _is_corpus_path(path: str) -> bool:
+    parts = path.split(os.sep)
+    name = parts[-1]
+    if len(parts) == 3 and parts[0] in PLATFORM_DIRS:
+        return (parts[1] == "api-docs" and name.endswith(".md")) or (parts[1] == "api-specs" and name.endswith(".json"))
+    return (
+        parts == ["domain_summaries", "domain_summaries.json"]
+        or (len(parts) == 2 and parts[0] == "events" and name.endswith(".json"))
+        or (len(parts) == 3 and parts[0] == "lob_samples" and name.endswith(".json"))
+    )
+
+
+def _is_spec_path(path: str) -> bool:
+    parts = path.split(os.sep)
+    return len(parts) == 3 and parts[0] in PLATFORM_DIRS and parts[1] == "api-specs"
+
+
+def corpus_files() -> set:
+    files = set()
+    for root in WATCH_ROOTS:
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if _is_corpus_path(path):
+                    files.add(path)
+    return files
+
+
+def units_for_file(path: str) -> list:
+    """The work units (as distributed_build.py plans them) that index one corpus file."""
+    if not _is_corpus_path(path):
+        return []
+    parts = path.split(os.sep)
+    if _is_spec_path(path):
+        index_name = os.getenv("API_DOCS_INDEX_NAME", "api-docs-index")
+        payload = {"path": path, "platform": parts[0], "start": 0, "end": len(load_spec_units(path)[1])}
+        return [{"index_name": index_name, "kind": "api_spec", "payload": payload}]
+    if parts[0] in PLATFORM_DIRS:
+        index_name = os.getenv("API_DOCS_INDEX_NAME", "api-docs-index")
+        return [
+            {"index_name": index_name, "kind": "api_docs", "payload": task}
+            for task in plan_file_tasks(path, parts[0], parts[1])
+        ]
+    if parts[0] == "domain_summaries":
+        index_name = os.getenv("AZURE_SEARCH_DOMAIN_INDEX", "domain-summaries-index")
+        return [{"index_name": index_name, "kind": "domain_summaries", "payload": {"path": path}}]
+    payload = {"path": path, "start": 0, "end": len(distributed_build._load_records(path))}
+    if parts[0] == "events":
+        index_name = os.getenv("AZURE_SEARCH_EVENTS_INDEX", "events-index")
+        return [{"index_name": index_name, "kind": "events", "payload": payload}]
+    return [{"index_name": f"lob-{parts[1]}", "kind": "lob", "payload": payload}]
+
+
+def _file_sha(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _doc_hash(doc: dict) -> str:
+    body = {k: v for k, v in doc.items() if k != "embedding"}
+    return hashlib.sha1(json.dumps(body, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class WatchState:
+    """{ path: { sha, index, docs: { id: hash } } }, persisted as JSON."""
+
+    def __init__(self, path: str = WATCH_STATE_PATH):
+        self.path = path
+        self.files = {}
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.files = json.load(f)
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.files, f)
+        os.replace(tmp, self.path)
+
+
+class Syncer:
+    def __init__(self, state: WatchState, spec_state: SpecVersionState = None):
+        self.state = state
+        self.spec_state = spec_state or SpecVersionState()
+        self.indexers = {}
+        # Changes of the current batch, applied to the derived artifacts in refresh_derived()
+        self.lexical = {}  # logical index -> ({ id: doc } upserted, { ids } deleted)
+        self.specs_changed = False
+        self.router_docs = None
+
+    def _track_lexical(self, index_name: str, upserts: list, deletes: list):
+        upserted, deleted = self.lexical.setdefault(index_name, ({}, set()))
+        for doc in upserts:
+            upserted[doc["id"]] = doc
+            deleted.discard(doc["id"])
+        for doc_id in deletes:
+            upserted.pop(doc_id, None)
+            deleted.add(doc_id)
+
+    def refresh_derived(self):
+        """Brings the lexical snapshots and the platform router up to date with the batch."""
+        for index_name, (upserted, deleted) in self.lexical.items():
+            update_lexical_index(index_name, list(upserted.values()), deleted)
+        if self.specs_changed:
+            index_name = os.getenv("API_DOCS_INDEX_NAME", "api-docs-index")
+            refresh_spec_snapshot(index_name, self.spec_state, resolve_index(index_name))
+        if self.router_docs:
+            build_platform_router(self.router_docs, embedder_key=get_embedder().cache_key)
+        self.lexical, self.specs_changed, self.router_docs = {}, False, None
+
+    def _indexer(self, index_name: str, refresh_schema: bool = False):
+        # Keyed by the physical index, so writes follow a blue/green swap
+        physical = resolve_index(index_name)
+        indexer = self.indexers.get(physical)
+        folder = distributed_build._lob_folder(index_name)
+        if indexer is None or (folder and refresh_schema):
+            indexer = indexer or get_indexer(physical)
+            if folder:
+                # Typed LOB fields can grow when a file changes; Azure adds them in place
+                indexer.set_field_schema(distributed_build._lob_schema(folder).fields)
+            indexer.create_index()
+            self.indexers[physical] = indexer
+        return indexer
+
+    def sync_spec_file(self, path: str):
+        """Syncs a spec's changed operations and schemas. Returns (upserts, deletes) or None if unchanged."""
+        index_name = os.getenv("API_DOCS_INDEX_NAME", "api-docs-index")
+        indexer = self._indexer(index_name)
+        # Watch state from before specs were versioned holds path-range chunk ids
+        legacy = self.state.files.pop(path, None)
+        plan = plan_spec_sync(path, path.split(os.sep)[0], self.spec_state, indexer.index_name)
+        if plan is None and legacy is None:
+            return None
+
+        upserts = deletes = 0
+        if legacy and legacy["docs"]:
+            indexer.delete_documents(list(legacy["docs"]))
+            deletes += len(legacy["docs"])
+        if plan is not None:
+            print(f"Spec {plan['spec']}: {plan['diff'].summary()}")
+            result = apply_spec_sync(plan, indexer, self.spec_state, indexer.index_name)
+            upserts += result["upserted"]
+            deletes += result["deleted"]
+        self.specs_changed = True
+        inc("watch_upserts_total", upserts, index=index_name)
+        inc("watch_deletes_total", deletes, index=index_name)
+        return upserts, deletes
+
+    def _changed(self, path: str) -> bool:
+        entry = self.state.files.get(path)
+        if not os.path.isfile(path):
+            return entry is not None
+        return entry is None or entry["sha"] != _file_sha(path)
+
+    def sync_file(self, path: str, force: bool = False):
+        """
+        Brings one file's documents up to date. Returns (upserts, deletes) or
+        None if unchanged; force re-derives the docs of an unchanged file.
+        """
+        if _is_spec_path(path):
+            return self.sync_spec_file(path)
+        entry = self.state.files.get(path)
+        exists = os.path.isfile(path)
+        if not exists and entry is None:
+            return None
+        sha = _file_sha(path) if exists else None
+        if entry is not None and entry["sha"] == sha and not force:
+            return None
+
+        docs, index_name = [], entry["index"] if entry else None
+        if exists:
+            units = units_for_file(path)
+            if not units:
+                return None
+            index_name = units[0]["index_name"]
+            for unit in units:
+                docs.extend(build_unit_docs(unit, embed=False))
+
+        old = entry["docs"] if entry else {}
+        new = {doc["id"]: _doc_hash(doc) for doc in docs}
+        upserts = [doc for doc in docs if old.get(doc["id"]) != new[doc["id"]]]
+        deletes = [doc_id for doc_id in old if doc_id not in new]
+        if deletes:
+            # An id another file still produces (e.g. a copied events file) stays indexed
+            owned = {
+                doc_id for other, e in self.state.files.items()
+                if other != path and e["index"] == index_name for doc_id in e["docs"]
+            }
+            deletes = [doc_id for doc_id in deletes if doc_id not in owned]
+
+        indexer = self._indexer(index_name, refresh_schema=exists)
+        if upserts:
+            vectors = embed_texts([doc["content"] for doc in upserts])
+            for doc, vector in zip(upserts, vectors):
+                doc["embedding"] = vector
+            indexer.index_documents(upserts)
+        if deletes:
+            indexer.delete_documents(deletes)
+        self._track_lexical(index_name, upserts, deletes)
+        if exists and units[0]["kind"] == "domain_summaries":
+            # The router needs every summary vector, not just the changed ones
+            unembedded = [doc for doc in docs if "embedding" not in doc]
+            for doc, vector in zip(unembedded, embed_texts([doc["content"] for doc in unembedded])):
+                doc["embedding"] = vector
+            self.router_docs = docs
+
+        if exists:
+            self.state.files[path] = {"sha": sha, "index": index_name, "docs": new}
+        else:
+            self.state.files.pop(path, None)
+        inc("watch_upserts_total", len(upserts), index=index_name)
+        inc("watch_deletes_total", len(deletes), index=index_name)
+        return len(upserts), len(deletes)
+
+    def known_files(self) -> set:
+        """Files that have docs indexed (watch state and versioned specs), so deletions are noticed."""
+        index_name = resolve_index(os.getenv("API_DOCS_INDEX_NAME", "api-docs-index"))
+        specs = {
+            os.path.join(spec.split("/", 1)[0], "api-specs", spec.split("/", 1)[1])
+            for spec in self.spec_state.specs(index_name)
+        }
+        return set(self.state.files) | specs
+
+    def sync(self, paths, first_event: float = None) -> int:
+        """Syncs paths (skipping unchanged ones), saves the state and reports freshness."""
+        synced = 0
+        paths = sorted(paths)
+        # A LOB file's schema and links are folder-wide, so the cached folders are rebuilt once per batch
+        lob_changed = {
+            path for path in paths
+            if path.split(os.sep)[0] == "lob_samples" and len(path.split(os.sep)) == 3 and self._changed(path)
+        }
+        lob_folders = {path.split(os.sep)[1] for path in lob_changed}
+        if lob_folders:
+            distributed_build.clear_lob_caches()
+
+        def sync_one(path, force=False):
+            nonlocal synced
+            try:
+                result = self.sync_file(path, force)
+            except (ValueError, OSError) as e:
+                # Usually a file caught mid-write; its next change retries it
+                print(f"Skipping {path}: {e}")
+                return
+            if result is None or (force and result == (0, 0)):
+                return
+            synced += 1
+            lag = f", {time.time() - first_event:.2f}s after the change" if first_event else ""
+            print(f"Synced {path}: {result[0]} upserted, {result[1]} deleted{lag}")
+
+        for path in paths:
+            sync_one(path)
+        for folder in sorted(lob_folders):
+            if not os.path.isdir(os.path.join("lob_samples", folder)):
+                continue
+            denormalized = lob_denormalize(folder)
+            if denormalized:
+                # The other files' docs quote the changed records; unchanged docs are skipped by hash
+                linked = {p for p in corpus_files() if p.split(os.sep)[:2] == ["lob_samples", folder]}
+                for path in sorted(linked - lob_changed):
+                    sync_one(path, force=True)
+            build_join_index(distributed_build._lob_sources(folder), folder, denormalized=denormalized)
+        if synced:
+            self.refresh_derived()
+            self.state.save()
+            if first_event:
+                observe("watch_freshness_seconds", time.time() - first_event)
+        return synced
+
+
+def run_watch(once: bool = False, backend: str = None):
+    state = WatchState()
+    syncer = Syncer(state)
+
+    print("Initial sync against the saved watch state...")
+    synced = syncer.sync(corpus_files() | syncer.known_files())
+    print(f"Initial sync done ({synced} files changed).")
+    if once:
+        return
+
+    watcher = get_watcher(WATCH_ROOTS, backend)
+    print(f"Watching {len(WATCH_ROOTS)} corpus directories ({type(watcher).__name__}). Ctrl+C to stop.")
+    try:
+        for batch, first_event in watch_batches(watcher):
+            if RESCAN in batch:
+                paths = corpus_files() | syncer.known_files()
+            else:
+                paths = {os.path.relpath(p) for p in batch}
+                known = syncer.known_files()
+                paths = {p for p in paths if _is_corpus_path(p) or p in known}
+            syncer.sync(paths, first_event)
+    except KeyboardInterrupt:
+        print("Stopping watch.")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Continuously re-index changed corpus files.")
+    parser.add_argument("--once", action="store_true", help="sync changed files once and exit")
+    parser.add_argument("--backend", choices=["auto", "inotify", "poll"], help="change notification (default: WATCH_BACKEND)")
+    args = parser.parse_args()
+    run_watch(once=args.once, backend=args.backend)
+    export_metrics()